@@ -0,0 +1,84 @@
+# benchmarks/bench_chat_view.py
+"""Append latency of the chat history as the session grows.
+
+Appends alternating user questions and full assistant responses (with
+code blocks) to the virtualized ChatView and to the previous
+QTextBrowser/insertHtml display, and reports the median time per append,
+including layout and repaint, in buckets of message count.
+
+Run from the project root (QT_QPA_PLATFORM=offscreen works headless):
+    python -m benchmarks.bench_chat_view
+"""
+import argparse
+import html
+import statistics
+import sys
+import time
+
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtWidgets import QApplication, QTextBrowser
+
+from src.core.canned_llm import DEFAULT_RESPONSE
+from src.ui.chat_view import ChatView
+
+QUESTION = "Which 1740 buildings within 100 meters of a church are rented out as shops?"
+
+
+class TextBrowserChat(QTextBrowser):
+    """The previous chat display: one nested HTML table per message"""
+
+    def add_message(self, message: str, is_user: bool):
+        formatted = html.escape(message).replace('\n', '<br>')
+        color, align = ('#DCF8C6', 'right') if is_user else ('#E8E8E8', 'left')
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        self.setTextCursor(cursor)
+        self.insertHtml(f"""
+            <table width="100%" cellpadding="0" cellspacing="0"><tr><td align="{align}">
+                <table bgcolor="{color}" style="border-radius: 10px; margin: 5px 0;"><tr>
+                    <td style="padding: 8px;">{formatted}</td>
+                </tr></table>
+            </td></tr></table>
+        """)
+        self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+
+
+def run(app: QApplication, widget, count: int, bucket: int):
+    widget.resize(500, 800)
+    widget.show()
+    app.processEvents()
+    timings = []
+    for i in range(count):
+        is_user = i % 2 == 0
+        start = time.perf_counter()
+        widget.add_message(QUESTION if is_user else DEFAULT_RESPONSE, is_user)
+        app.processEvents()
+        timings.append(time.perf_counter() - start)
+    widget.close()
+    return [statistics.median(timings[i:i + bucket]) * 1000 for i in range(0, count, bucket)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=600)
+    parser.add_argument('--bucket', type=int, default=100)
+    parser.add_argument('--skip-baseline', action='store_true',
+                        help="Only measure ChatView (the baseline gets slow at high counts)")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    results = {'ChatView': run(app, ChatView(), args.messages, args.bucket)}
+    if not args.skip_baseline:
+        results['QTextBrowser'] = run(app, TextBrowserChat(), args.messages, args.bucket)
+
+    print(f"{'messages':>10}" + ''.join(f"{name + ' (ms)':>20}" for name in results))
+    for bucket_index in range(len(results['ChatView'])):
+        start = bucket_index * args.bucket
+        label = f"{start + 1}-{min(start + args.bucket, args.messages)}"
+        print(f"{label:>10}" + ''.join(f"{medians[bucket_index]:>20.2f}" for medians in results.values()))
+
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
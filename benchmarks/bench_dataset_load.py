@@ -0,0 +1,52 @@
+# benchmarks/bench_dataset_load.py
+"""Compare dataset load time from the CSV/GeoJSON sources against the columnar cache.
+
+Run from the project root:
+    python -m benchmarks.bench_dataset_load --repeat 5
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from src.core.dataset_cache import DatasetCache, read_source
+from src.core.dataset_registry import DATA_DIR, DATASET_SOURCES
+
+
+def time_call(func, repeat: int) -> list:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = DatasetCache(cache_dir)
+        if not cache.available():
+            raise SystemExit("pyarrow is not installed, nothing to compare")
+
+        print(f"{'dataset':<16}{'source (ms)':>14}{'convert (ms)':>14}{'cache (ms)':>12}{'speedup':>10}")
+        for name, filename in DATASET_SOURCES.items():
+            path = os.path.join(args.data_dir, filename)
+
+            source = time_call(lambda: read_source(path), args.repeat)
+            convert = time_call(lambda: cache.write(name, path, read_source(path)), 1)
+            cached = time_call(lambda: cache.load(name, path), args.repeat)
+
+            source_ms = statistics.median(source) * 1000
+            cached_ms = statistics.median(cached) * 1000
+            print(f"{name:<16}{source_ms:>14.1f}{convert[0] * 1000:>14.1f}"
+                  f"{cached_ms:>12.1f}{source_ms / cached_ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
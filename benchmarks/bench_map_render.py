@@ -0,0 +1,83 @@
+# benchmarks/bench_map_render.py
+"""Measure map HTML size and time to loadFinished for large point layers.
+
+For 1k/10k/35k building points, writes one map with plain folium markers
+and one through MapRenderer.add_points, then loads each into a
+QWebEngineView and times it until loadFinished fires.
+
+Run from the project root (QT_QPA_PLATFORM=offscreen works headless):
+    python -m benchmarks.bench_map_render
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import folium
+import pandas as pd
+from PyQt6.QtCore import QEventLoop, QTimer, QUrl
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtWebEngineWidgets import QWebEngineView
+
+from src.core.dataset_registry import DatasetRegistry
+from src.core.map_render import MapRenderer, VENICE_CENTER
+
+
+def naive_map(points: pd.DataFrame, path: str):
+    """One folium CircleMarker per point, as generated code usually does it"""
+    m = folium.Map(location=VENICE_CENTER, zoom_start=14)
+    for lat, lng, family in zip(points['latitude'], points['longitude'], points['owner_family_name']):
+        folium.CircleMarker([lat, lng], radius=3, popup=str(family)).add_to(m)
+    m.save(path)
+
+
+def helper_map(points: pd.DataFrame, path: str):
+    renderer = MapRenderer()
+    m = renderer.make_map()
+    renderer.add_points(m, points, popup_columns=['owner_family_name'])
+    m.save(path)
+
+
+def time_load(view: QWebEngineView, path: str, timeout: float = 120.0) -> float:
+    loop = QEventLoop()
+    view.loadFinished.connect(loop.quit)
+    QTimer.singleShot(int(timeout * 1000), loop.quit)
+    start = time.perf_counter()
+    view.load(QUrl.fromLocalFile(os.path.abspath(path)))
+    loop.exec()
+    view.loadFinished.disconnect(loop.quit)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 35000])
+    args = parser.parse_args()
+
+    registry = DatasetRegistry.instance()
+    buildings = pd.concat([registry.get('buildings_1740'), registry.get('buildings_1808')],
+                          ignore_index=True)
+
+    app = QApplication(sys.argv)
+    view = QWebEngineView()
+    view.resize(1200, 800)
+
+    print(f"{'points':>8}  {'renderer':<8}{'html (KB)':>12}{'write (s)':>11}{'load (s)':>10}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        for size in args.sizes:
+            points = buildings.sample(n=min(size, len(buildings)), random_state=0)
+            for label, build in (('markers', naive_map), ('helpers', helper_map)):
+                path = os.path.join(out_dir, f'{label}_{size}.html')
+                start = time.perf_counter()
+                build(points, path)
+                write_time = time.perf_counter() - start
+                load_time = time_load(view, path)
+                print(f"{len(points):>8}  {label:<8}{os.path.getsize(path) / 1024:>12.0f}"
+                      f"{write_time:>11.2f}{load_time:>10.2f}")
+
+    app.quit()
+
+
+if __name__ == '__main__':
+    main()
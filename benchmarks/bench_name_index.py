@@ -0,0 +1,73 @@
+# benchmarks/bench_name_index.py
+"""Time name lookups: full-table string scans vs the name index.
+
+Every question in data/questions.csv is resolved with
+NameIndex.resolve_question. Each resolved name is then looked up again
+through the index (exact and with one injected typo), and with the
+`str.contains` scan generated code typically uses.
+
+Run from the project root:
+    python -m benchmarks.bench_name_index
+"""
+import argparse
+import csv
+import statistics
+import time
+
+from src.core.dataset_registry import DatasetRegistry
+from src.core.name_index import NameIndex
+
+
+def scan(registry: DatasetRegistry, dataset: str, column: str, name: str):
+    frame = registry.get(dataset)
+    return frame[frame[column].astype(str).str.lower().str.contains(name, regex=False)].index
+
+
+def typo(name: str) -> str:
+    """Swap two adjacent letters in the middle of the name"""
+    middle = len(name) // 2
+    return name[:middle - 1] + name[middle] + name[middle - 1] + name[middle + 1:] if len(name) > 3 else name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', default='data/questions.csv')
+    args = parser.parse_args()
+
+    registry = DatasetRegistry.instance()
+    registry.load_all()
+    index = NameIndex(registry)
+    start = time.perf_counter()
+    index.build()
+    print(f"Index built in {time.perf_counter() - start:.2f} s")
+
+    with open(args.questions, newline='', encoding='utf-8') as f:
+        questions = [row['question'] for row in csv.DictReader(f)]
+
+    resolve_times, matches = [], []
+    for question in questions:
+        start = time.perf_counter()
+        matches.extend(index.resolve_question(question))
+        resolve_times.append(time.perf_counter() - start)
+
+    timings = {'scan': [], 'index exact': [], 'index typo': []}
+    for match in matches:
+        for label, run in (
+            ('scan', lambda: scan(registry, match.dataset, match.column, match.key)),
+            ('index exact', lambda: index.rows(match.key, match.dataset, match.column)),
+            ('index typo', lambda: index.rows(typo(match.key), match.dataset, match.column)),
+        ):
+            start = time.perf_counter()
+            run()
+            timings[label].append(time.perf_counter() - start)
+
+    print(f"{len(questions)} questions, {len(matches)} names resolved, "
+          f"median {statistics.median(resolve_times) * 1000:.2f} ms per question")
+    print(f"{'lookup':<14}{'median (ms)':>12}{'max (ms)':>10}")
+    for label, values in timings.items():
+        if values:
+            print(f"{label:<14}{statistics.median(values) * 1000:>12.3f}{max(values) * 1000:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()
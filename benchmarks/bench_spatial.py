@@ -0,0 +1,82 @@
+# benchmarks/bench_spatial.py
+"""Time radius and nearest-landmark queries: shapely buffers vs the spatial index.
+
+Every spatial question in data/questions.csv that names a year and a
+landmark type is turned into a within-radius query (100 m unless the
+question states another distance) and run both ways.
+
+Run from the project root:
+    python -m benchmarks.bench_spatial
+"""
+import argparse
+import csv
+import re
+import statistics
+import time
+
+from src.core.dataset_registry import DatasetRegistry
+from src.core.spatial_index import METRIC_CRS, SpatialIndex
+
+
+def parse_query(question: str):
+    text = question.lower()
+    year = re.search(r'\b(1740|1808)\b', text)
+    landmark = re.search(r'\b(church|square)(es|s)?\b', text)
+    if not year or not landmark:
+        return None
+    meters = re.search(r'within (\d+) meters', text)
+    return (f"buildings_{year.group(1)}", landmark.group(1),
+            float(meters.group(1)) if meters else 100.0)
+
+
+def brute_force(registry: DatasetRegistry, dataset: str, landmark_type: str, meters: float):
+    """What generated code typically does: buffer every landmark and test containment"""
+    buildings = registry.get(dataset).to_crs(METRIC_CRS)
+    landmarks = registry.get('landmarks')
+    landmarks = landmarks[landmarks['landmark_type'] == landmark_type].to_crs(METRIC_CRS)
+    zone = landmarks.geometry.buffer(meters).unary_union
+    return buildings[buildings.geometry.within(zone)]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', default='data/questions.csv')
+    args = parser.parse_args()
+
+    registry = DatasetRegistry.instance()
+    registry.load_all()
+    index = SpatialIndex(registry)
+
+    with open(args.questions, newline='', encoding='utf-8') as f:
+        questions = [row for row in csv.DictReader(f) if row['category'] == 'spatial']
+
+    brute_times, index_times = [], []
+    print(f"{'id':>4}  {'query':<36}{'buffers (ms)':>14}{'index (ms)':>12}{'rows':>8}")
+    for row in questions:
+        query = parse_query(row['question'])
+        if not query:
+            continue
+        brute_time, expected = timed(lambda: brute_force(registry, *query))
+        index_time, result = timed(lambda: index.within_radius(*query))
+        if len(expected) != len(result):
+            print(f"{row['id']:>4}  row count mismatch: {len(expected)} vs {len(result)}")
+        brute_times.append(brute_time)
+        index_times.append(index_time)
+        label = f"{query[0]} / {query[1]} / {query[2]:.0f} m"
+        print(f"{row['id']:>4}  {label:<36}{brute_time * 1000:>14.1f}"
+              f"{index_time * 1000:>12.1f}{len(result):>8}")
+
+    if index_times:
+        print(f"\n{len(index_times)} queries, median buffers "
+              f"{statistics.median(brute_times) * 1000:.1f} ms, median index "
+              f"{statistics.median(index_times) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# benchmarks/bench_startup.py
+"""Measure what the application imports before its window can be shown.
+
+Each target module is imported in a fresh interpreter under
+`python -X importtime`. The report gives the wall time of the import, the
+heaviest packages it pulled in, and which of the heavy dependencies
+(QtWebEngine, langchain, IPython, the geospatial stack) were loaded.
+Those must stay out of the first-paint path, so loading one of them there
+fails the run, as does exceeding --budget-ms.
+
+Run from the project root:
+    python -m benchmarks.bench_startup --repeat 5 --budget-ms 1500
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+# Imported before the window is shown
+FIRST_PAINT_TARGETS = ['src.ui.main_window', 'src.main']
+# Loaded in the background after the window is shown, reported for comparison
+DEFERRED_TARGETS = ['src.core.chat_manager', 'src.ui.map_panel', 'src.core.code_executor', 'src.core.name_index']
+HEAVY_MODULES = [
+    'PyQt6.QtWebEngineWidgets', 'PyQt6.QtWebEngineCore', 'langchain', 'langchain_anthropic',
+    'IPython', 'geopandas', 'pandas', 'numpy', 'scipy', 'shapely', 'folium', 'h3',
+]
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import {target}\n"
+    "seconds = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': seconds, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))\n"
+)
+
+
+def run_probe(target: str) -> tuple:
+    """Import target in a fresh interpreter; returns (seconds, heavy modules loaded, {package: cumulative us})"""
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(target=target, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{completed.stderr.strip().splitlines()[-1]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    # Lines are printed children first; walking them backwards visits each import before
+    # what it imported. An entry is counted unless an enclosing import is of the same package,
+    # whose cumulative time already includes it.
+    packages = defaultdict(int)
+    ancestors = []
+    for line in reversed(completed.stderr.splitlines()):
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        level = len(match.group(3)) // 2
+        package = match.group(4).split('.')[0]
+        del ancestors[level:]
+        if package not in ancestors:
+            packages[package] += int(match.group(2))
+        ancestors.append(package)
+    return result['seconds'], result['heavy'], dict(packages)
+
+
+def baseline_packages() -> set:
+    """Packages the interpreter imports on its own, left out of the breakdown"""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import json, sys, time'],
+                               capture_output=True, text=True)
+    return {match.group(4).split('.')[0] for match in map(IMPORT_LINE.match, completed.stderr.splitlines())
+            if match}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=8, help="Heaviest packages listed per target")
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help="Fail when importing a first-paint target takes longer (median)")
+    args = parser.parse_args()
+
+    baseline = baseline_packages()
+    failures = []
+    for target in FIRST_PAINT_TARGETS + DEFERRED_TARGETS:
+        runs = []
+        for _ in range(args.repeat):
+            try:
+                runs.append(run_probe(target))
+            except RuntimeError as e:
+                print(f"{target}: {str(e)}\n")
+                break
+        if not runs:
+            continue
+        median = statistics.median(seconds for seconds, _, _ in runs) * 1000
+        heavy = runs[-1][1]
+        packages = sorted(((us, name) for name, us in runs[-1][2].items()
+                           if name not in baseline and name != 'src'),
+                          reverse=True)
+
+        first_paint = target in FIRST_PAINT_TARGETS
+        print(f"{target} ({'first paint' if first_paint else 'deferred'}): {median:.0f} ms")
+        for us, name in packages[:args.top]:
+            print(f"    {name:<28}{us / 1000:>10.1f} ms")
+        if heavy:
+            print(f"    heavy modules loaded: {', '.join(heavy)}")
+        print()
+
+        if first_paint and heavy:
+            failures.append(f"{target} loads {', '.join(heavy)} before the window is shown")
+        if first_paint and args.budget_ms and median > args.budget_ms:
+            failures.append(f"{target} took {median:.0f} ms, budget {args.budget_ms:.0f} ms")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+# src/bench.py
+"""Headless batch evaluation over data/questions.csv.
+
+Runs every question through ChatManager, CodeParser, the pre-flight
+checks and the execution pool without Qt, and writes per-question stage
+latencies plus aggregate success rates and percentiles to a JSON report.
+
+    python -m src.bench --llm canned --concurrency 4
+    python -m src.bench --llm anthropic --replay     # answers only from the response cache
+"""
+import os
+import csv
+import math
+import json
+import time
+import logging
+import argparse
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .core.config_loader import ConfigLoader
+from .core.chat_manager import ChatManager
+from .core.canned_llm import CannedChatModel
+from .core.execution_pool import ExecutionPool
+from .core.response_cache import ResponseCache
+from .utils.code_parser import CodeParser
+from .utils.preflight import CodePreflight
+
+
+STAGES = ['llm', 'extraction', 'preflight', 'execution', 'total']
+
+
+def load_questions(path: str, limit: Optional[int] = None) -> List[dict]:
+    with open(path, newline='', encoding='utf-8') as f:
+        questions = list(csv.DictReader(f))
+    return questions[:limit] if limit else questions
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class BenchmarkRunner:
+    def __init__(self, system_prompt: str, pool: ExecutionPool, make_chat_manager):
+        self.logger = logging.getLogger(__name__)
+        self.system_prompt = system_prompt
+        self.pool = pool
+        self.make_chat_manager = make_chat_manager
+
+    def run_question(self, question: dict) -> dict:
+        record = {
+            'id': question['id'],
+            'category': question['category'],
+            'question': question['question'],
+            'success': False,
+            'error': None,
+            'latency': {},
+            'artifact_bytes': None,
+            'preflight': [],
+            'limit': None,
+        }
+        start = time.perf_counter()
+
+        chat_manager = self.make_chat_manager()
+        chat_manager.add_message(question['question'], is_user=True)
+        response = chat_manager.get_response(self.system_prompt)
+        llm_done = time.perf_counter()
+        record['latency']['llm'] = llm_done - start
+        if not response:
+            record['error'] = 'no response'
+            return record
+
+        code = CodeParser.extract_python_code(response)
+        extracted = time.perf_counter()
+        record['latency']['extraction'] = extracted - llm_done
+        if not code:
+            record['error'] = 'no code block'
+            return record
+
+        preflight = CodePreflight.check(code)
+        checked = time.perf_counter()
+        record['latency']['preflight'] = checked - extracted
+        record['preflight'] = [diagnostic.code for diagnostic in preflight.diagnostics]
+        if not preflight.ok:
+            record['latency']['total'] = checked - start
+            record['error'] = preflight.report()
+            return record
+
+        result = self.pool.run(preflight.code)
+        finished = time.perf_counter()
+        record['latency']['execution'] = finished - checked
+        record['latency']['total'] = finished - start
+        record['success'] = result.success
+        record['limit'] = result.limit
+        record['worker'] = result.stats
+        if result.html_path and os.path.exists(result.html_path):
+            record['artifact_bytes'] = os.path.getsize(result.html_path)
+        if not result.success:
+            record['error'] = result.output[-2000:]
+        return record
+
+    def run(self, questions: List[dict], concurrency: int) -> dict:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            records = list(executor.map(self.run_question, questions))
+        wall_time = time.perf_counter() - start
+        return {
+            'summary': summarize(records, wall_time, concurrency),
+            'questions': records,
+        }
+
+
+def summarize(records: List[dict], wall_time: float, concurrency: int) -> dict:
+    by_category: Dict[str, List[dict]] = defaultdict(list)
+    for record in records:
+        by_category[record['category']].append(record)
+
+    latency = {}
+    for stage in STAGES:
+        values = [r['latency'][stage] for r in records if stage in r['latency']]
+        latency[stage] = {
+            'p50': percentile(values, 0.50),
+            'p95': percentile(values, 0.95),
+            'count': len(values),
+        }
+
+    artifact_sizes = [r['artifact_bytes'] for r in records if r['artifact_bytes']]
+    return {
+        'questions': len(records),
+        'concurrency': concurrency,
+        'wall_time': wall_time,
+        'throughput_per_minute': len(records) / wall_time * 60 if wall_time else None,
+        'success_rate': sum(r['success'] for r in records) / len(records) if records else None,
+        'success_rate_by_category': {
+            category: sum(r['success'] for r in items) / len(items)
+            for category, items in sorted(by_category.items())
+        },
+        'latency': latency,
+        'stopped_by_limit': dict(Counter(r['limit']['kind'] for r in records if r.get('limit'))),
+        'artifact_bytes': {
+            'p50': percentile(artifact_sizes, 0.50),
+            'p95': percentile(artifact_sizes, 0.95),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batch evaluation over the question set")
+    parser.add_argument('--questions', default='data/questions.csv')
+    parser.add_argument('--output', default='bench_report.json')
+    parser.add_argument('--concurrency', type=int, default=2)
+    parser.add_argument('--limit', type=int, help="Only run the first N questions")
+    parser.add_argument('--llm', choices=['canned', 'anthropic'], default='canned')
+    parser.add_argument('--canned-responses', help="JSON file mapping question text to a response")
+    parser.add_argument('--canned-latency', type=float, default=0.0,
+                        help="Simulated seconds per canned response")
+    parser.add_argument('--replay', action='store_true',
+                        help="Only answer from the response cache, never call the API")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    prompts = ConfigLoader.load_prompts()
+
+    if args.llm == 'canned':
+        if args.canned_responses:
+            client = CannedChatModel.from_file(args.canned_responses, latency=args.canned_latency)
+        else:
+            client = CannedChatModel(latency=args.canned_latency)
+
+        def make_chat_manager():
+            return ChatManager(api_key='', model='canned', client=client)
+    else:
+        config = ConfigLoader.load_config()
+        cache = ResponseCache.from_config(config.get('response_cache'))
+        if args.replay:
+            cache = cache or ResponseCache()
+            cache.replay_only = True
+
+        def make_chat_manager():
+            return ChatManager(api_key=config['api_key'], model=config['model'], cache=cache)
+
+    questions = load_questions(args.questions, args.limit)
+    pool = ExecutionPool(args.concurrency)
+    try:
+        report = BenchmarkRunner(prompts['system_prompt'], pool, make_chat_manager).run(
+            questions, args.concurrency
+        )
+    finally:
+        pool.shutdown()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=4)
+
+    summary = report['summary']
+    print(f"{summary['questions']} questions in {summary['wall_time']:.1f}s, "
+          f"success rate {summary['success_rate']:.0%}")
+    for stage in STAGES:
+        stats = summary['latency'][stage]
+        if stats['count']:
+            print(f"  {stage:<11} p50 {stats['p50']:.3f}s  p95 {stats['p95']:.3f}s")
+    print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,43 @@
-from .chat_manager import ChatManager
-from .code_executor import CodeExecutor
-from .config_loader import ConfigLoader
+import importlib
 
-__all__ = ['ChatManager', 'CodeExecutor', 'ConfigLoader']
\ No newline at end of file
+# Exported name -> submodule. Submodules are imported on first access, so
+# importing any one of them doesn't pull in geopandas, scipy, folium and
+# langchain through this package.
+_EXPORTS = {
+    'ArtifactRecorder': 'artifacts',
+    'ArtifactRetention': 'artifacts',
+    'AssetBundle': 'map_assets',
+    'BuildingLinks': 'building_links',
+    'ChatManager': 'chat_manager',
+    'CodeExecutor': 'code_executor',
+    'ConfigLoader': 'config_loader',
+    'DatasetCache': 'dataset_cache',
+    'DatasetRegistry': 'dataset_registry',
+    'ExecutionPool': 'execution_pool',
+    'ExecutionResult': 'execution_pool',
+    'ExecutionResultCache': 'result_cache',
+    'FeatureStore': 'feature_store',
+    'HexAggregates': 'hex_aggregates',
+    'HistoryManager': 'history_manager',
+    'LoggingPipeline': 'logging_pipeline',
+    'MapAssetServer': 'map_assets',
+    'MapRenderer': 'map_render',
+    'NameIndex': 'name_index',
+    'RepairLoop': 'repair',
+    'ResponseCache': 'response_cache',
+    'ResponseStream': 'response_stream',
+    'SpatialIndex': 'spatial_index',
+    'SpeculativeRun': 'speculative',
+    'StartupLoader': 'startup',
+    'Tracer': 'tracing',
+}
+
+__all__ = ['ArtifactRecorder', 'ArtifactRetention', 'AssetBundle', 'BuildingLinks', 'ChatManager', 'CodeExecutor', 'ConfigLoader', 'DatasetCache', 'DatasetRegistry', 'ExecutionPool', 'ExecutionResult', 'ExecutionResultCache', 'FeatureStore', 'HexAggregates', 'HistoryManager', 'LoggingPipeline', 'MapAssetServer', 'MapRenderer', 'NameIndex', 'RepairLoop', 'ResponseCache', 'ResponseStream', 'SpatialIndex', 'SpeculativeRun', 'StartupLoader', 'Tracer']
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
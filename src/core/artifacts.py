@@ -0,0 +1,126 @@
+# src/core/artifacts.py
+import os
+import sys
+import logging
+import threading
+from typing import List, Optional
+
+
+class ArtifactRecorder:
+    """Records the HTML files a run opens for writing.
+
+    Installed once per worker process as an audit hook, so the artifact of
+    each run is reported directly instead of being searched for afterwards.
+    """
+
+    WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND
+
+    def __init__(self, suffix: str = '.html'):
+        self.suffix = suffix
+        self.active = False
+        self.paths: List[str] = []
+
+    def install(self):
+        sys.addaudithook(self._hook)
+
+    def start(self):
+        self.paths = []
+        self.active = True
+
+    def stop(self) -> Optional[str]:
+        """Stop recording and return the last artifact written that still exists"""
+        self.active = False
+        for path in reversed(self.paths):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _hook(self, event: str, args: tuple):
+        if not self.active or event != 'open':
+            return
+        path, mode, flags = args
+        if not isinstance(path, (str, bytes, os.PathLike)):
+            return
+        path = os.fsdecode(path)
+        if not path.endswith(self.suffix):
+            return
+        writing = any(c in mode for c in 'wax+') if isinstance(mode, str) else bool(flags & self.WRITE_FLAGS)
+        if writing:
+            self.paths.append(os.path.abspath(path))
+
+
+def artifact_stem(path: str) -> str:
+    """Name shared by a map and its sidecars: temp_map_x.html, temp_map_x.layers.json, temp_map_x.data_*.geojson.gz"""
+    return os.path.basename(path).split('.', 1)[0]
+
+
+def artifact_files(path: str) -> List[str]:
+    """A map file and the sidecar files written with it"""
+    directory = os.path.dirname(path) or '.'
+    prefix = artifact_stem(path) + '.'
+    try:
+        return sorted(entry.path for entry in os.scandir(directory)
+                      if entry.is_file() and entry.name.startswith(prefix))
+    except FileNotFoundError:
+        return []
+
+
+class ArtifactRetention:
+    """Keeps the map output directory bounded by map count and total size.
+
+    A map and its sidecar files (layer data, layer updates, profiles) share
+    a stem and are counted and removed together.
+    """
+
+    def __init__(self, map_dir: str, max_files: int = 50, max_bytes: int = 200 * 1024 * 1024,
+                 pattern_prefix: str = 'temp_map_'):
+        self.logger = logging.getLogger(__name__)
+        self.map_dir = map_dir
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.pattern_prefix = pattern_prefix
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, map_dir: str, config: Optional[dict]) -> 'ArtifactRetention':
+        config = config or {}
+        return cls(
+            map_dir,
+            max_files=config.get('max_files', 50),
+            max_bytes=int(config.get('max_megabytes', 200) * 1024 * 1024)
+        )
+
+    def prune(self) -> int:
+        """Delete the oldest maps beyond the limits, return how many were removed"""
+        with self._lock:
+            # stem -> [newest mtime, total size, paths]
+            groups = {}
+            try:
+                for entry in os.scandir(self.map_dir):
+                    if entry.is_file() and entry.name.startswith(self.pattern_prefix):
+                        stat = entry.stat()
+                        group = groups.setdefault(artifact_stem(entry.name), [0.0, 0, []])
+                        group[0] = max(group[0], stat.st_mtime)
+                        group[1] += stat.st_size
+                        group[2].append(entry.path)
+            except FileNotFoundError:
+                return 0
+
+            # Newest first, everything past the limits goes
+            entries = sorted(groups.values(), reverse=True)
+            kept_bytes = 0
+            removed = 0
+            for index, (_, size, paths) in enumerate(entries):
+                kept_bytes += size
+                # Always keep the newest map, even when it alone exceeds the size limit
+                if index > 0 and (index >= self.max_files or kept_bytes > self.max_bytes):
+                    try:
+                        for path in paths:
+                            os.remove(path)
+                        removed += 1
+                    except OSError as e:
+                        self.logger.warning(f"Could not remove old map {paths[0]}: {str(e)}")
+
+            if removed:
+                self.logger.debug(f"Pruned {removed} old maps from {self.map_dir}")
+            return removed
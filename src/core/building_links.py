@@ -0,0 +1,154 @@
+# src/core/building_links.py
+import os
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from .dataset_cache import cached_table
+from .dataset_registry import DatasetRegistry
+from .name_index import normalize, trigrams
+from .spatial_index import project_xy
+from ..utils.singleton import Singleton
+
+
+YEARS = ('buildings_1740', 'buildings_1808')
+# Candidates further apart than this are never linked
+MAX_DISTANCE_M = 50.0
+CANDIDATES = 5
+# Distance at which the spatial score has dropped to 1/e
+DISTANCE_SCALE_M = 15.0
+SPATIAL_WEIGHT = 0.6
+MIN_CONFIDENCE = 0.3
+CACHE_FORMAT_VERSION = 1
+
+
+class BuildingLinks(Singleton):
+    """Links between the 1740 and 1808 cadastres, precomputed once per data version.
+
+    Each 1740 building is matched to the 1808 building that best combines
+    proximity (within MAX_DISTANCE_M) and similarity of the owner family
+    names. The persisted table holds one row per link with the distance,
+    the name similarity, a confidence in [0, 1] and whether the match is
+    also the best one seen from the 1808 side.
+    """
+
+    def __init__(self, registry: Optional[DatasetRegistry] = None):
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry or DatasetRegistry.instance()
+        self.cache_dir = self.registry.cache.cache_dir
+        self._table: Optional[Tuple[str, pd.DataFrame]] = None
+        self._lock = threading.RLock()
+
+    def table(self) -> pd.DataFrame:
+        """All links: building_1740, building_1808 (row labels), distance_m, name_similarity, confidence, mutual"""
+        with self._lock:
+            version = '/'.join(str(self.registry.version(name)) for name in YEARS)
+            if self._table is None or self._table[0] != version:
+                self._table = (version, self._load_or_build(version))
+            return self._table[1]
+
+    def links(self, min_confidence: float = 0.5, mutual_only: bool = False) -> pd.DataFrame:
+        table = self.table()
+        mask = table['confidence'] >= min_confidence
+        if mutual_only:
+            mask &= table['mutual']
+        return table[mask]
+
+    def counterparts(self, buildings: pd.DataFrame, source: str = 'buildings_1740',
+                     min_confidence: float = 0.5):
+        """Rows of the other year linked to the given buildings of `source`.
+
+        `buildings` is any subset of the source dataset (its index must be
+        the dataset's). The result is a copy of the linked rows with
+        `linked_from` (the source row label), `link_confidence` and
+        `link_distance_m` added.
+        """
+        if source not in YEARS:
+            raise KeyError(f"Links exist only between {YEARS[0]} and {YEARS[1]}")
+        target = YEARS[1] if source == YEARS[0] else YEARS[0]
+        source_column, target_column = f'building_{source[-4:]}', f'building_{target[-4:]}'
+
+        links = self.links(min_confidence)
+        links = links[links[source_column].isin(buildings.index)]
+        result = self.registry.get(target).loc[links[target_column].to_numpy()].copy()
+        result['linked_from'] = links[source_column].to_numpy()
+        result['link_confidence'] = links['confidence'].to_numpy()
+        result['link_distance_m'] = links['distance_m'].to_numpy()
+        return result
+
+    def inject(self, namespace: dict):
+        namespace['building_links'] = self
+        namespace['counterparts'] = self.counterparts
+
+    def _path(self) -> str:
+        return os.path.join(self.cache_dir, 'building_links.pkl')
+
+    def _load_or_build(self, version: str) -> pd.DataFrame:
+        return cached_table(self._path(), version,
+                            lambda: self._build(self.registry.get(YEARS[0]), self.registry.get(YEARS[1])),
+                            CACHE_FORMAT_VERSION)
+
+    @staticmethod
+    def _build(early: pd.DataFrame, late: pd.DataFrame) -> pd.DataFrame:
+        distances, indices = cKDTree(project_xy(late)).query(
+            project_xy(early), k=CANDIDATES, distance_upper_bound=MAX_DISTANCE_M
+        )
+        valid = np.isfinite(distances)
+        early_positions = np.repeat(np.arange(len(early)), CANDIDATES).reshape(distances.shape)[valid]
+        late_positions = indices[valid]
+        distances = distances[valid]
+
+        early_names = early['owner_family_name'].map(normalize).to_numpy()
+        late_names = late['owner_family_name'].map(normalize).to_numpy()
+        similarity = _name_similarity(early_names[early_positions], late_names[late_positions])
+
+        candidates = pd.DataFrame({
+            'early': early_positions,
+            'late': late_positions,
+            'distance_m': distances,
+            'name_similarity': similarity,
+        })
+        candidates['confidence'] = (SPATIAL_WEIGHT * np.exp(-distances / DISTANCE_SCALE_M)
+                                    + (1 - SPATIAL_WEIGHT) * similarity)
+        candidates = candidates[candidates['confidence'] >= MIN_CONFIDENCE]
+
+        ranked = candidates.sort_values('confidence', ascending=False)
+        best = ranked.drop_duplicates('early')
+        best_from_late = ranked.drop_duplicates('late')
+        mutual = pd.MultiIndex.from_frame(best[['early', 'late']]).isin(
+            pd.MultiIndex.from_frame(best_from_late[['early', 'late']])
+        )
+
+        return pd.DataFrame({
+            'building_1740': early.index.to_numpy()[best['early'].to_numpy()],
+            'building_1808': late.index.to_numpy()[best['late'].to_numpy()],
+            'distance_m': best['distance_m'].to_numpy(),
+            'name_similarity': best['name_similarity'].to_numpy(),
+            'confidence': best['confidence'].to_numpy(),
+            'mutual': mutual,
+        }).sort_values('building_1740').reset_index(drop=True)
+
+
+def _name_similarity(left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    """1 for equal names, trigram Jaccard similarity otherwise, 0 when either is missing"""
+    grams: Dict[str, set] = {}
+
+    def grams_of(name):
+        if name not in grams:
+            grams[name] = trigrams(name)
+        return grams[name]
+
+    result = np.zeros(len(left))
+    for i, (a, b) in enumerate(zip(left, right)):
+        if not a or not b or a == 'nan' or b == 'nan':
+            continue
+        if a == b:
+            result[i] = 1.0
+            continue
+        grams_a, grams_b = grams_of(a), grams_of(b)
+        result[i] = len(grams_a & grams_b) / len(grams_a | grams_b)
+    return result
@@ -0,0 +1,69 @@
+# src/core/canned_llm.py
+import json
+import time
+from typing import Dict, Iterator, Optional
+
+
+# Used for every question without a canned answer: a small but complete map script
+DEFAULT_RESPONSE = '''[Analysis & Planning]
+- Offline stand-in response, plots the 1740 and 1808 buildings
+
+[Code & Implementation]
+```python
+import folium
+
+m = folium.Map(location=[45.4371, 12.3326], zoom_start=14, prefer_canvas=True)
+for gdf, color in [(buildings_1740, '#2C699A'), (buildings_1808, '#54B399')]:
+    for lat, lon in zip(gdf['latitude'].head(500), gdf['longitude'].head(500)):
+        folium.CircleMarker([lat, lon], radius=2, color=color).add_to(m)
+
+print("Buildings 1740:", len(buildings_1740))
+print("Buildings 1808:", len(buildings_1808))
+m.save(output_path)
+```
+
+[Brief Review & Explanation]
+- Canned response used for offline benchmarking
+'''
+
+
+class CannedMessage:
+    def __init__(self, content: str):
+        self.content = content
+
+
+class CannedChatModel:
+    """Local stand-in for the chat client that answers from canned responses.
+
+    Responses are looked up by the text of the last user message; questions
+    without an entry get DEFAULT_RESPONSE. An optional latency simulates the
+    round trip so benchmarks exercise the same timing paths as the real API.
+    """
+
+    def __init__(self, responses: Optional[Dict[str, str]] = None, latency: float = 0.0,
+                 chunk_size: int = 64):
+        self.responses = responses or {}
+        self.latency = latency
+        self.chunk_size = chunk_size
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'CannedChatModel':
+        """Load a {question: response} JSON mapping"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), **kwargs)
+
+    def respond(self, messages: list) -> str:
+        question = messages[-1].content.strip() if messages else ''
+        return self.responses.get(question, DEFAULT_RESPONSE)
+
+    def invoke(self, messages: list) -> CannedMessage:
+        if self.latency:
+            time.sleep(self.latency)
+        return CannedMessage(self.respond(messages))
+
+    def stream(self, messages: list) -> Iterator[CannedMessage]:
+        if self.latency:
+            time.sleep(self.latency)
+        response = self.respond(messages)
+        for start in range(0, len(response), self.chunk_size):
+            yield CannedMessage(response[start:start + self.chunk_size])
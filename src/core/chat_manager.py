@@ -1,38 +1,170 @@
 # src/core/chat_manager.py
 from langchain_anthropic import ChatAnthropic
-from langchain.schema import HumanMessage, AIMessage
-from typing import Optional
+from langchain.schema import HumanMessage, AIMessage, SystemMessage
+from typing import Iterator, Optional
+import logging
+import time
+from .history_manager import HistoryManager, estimate_tokens
+from .response_cache import ResponseCache
+from .tracing import Tracer
 
 class ChatManager:
-    def __init__(self, api_key: str, model: str):
-        self.client = ChatAnthropic(
+    def __init__(self, api_key: str, model: str, cache: Optional[ResponseCache] = None,
+                 client=None, history: Optional[HistoryManager] = None):
+        # Any object with LangChain's invoke/stream interface can stand in for Claude
+        self.client = client or ChatAnthropic(
             anthropic_api_key=api_key,
             max_tokens_to_sample=8192,
             model=model
         )
-        self.history = []
+        self.model = model
+        self.cache = cache
+        self.history = history or HistoryManager()
+        self.tracer = Tracer.instance()
+        self.logger = logging.getLogger(__name__)
     
     def add_message(self, message: str, is_user: bool):
         """Add message to history"""
         try:
             msg = HumanMessage(content=message) if is_user else AIMessage(content=message)
-            self.history.append(msg)
+            self.history.add(msg)
         except Exception as e:
             print(f"Error adding message to history: {e}")
     
-    def get_response(self, system_prompt: str) -> Optional[str]:
+    def build_messages(self, system_prompt: str) -> list:
+        """Messages sent to the model for the current history"""
+        return self.history.build_request(system_prompt)
+    
+    def get_response(self, system_prompt: str, trace_id: Optional[str] = None) -> Optional[str]:
         """Get AI response"""
+        span = self.tracer.begin(trace_id, 'llm', model=self.model, streamed=False)
+        response_text = None
+        cached_response = False
         try:
-            messages = [HumanMessage(content=system_prompt)] + self.history
+            with self.tracer.span(trace_id, 'llm.build_request'):
+                messages = self.build_messages(system_prompt)
+                cache_key = self._cache_key(messages)
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    response_text, cached_response = cached, True
+                    return cached
+                if self.cache.replay_only:
+                    print("Response not in cache and replay-only mode is enabled")
+                    return None
+            
             response = self.client.invoke(messages)
             
             # Check response type and content
             if not response or not hasattr(response, 'content'):
                 print("Invalid response from API")
                 return None
-                
+            
+            if cache_key and response.content:
+                self._store(cache_key, response.content)
+            response_text = response.content
             return response.content
             
         except Exception as e:
             print(f"Error getting response from API: {e}")
-            return None
\ No newline at end of file
+            return None
+        finally:
+            self._end_span(span, response_text, cached_response)
+    
+    def stream_response(self, system_prompt: str, trace_id: Optional[str] = None) -> Iterator[str]:
+        """Yield the AI response text chunk by chunk as it is generated"""
+        span = self.tracer.begin(trace_id, 'llm', model=self.model, streamed=True)
+        chunks = []
+        cached_response = False
+        try:
+            with self.tracer.span(trace_id, 'llm.build_request'):
+                messages = self.build_messages(system_prompt)
+                cache_key = self._cache_key(messages)
+            if cache_key:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    cached_response = True
+                    chunks.append(cached)
+                    yield cached
+                    return
+                if self.cache.replay_only:
+                    raise LookupError("Response not in cache and replay-only mode is enabled")
+            
+            for chunk in self.client.stream(messages):
+                content = chunk.content
+                if isinstance(content, list):
+                    # Anthropic may deliver content blocks instead of plain text
+                    content = ''.join(
+                        block.get('text', '') for block in content if isinstance(block, dict)
+                    )
+                if content:
+                    if span is not None and not chunks:
+                        span.attributes['first_token_s'] = round(time.perf_counter() - span.start, 3)
+                    chunks.append(content)
+                    yield content
+            
+            if cache_key and chunks:
+                self._store(cache_key, ''.join(chunks))
+        finally:
+            self._end_span(span, ''.join(chunks) or None, cached_response)
+    
+    def get_candidate(self, messages: list, temperature: float, index: int = 0) -> Optional[str]:
+        """One sampled response for prebuilt messages, safe to call from several threads at once.
+
+        The candidate index is part of the cache key, so candidates sampled
+        with the same settings are not all replayed as the same response.
+        """
+        cache_key = (ResponseCache.make_key(f"{self.model}@{temperature}#{index}", messages)
+                     if self.cache else None)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+            if self.cache.replay_only:
+                raise LookupError("Response not in cache and replay-only mode is enabled")
+        
+        response = self.client.bind(temperature=temperature).invoke(messages)
+        content = self._response_text(response)
+        if cache_key and content:
+            self._store(cache_key, content)
+        return content or None
+    
+    def get_side_response(self, system_prompt: str, message: str) -> Optional[str]:
+        """Response to a one-off exchange that neither reads nor extends the history"""
+        messages = [SystemMessage(content=system_prompt), HumanMessage(content=message)]
+        cache_key = self._cache_key(messages)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+            if self.cache.replay_only:
+                raise LookupError("Response not in cache and replay-only mode is enabled")
+        
+        response = self.client.invoke(messages)
+        content = self._response_text(response)
+        if cache_key and content:
+            self._store(cache_key, content)
+        return content or None
+    
+    def _store(self, cache_key: str, response: str):
+        """Cache a response; the response has already arrived, so a failed write only costs the entry"""
+        try:
+            self.cache.put(cache_key, response)
+        except Exception as e:
+            self.logger.warning(f"Could not cache the response: {str(e)}")
+    
+    def _end_span(self, span, response: Optional[str], cached: bool):
+        self.tracer.end(span, cached=cached, prompt_tokens=self.history.last_prompt_tokens,
+                        response_tokens=estimate_tokens(response) if response else 0,
+                        success=response is not None)
+    
+    @staticmethod
+    def _response_text(response) -> Optional[str]:
+        content = getattr(response, 'content', None)
+        if isinstance(content, list):
+            # Anthropic may deliver content blocks instead of plain text
+            content = ''.join(block.get('text', '') for block in content if isinstance(block, dict))
+        return content
+    
+    def _cache_key(self, messages: list) -> Optional[str]:
+        return ResponseCache.make_key(self.model, messages) if self.cache else None
@@ -1,130 +1,124 @@
 # src/core/code_executor.py
-import os
-import glob
-from datetime import datetime, timedelta
 import logging
-from IPython.core.interactiveshell import InteractiveShell
-from typing import Tuple
-import io
-import traceback
-from contextlib import redirect_stdout, redirect_stderr
-from PyQt6.QtCore import QObject, pyqtSignal, QThread
-import sys
+from typing import Optional
+from concurrent.futures import Future
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from .dataset_registry import DatasetRegistry
+from .artifacts import ArtifactRetention
+from .execution_pool import CANCELLED_TEXT, ExecutionLimits, ExecutionPool, ExecutionResult
+from .result_cache import ExecutionResultCache
+from .tracing import Tracer
+from ..utils.preflight import CodePreflight
 
 
-class CodeExecutionWorker(QObject):
-    finished = pyqtSignal(tuple)
-    
-    def __init__(self, code: str):
+class CodeExecutor(QObject):
+    # (job id, (output, html_path, success))
+    execution_finished = pyqtSignal(int, tuple)
+    # (job id, ExecutionResult), emitted just before execution_finished
+    execution_result = pyqtSignal(int, object)
+    _result_ready = pyqtSignal(int, object)
+
+    def __init__(self, pool_size: int = 2, result_cache: Optional[ExecutionResultCache] = None,
+                 retention: Optional[ArtifactRetention] = None, limits: Optional[ExecutionLimits] = None):
         super().__init__()
         self.logger = logging.getLogger(__name__)
-        self.code = code
-        
-        # Make sure the output directory exists
-        self.map_dir = './map_output'
-        os.makedirs(self.map_dir, exist_ok=True)
-        
-        # Create a shell instance using the main program's module cache
-        self.shell = InteractiveShell.instance()
-        if self.shell is None:
-            self.shell = InteractiveShell()
-        
-        # Make sure the shell uses the main program's sys.modules
-        self.shell.user_ns.update({
-            name: module for name, module in sys.modules.items()
-            if not name.startswith('_')
-        })
-    
-    def execute(self):
-        output = io.StringIO()
-        html_path = None
-        success = False
-        
-        try:
-            # Record execution start time
-            start_time = datetime.now()
-            
-            # Execute code
-            with redirect_stdout(output), redirect_stderr(output):
-                result = self.shell.run_cell(self.code)
-                
-                if result.success:
-                    self.logger.debug("Code execution successful")
-                    # Find the latest generated map file
-                    html_path = self.find_latest_map(start_time)
-                    success = bool(html_path)
-                    
-                    if success:
-                        self.logger.debug(f"Found map file: {html_path}")
-                    else:
-                        self.logger.warning("No map file found")
-                else:
-                    self.logger.error("Code execution failed")
-                    
-        except Exception as e:
-            self.logger.error(f"Error during code execution: {str(e)}")
-            output.write(f"Error: {str(e)}\n")
-            output.write(traceback.format_exc())
-            success = False
-        
-        self.finished.emit((output.getvalue(), html_path, success))
-    
-    def find_latest_map(self, start_time: datetime) -> str:
-        """Find the latest generated map file"""
-        pattern = os.path.join(self.map_dir, 'temp_map_*.html')
+        self.pool = ExecutionPool(pool_size, retention, limits)
+        self.result_cache = result_cache
+        self.tracer = Tracer.instance()
+
+        # Futures complete on dispatcher threads, hop back to the GUI thread via a queued signal
+        self._result_ready.connect(self.handle_execution_result)
+
+    def execute(self, code: str, force: bool = False, trace_id: Optional[str] = None,
+                profile: bool = False, fresh: bool = False) -> int:
+        """Submit code to the worker pool and return its job id.
+
+        The code goes through the pre-flight checks first: fixable problems
+        are rewritten, and code with errors is rejected without a worker run.
+        Unless force is set, code that already ran successfully against the
+        same dataset versions returns the stored output and map instead.
+        With a trace id the stages are recorded as spans of that trace;
+        profile runs the cell under cProfile (never served from the cache);
+        fresh runs it without the variables earlier runs left on the worker.
+        """
+        job_id = self.pool.next_job_id()
+        with self.tracer.span(trace_id, 'preflight') as span:
+            preflight = CodePreflight.check(code)
+            if span:
+                span.attributes.update(code_chars=len(code),
+                                       diagnostics=[d.code for d in preflight.diagnostics])
+        notes = f"Pre-flight checks:\n{preflight.report()}\n\n" if preflight.diagnostics else ''
+        if not preflight.ok:
+            self.logger.debug(f"Execution job {job_id} rejected by pre-flight checks")
+            rejected = ExecutionResult(notes + "The code was not run.\n", None, False)
+            QTimer.singleShot(0, lambda: self._result_ready.emit(job_id, rejected))
+            return job_id
+        code = preflight.code
+
+        cache_key = None
+        if self.result_cache:
+            cache_key = ExecutionResultCache.make_key(code, DatasetRegistry.instance().versions())
+            cached = None if force or profile else self.result_cache.get(cache_key)
+            if cached:
+                self.logger.debug("Execution job %s served from result cache", job_id)
+                self.tracer.record(trace_id, 'execution', 0.0, cached=True)
+                cached.output = "(Reused the result of an identical earlier run)\n" + cached.output
+                # Deliver after returning so the caller knows the job id first
+                QTimer.singleShot(0, lambda: self._result_ready.emit(job_id, cached))
+                return job_id
+
+        span = self.tracer.begin(trace_id, 'execution', job_id=job_id, profile=profile)
+        future = self.pool.submit(code, job_id, profile, fresh)
+        self.logger.debug("Submitted execution job %s", job_id)
+        future.add_done_callback(lambda f: self._on_future_done(f, cache_key, notes, span))
+        return job_id
+
+    def cancel(self, job_id: int):
+        """Stop a queued or running job; its result still arrives through execution_finished"""
+        state = self.pool.cancel(job_id)
+        self.logger.debug(f"Cancel of execution job {job_id}: {state or 'already finished'}")
+        if state == 'queued':
+            cancelled = ExecutionResult(f"{CANCELLED_TEXT} before it started\n", None, False,
+                                        {'kind': 'cancelled', 'limit': None, 'elapsed_seconds': 0.0,
+                                         'peak_memory_mb': None})
+            QTimer.singleShot(0, lambda: self._result_ready.emit(job_id, cancelled))
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+    def _on_future_done(self, future: Future, cache_key: Optional[str], notes: str = '', span=None):
+        if future.cancelled():
+            self.tracer.end(span, success=False, stopped='cancelled')
+            return
         try:
-            # Get all matching files
-            files = glob.glob(pattern)
-            if not files:
-                return None
-            
-            # Sort by modification time
-            latest_file = max(files, key=os.path.getmtime)
-            
-            # Check if the file was created during code execution
-            file_mtime = datetime.fromtimestamp(os.path.getmtime(latest_file))
-            if file_mtime >= start_time:
-                return latest_file
-                
+            result = future.result()
         except Exception as e:
-            self.logger.error(f"Error finding map file: {str(e)}")
-        
-        return None
+            self.logger.error(f"Execution job {future.job_id} failed: {str(e)}")
+            result = ExecutionResult(f"Error: {str(e)}\n", None, False)
+        self._trace_result(span, result)
 
+        if cache_key and result.success and not (result.stats or {}).get('profile_path'):
+            try:
+                self.result_cache.put(cache_key, result)
+            except OSError as e:
+                self.logger.warning(f"Could not store execution result: {str(e)}")
+        result.output = notes + result.output
+        self._result_ready.emit(future.job_id, result)
 
-class CodeExecutor(QObject):
-    execution_finished = pyqtSignal(tuple)
-    
-    def __init__(self):
-        super().__init__()
-        self.logger = logging.getLogger(__name__)
-        self.thread = None
-        self.worker = None
-    
-    def execute(self, code: str) -> None:
-        self.logger.debug("Starting code execution")
-        
-        # If there is a thread running, stop it first
-        if self.thread and self.thread.isRunning():
-            self.logger.debug("Stopping existing thread")
-            self.thread.quit()
-            self.thread.wait()
-        
-        # Create new threads and workers
-        self.thread = QThread()
-        self.worker = CodeExecutionWorker(code)
-        self.worker.moveToThread(self.thread)
-        
-        # Connecting signals
-        self.thread.started.connect(self.worker.execute)
-        self.worker.finished.connect(self.handle_execution_result)
-        self.worker.finished.connect(self.thread.quit)
-        
-        # Start the thread
-        self.logger.debug("Starting execution thread")
-        self.thread.start()
-    
-    def handle_execution_result(self, result: Tuple[str, str, bool]):
-        self.logger.debug("Execution completed - Success: %s, HTML length: %s",
-                         result[2], len(result[1]) if result[1] else 0)
-        self.execution_finished.emit(result)
\ No newline at end of file
+    def _trace_result(self, span, result: ExecutionResult):
+        """Close the execution span, with the worker-side stages as spans of their own"""
+        if span is None:
+            return
+        stats = result.stats or {}
+        self.tracer.end(span, success=result.success, stopped=(result.limit or {}).get('kind'),
+                        artifact_bytes=stats.get('artifact_bytes'), output_chars=len(result.output),
+                        peak_memory_mb=stats.get('peak_memory_mb'), cpu_s=stats.get('cpu_s'))
+        for stage in ('queue_wait', 'inject', 'run_cell'):
+            if f'{stage}_s' in stats:
+                self.tracer.record(span.trace_id, f'execution.{stage}', stats[f'{stage}_s'])
+
+    def handle_execution_result(self, job_id: int, result: ExecutionResult):
+        self.logger.debug("Execution %s completed - Success: %s, HTML path: %s",
+                         job_id, result.success, result.html_path)
+        self.execution_result.emit(job_id, result)
+        self.execution_finished.emit(job_id, result.as_tuple())
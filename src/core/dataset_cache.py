@@ -0,0 +1,238 @@
+# src/core/dataset_cache.py
+import os
+import json
+import hashlib
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import geopandas as gpd
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow is optional, the registry falls back to the text files
+    pa = None
+    feather = None
+
+from ..utils.files import write_atomic
+
+
+CACHE_DIR = os.path.join('.', 'data', '.cache')
+CACHE_FORMAT_VERSION = 3
+# Rows of the source read to guess dtypes when there is no cache yet
+SCHEMA_SAMPLE_ROWS = 1000
+
+
+class DatasetCache:
+    """Columnar (Arrow/Feather) copies of the text datasets.
+
+    Each source file is converted once into an uncompressed Feather file so
+    later loads are memory-mapped instead of parsed. A JSON sidecar records
+    the source mtime, size and sha256; the cache is rebuilt when they no
+    longer match the source. building_functions is stored as a category with
+    the split functions as a list column, so loads don't parse it again.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def available() -> bool:
+        return feather is not None
+
+    def cache_path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f'{name}.feather')
+
+    def meta_path(self, name: str) -> str:
+        return os.path.join(self.cache_dir, f'{name}.meta.json')
+
+    def load(self, name: str, source_path: str) -> gpd.GeoDataFrame:
+        """Load a dataset through the cache, converting the source if needed"""
+        if not self.available():
+            return read_source(source_path)
+
+        if not self.is_valid(name, source_path):
+            df = read_source(source_path)
+            try:
+                self.write(name, source_path, df)
+            except Exception as e:
+                self.logger.warning(f"Could not write cache for {name}: {str(e)}")
+            return df
+
+        return self.read(name)
+
+    def is_valid(self, name: str, source_path: str) -> bool:
+        meta = self._read_meta(name)
+        if not meta or meta.get('format') != CACHE_FORMAT_VERSION:
+            return False
+        if not os.path.exists(self.cache_path(name)):
+            return False
+
+        stat = os.stat(source_path)
+        if meta['mtime_ns'] == stat.st_mtime_ns and meta['size'] == stat.st_size:
+            return True
+
+        # The file was touched; only rebuild if its content really changed
+        if meta['size'] == stat.st_size and meta['sha256'] == file_sha256(source_path):
+            meta['mtime_ns'] = stat.st_mtime_ns
+            self._write_meta(name, meta)
+            return True
+        return False
+
+    def read(self, name: str) -> gpd.GeoDataFrame:
+        table = feather.read_table(self.cache_path(name), memory_map=True)
+        df = table_to_frame(table)
+        return gpd.GeoDataFrame(
+            df,
+            geometry=gpd.points_from_xy(df['longitude'], df['latitude']),
+            crs='EPSG:4326'
+        )
+
+    def read_columns(self, name: str, source_path: str, columns: List[str]) -> pd.DataFrame:
+        """The existing ones of columns, without geometry and without parsing the rest"""
+        if self.available() and self.is_valid(name, source_path):
+            table = feather.read_table(self.cache_path(name), memory_map=True)
+            return table_to_frame(table.select([column for column in columns if column in table.column_names]))
+        if source_path.endswith('.csv'):
+            header = pd.read_csv(source_path, nrows=0).columns
+            return pd.read_csv(source_path, usecols=[column for column in columns if column in header])
+        frame = read_source(source_path)
+        return pd.DataFrame(frame[[column for column in columns if column in frame.columns]])
+
+    def schema(self, name: str, source_path: str) -> Tuple[Optional[int], Dict[str, str]]:
+        """Row count (None when unknown) and column dtypes of a loaded dataset, without loading it.
+
+        Read from the Feather file when the cache is current, else guessed
+        from the first rows of the source.
+        """
+        if self.available() and self.is_valid(name, source_path):
+            table = feather.read_table(self.cache_path(name), memory_map=True)
+            rows, df = table.num_rows, table_to_frame(table.schema.empty_table())
+        elif source_path.endswith('.csv'):
+            rows, df = None, add_derived_columns(pd.read_csv(source_path, nrows=SCHEMA_SAMPLE_ROWS))
+        else:
+            sample = gpd.read_file(source_path, rows=SCHEMA_SAMPLE_ROWS)
+            rows, df = None, add_derived_columns(pd.DataFrame(sample.drop(columns=['geometry'])))
+        dtypes = df.dtypes.astype(str).to_dict()
+        dtypes['geometry'] = 'geometry'
+        return rows, dtypes
+
+    def write(self, name: str, source_path: str, gdf: gpd.GeoDataFrame):
+        # Geometry is rebuilt from the coordinates; the categorical and list columns are stored as
+        # an Arrow dictionary and list<string>
+        df = pd.DataFrame(gdf.drop(columns=[gdf.geometry.name]))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        # Uncompressed so that reads can be served straight from the memory map
+        write_atomic(self.cache_path(name),
+                     lambda path: feather.write_feather(table, path, compression='uncompressed'))
+
+        stat = os.stat(source_path)
+        self._write_meta(name, {
+            'format': CACHE_FORMAT_VERSION,
+            'source': os.path.basename(source_path),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'sha256': file_sha256(source_path),
+        })
+        self.logger.debug(f"Wrote columnar cache for {name}")
+
+    def _read_meta(self, name: str) -> Optional[dict]:
+        try:
+            with open(self.meta_path(name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, name: str, meta: dict):
+        def dump(path):
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, indent=4)
+        write_atomic(self.meta_path(name), dump)
+
+
+def split_functions(value) -> List[str]:
+    """'casa, bottega' -> ['casa', 'bottega']; missing values have no functions"""
+    if not isinstance(value, str):
+        return []
+    return [function.strip() for function in value.split(',') if function.strip()]
+
+
+def add_derived_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """building_functions as a category and building_functions_list with the parsed functions.
+
+    Only needed when parsing a source file, the cache stores both columns.
+    """
+    if 'building_functions' not in df.columns:
+        return df
+    functions = df['building_functions'].astype('category')
+    parsed = {value: split_functions(value) for value in functions.cat.categories}
+    df['building_functions'] = functions
+    df['building_functions_list'] = [list(parsed[value]) if isinstance(value, str) else []
+                                     for value in functions]
+    return df
+
+
+def table_to_frame(table) -> pd.DataFrame:
+    """Frame of a cached Arrow table, with list columns as Python lists like read_source makes them"""
+    lists = [field.name for field in table.schema if pa.types.is_list(field.type)]
+    df = table.select([column for column in table.column_names if column not in lists]).to_pandas()
+    for column in lists:
+        df[column] = table.column(column).to_pylist()
+    return df[table.column_names]
+
+
+def explode_functions(buildings: pd.DataFrame) -> pd.Series:
+    """One entry per building and function, indexed by the building's row label"""
+    if 'building_functions_list' in buildings.columns:
+        lists = buildings['building_functions_list']
+    else:
+        lists = pd.Series([split_functions(value) for value in buildings['building_functions']],
+                          index=buildings.index)
+    return lists.explode().dropna().astype(str)
+
+
+def read_source(path: str) -> gpd.GeoDataFrame:
+    """Parse a dataset from its CSV/GeoJSON source file"""
+    if path.endswith('.csv'):
+        df = add_derived_columns(pd.read_csv(path))
+        return gpd.GeoDataFrame(
+            df,
+            geometry=gpd.points_from_xy(df['longitude'], df['latitude']),
+            crs='EPSG:4326'
+        )
+    return add_derived_columns(gpd.read_file(path))
+
+
+def cached_table(path: str, version: str, build: Callable[[], pd.DataFrame],
+                 format_version: int = 1) -> pd.DataFrame:
+    """Table pickled at path for a data version, built and stored again when missing, stale or unreadable"""
+    logger = logging.getLogger(__name__)
+    try:
+        stored = pd.read_pickle(path)
+        if stored.attrs.get('version') == version and stored.attrs.get('format') == format_version:
+            return stored
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        # Truncated or corrupt (e.g. an interrupted write), or from an incompatible pandas
+        logger.warning(f"Rebuilding unreadable table {path}: {str(e)}")
+
+    logger.debug(f"Building {os.path.basename(path)}")
+    table = build()
+    table.attrs['version'] = version
+    table.attrs['format'] = format_version
+    try:
+        write_atomic(path, table.to_pickle)
+    except OSError as e:
+        logger.warning(f"Could not store {path}: {str(e)}")
+    return table
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,120 @@
+# src/core/dataset_registry.py
+import os
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import geopandas as gpd
+import pandas as pd
+
+from .dataset_cache import DatasetCache, read_source
+from ..utils.singleton import Singleton
+
+
+DATA_DIR = './data'
+
+# Name used in the execution namespace -> source file inside DATA_DIR
+DATASET_SOURCES = {
+    'buildings_1740': 'buildings_1740.csv',
+    'buildings_1808': 'buildings_1808.csv',
+    'landmarks': 'landmarks_geo.geojson',
+}
+
+
+class DatasetRegistry(Singleton):
+    """Keeps the Venice datasets in memory and hands out copies to generated code"""
+
+    def __init__(self, data_dir: str = DATA_DIR):
+        self.logger = logging.getLogger(__name__)
+        self.data_dir = data_dir
+        self._frames: Dict[str, gpd.GeoDataFrame] = {}
+        self._stats: Dict[str, tuple] = {}
+        self._lock = threading.RLock()
+        self.cache = DatasetCache(os.path.join(data_dir, '.cache'))
+
+    def names(self) -> List[str]:
+        return list(DATASET_SOURCES)
+
+    def path(self, name: str) -> str:
+        if name not in DATASET_SOURCES:
+            raise KeyError(f"Unknown dataset: {name}")
+        return os.path.join(self.data_dir, DATASET_SOURCES[name])
+
+    def load_all(self):
+        for name in self.names():
+            try:
+                self.get(name)
+            except Exception as e:
+                self.logger.error(f"Failed to preload {name}: {str(e)}")
+
+    def get(self, name: str) -> gpd.GeoDataFrame:
+        """Return the shared frame, reloading it if the file changed on disk.
+
+        The returned frame is shared between callers and must not be mutated;
+        use handle() when the caller needs its own copy.
+        """
+        path = self.path(name)
+        with self._lock:
+            stat = self._file_stat(path)
+            if name not in self._frames or self._stats.get(name) != stat:
+                if name in self._frames:
+                    self.logger.debug(f"{path} changed on disk, reloading {name}")
+                self._frames[name] = self._read(name, path)
+                self._stats[name] = stat
+            return self._frames[name]
+
+    def handle(self, name: str) -> gpd.GeoDataFrame:
+        """Return a private copy of a dataset that generated code may modify freely"""
+        return self.get(name).copy()
+
+    def columns(self, name: str, columns: List[str]) -> pd.DataFrame:
+        """Some columns of a dataset, read on their own unless the full frame is already loaded.
+
+        Columns the dataset does not have are left out. The result may share
+        data with the loaded frame and must not be mutated.
+        """
+        path = self.path(name)
+        with self._lock:
+            frame = self._frames.get(name)
+            if frame is not None and self._stats.get(name) == self._file_stat(path):
+                return pd.DataFrame(frame[[column for column in columns if column in frame.columns]])
+        return self.cache.read_columns(name, path, columns)
+
+    def schema(self, name: str) -> Tuple[Optional[int], Dict[str, str]]:
+        """Row count (None when unknown) and column dtypes, loading nothing that is not in memory yet"""
+        path = self.path(name)
+        with self._lock:
+            frame = self._frames.get(name)
+            if frame is not None and self._stats.get(name) == self._file_stat(path):
+                return len(frame), frame.dtypes.astype(str).to_dict()
+        return self.cache.schema(name, path)
+
+    def version(self, name: str) -> Optional[str]:
+        """Identifier that changes whenever the source file changes"""
+        try:
+            mtime_ns, size = self._file_stat(self.path(name))
+        except OSError:
+            return None
+        return f"{mtime_ns}-{size}"
+
+    def versions(self) -> Dict[str, Optional[str]]:
+        return {name: self.version(name) for name in self.names()}
+
+    def inject(self, namespace: dict):
+        """Put a fresh copy of each dataset into an execution namespace"""
+        for name in self.names():
+            namespace[name] = self.handle(name)
+        namespace['load_dataset'] = self.handle
+
+    @staticmethod
+    def _file_stat(path: str) -> tuple:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self, name: str, path: str) -> gpd.GeoDataFrame:
+        self.logger.debug(f"Loading dataset {name} from {path}")
+        try:
+            return self.cache.load(name, path)
+        except Exception as e:
+            self.logger.warning(f"Columnar cache unavailable for {name}, reading source: {str(e)}")
+            return read_source(path)
@@ -0,0 +1,614 @@
+# src/core/execution_pool.py
+import os
+import io
+import time
+import pstats
+import cProfile
+import signal
+import logging
+import importlib
+import itertools
+import threading
+import traceback
+import multiprocessing
+from datetime import datetime
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from queue import Queue
+from typing import Optional
+
+from .artifacts import ArtifactRecorder, ArtifactRetention
+from .logging_pipeline import LoggingPipeline
+
+try:
+    import resource
+except ImportError:  # not available on Windows, the CPU limit is then not enforced
+    resource = None
+
+try:
+    import psutil
+except ImportError:  # optional, /proc is read instead where it exists
+    psutil = None
+
+
+MAP_DIR = './map_output'
+
+# Imported in every worker before it reports ready, so runs don't pay for them
+WARM_IMPORTS = [
+    'numpy', 'pandas', 'geopandas', 'shapely.geometry',
+    'folium', 'folium.plugins', 'pydeck', 'h3',
+]
+
+
+# How often the parent checks a running job against its limits
+WATCH_INTERVAL = 0.25
+# Output forwarded per job before the rest is dropped
+MAX_OUTPUT_CHARS = 1_000_000
+# Functions listed in the report of a profiled run
+PROFILE_TOP = 25
+# Start of the line that ends the output of a cancelled run
+CANCELLED_TEXT = 'Execution cancelled'
+
+
+@dataclass
+class ExecutionResult:
+    output: str
+    html_path: Optional[str]
+    success: bool
+    # Set when the run was stopped: kind ('wall_time', 'cpu_time', 'memory' or 'cancelled'), limit and usage
+    limit: Optional[dict] = None
+    # Timings and sizes of the run, see _WorkerProcess.run
+    stats: Optional[dict] = None
+    # The code ran to the end without an error, whether or not it produced a map
+    completed: bool = False
+
+    def as_tuple(self) -> tuple:
+        return self.output, self.html_path, self.success
+
+
+@dataclass
+class ExecutionLimits:
+    """Per-run limits; None disables a limit"""
+    wall_seconds: Optional[float] = 120.0
+    cpu_seconds: Optional[float] = 90.0
+    max_memory_mb: Optional[float] = 2048.0
+    # Time an interrupted run gets to stop on its own before the worker is killed
+    grace_seconds: float = 3.0
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> 'ExecutionLimits':
+        config = config or {}
+        return cls(
+            wall_seconds=config.get('wall_seconds', 120.0),
+            cpu_seconds=config.get('cpu_seconds', 90.0),
+            max_memory_mb=config.get('max_memory_mb', 2048.0),
+            grace_seconds=config.get('grace_seconds', 3.0)
+        )
+
+
+class ExecutionLimitExceeded(Exception):
+    pass
+
+
+def describe_limit(limit: dict) -> str:
+    """One-line explanation of why a run was stopped"""
+    usage = f"after {limit['elapsed_seconds']:.1f} s"
+    if limit.get('peak_memory_mb'):
+        usage += f", peak memory {limit['peak_memory_mb']:.0f} MB"
+    if limit['kind'] == 'cancelled':
+        return f"{CANCELLED_TEXT} {usage}"
+    names = {'wall_time': 'wall-clock limit of {} s', 'cpu_time': 'CPU time limit of {} s',
+             'memory': 'memory limit of {} MB'}
+    return f"Execution stopped: {names[limit['kind']].format(limit['limit'])} exceeded {usage}"
+
+
+def was_cancelled(output: str) -> bool:
+    """Whether a run's output ends in a cancellation, for consumers that only see the result tuple"""
+    return any(line.startswith(CANCELLED_TEXT) for line in output.splitlines()[-3:])
+
+
+def resident_memory_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process, None where it can't be read"""
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss / 2 ** 20
+        except psutil.Error:
+            return None
+    try:
+        with open(f'/proc/{pid}/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _PipeWriter(io.TextIOBase):
+    """stdout/stderr of a run, forwarded to the parent so output survives a killed worker"""
+
+    def __init__(self, conn, job_id: int, state: dict, flush_interval: float = 0.01):
+        self.conn = conn
+        self.job_id = job_id
+        self.state = state
+        self.flush_interval = flush_interval
+        self._parts = []
+        self._pending = 0
+        self._sent = 0
+        self._last_flush = 0.0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        if self._sent + self._pending < MAX_OUTPUT_CHARS:
+            self._parts.append(text)
+            self._pending += len(text)
+            # Complete lines go out right away unless the code prints in a tight loop
+            if self._pending > 65536 or ('\n' in text and time.monotonic() - self._last_flush > self.flush_interval):
+                self.flush()
+        return len(text)
+
+    def flush(self):
+        if not self._parts:
+            return
+        text = ''.join(self._parts)
+        self._parts, self._pending = [], 0
+        self._sent += len(text)
+        if self._sent >= MAX_OUTPUT_CHARS:
+            text += "\n[further output dropped]\n"
+        # A signal arriving mid-send would corrupt the pipe, the handlers defer it until after
+        self.state['sending'] = True
+        try:
+            self.conn.send(('output', self.job_id, text))
+        finally:
+            self.state['sending'] = False
+        self._last_flush = time.monotonic()
+        deferred, self.state['deferred'] = self.state['deferred'], None
+        if deferred is not None:
+            raise deferred
+
+
+def _worker_main(conn, log_config: Optional[dict] = None):
+    """Entry point of a worker process: warm up, then run cells sent over the pipe"""
+    import sys
+    from IPython.core.interactiveshell import InteractiveShell
+    from .dataset_registry import DatasetRegistry
+    from .spatial_index import SpatialIndex
+    from .hex_aggregates import HexAggregates
+    from .feature_store import FeatureStore
+    from .name_index import NameIndex
+    from .building_links import BuildingLinks
+    from .map_render import MapRenderer
+    from .map_assets import AssetBundle
+
+    LoggingPipeline.attach(log_config)
+    logger = logging.getLogger(__name__)
+    for module in WARM_IMPORTS:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            logger.debug(f"Warm import of {module} failed")
+
+    os.makedirs(MAP_DIR, exist_ok=True)
+    registry = DatasetRegistry.instance()
+    registry.load_all()
+    spatial_index = SpatialIndex.instance()
+    hex_aggregates = HexAggregates.instance()
+    try:
+        hex_aggregates.precompute()
+    except Exception as e:
+        logger.warning(f"Could not precompute H3 aggregates: {str(e)}")
+    feature_store = FeatureStore.instance()
+    try:
+        feature_store.precompute()
+    except Exception as e:
+        logger.warning(f"Could not precompute derived features: {str(e)}")
+    name_index = NameIndex.instance()
+    try:
+        name_index.build()
+    except Exception as e:
+        logger.warning(f"Could not build the name index: {str(e)}")
+    building_links = BuildingLinks.instance()
+    try:
+        building_links.table()
+    except Exception as e:
+        logger.warning(f"Could not build the 1740-1808 link table: {str(e)}")
+    map_renderer = MapRenderer()
+    recorder = ArtifactRecorder()
+    recorder.install()
+
+    # The parent interrupts a run with SIGINT; between runs it must not kill the worker
+    state = {'running': False, 'limit': None, 'sending': False, 'deferred': None}
+
+    def stop_run(error: BaseException):
+        if state['sending']:
+            state['deferred'] = error
+        else:
+            raise error
+
+    def interrupt(signum, frame):
+        if state['running']:
+            stop_run(KeyboardInterrupt())
+
+    def cpu_exceeded(signum, frame):
+        if state['running'] and state['limit'] is None:
+            state['limit'] = 'cpu_time'
+            stop_run(ExecutionLimitExceeded("CPU time limit exceeded"))
+
+    signal.signal(signal.SIGINT, interrupt)
+    if resource is not None:
+        signal.signal(signal.SIGXCPU, cpu_exceeded)
+
+    shell = InteractiveShell.instance()
+    shell.user_ns.update({
+        name: module for name, module in sys.modules.items()
+        if not name.startswith('_')
+    })
+    # What a fresh run starts from, without variables left by earlier runs
+    baseline_ns = dict(shell.user_ns)
+    conn.send(('ready', os.getpid()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        if message is None:
+            break
+
+        job_id, code, cpu_seconds, profile, fresh = message
+        if fresh:
+            shell.user_ns.clear()
+            shell.user_ns.update(baseline_ns)
+        output = _PipeWriter(conn, job_id, state)
+        html_path = None
+        success = False
+        completed = False
+        output_path = make_output_path(job_id)
+        profiler = cProfile.Profile() if profile else None
+        stats = {}
+        state['limit'] = None
+        _set_cpu_limit(cpu_seconds)
+        try:
+            with redirect_stdout(output), redirect_stderr(output):
+                inject_start = time.perf_counter()
+                registry.inject(shell.user_ns)
+                spatial_index.inject(shell.user_ns)
+                hex_aggregates.inject(shell.user_ns)
+                feature_store.inject(shell.user_ns)
+                name_index.inject(shell.user_ns)
+                building_links.inject(shell.user_ns)
+                map_renderer.inject(shell.user_ns)
+                shell.user_ns['output_path'] = output_path
+                map_renderer.begin_run(output_path)
+                recorder.start()
+                stats['inject_s'] = time.perf_counter() - inject_start
+                run_start, cpu_start = time.perf_counter(), time.process_time()
+                state['running'] = True
+                try:
+                    if profiler:
+                        profiler.enable()
+                    result = shell.run_cell(code)
+                finally:
+                    if profiler:
+                        profiler.disable()
+                    state['running'] = False
+                    stats['run_cell_s'] = time.perf_counter() - run_start
+                    stats['cpu_s'] = time.process_time() - cpu_start
+                    written = recorder.stop()
+                    _set_cpu_limit(None)
+
+            if result.success:
+                # Prefer the path we handed out, else whatever HTML the code wrote
+                html_path = output_path if os.path.exists(output_path) else written
+                if not html_path:
+                    # No page written, the code may have updated the map on screen instead
+                    html_path = map_renderer.write_updates(layer_update_path(output_path))
+                completed = True
+                success = bool(html_path)
+                if not success:
+                    logger.warning("No map file written")
+                elif html_path.endswith('.html'):
+                    _localize_assets(AssetBundle(), html_path, stats)
+        except (Exception, KeyboardInterrupt) as e:
+            output.write(f"Error: {str(e)}\n")
+            output.write(traceback.format_exc())
+
+        if html_path and os.path.exists(html_path):
+            stats['artifact_bytes'] = os.path.getsize(html_path)
+        if profiler:
+            stats['profile_path'] = _write_profile(profiler, output_path, output)
+
+        state['deferred'] = None
+        output.flush()
+        conn.send(('result', job_id, html_path, success, completed, state['limit'], stats))
+
+
+def _localize_assets(bundle, html_path: str, stats: dict):
+    """Point a written map at the bundled assets here, so the GUI can load it as is"""
+    start = time.perf_counter()
+    try:
+        bundle.localize_file(html_path)
+    except (OSError, UnicodeDecodeError) as e:
+        logging.getLogger(__name__).debug(f"Could not localize assets of {html_path}: {str(e)}")
+    stats['localize_s'] = time.perf_counter() - start
+
+
+def _write_profile(profiler: cProfile.Profile, output_path: str, output) -> Optional[str]:
+    """Append the slowest functions of a profiled run to its output and keep the raw profile"""
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).strip_dirs().sort_stats('cumulative').print_stats(PROFILE_TOP)
+    output.write(f"\nProfile of the run (top {PROFILE_TOP} by cumulative time):\n{report.getvalue()}")
+    path = os.path.splitext(output_path)[0] + '.prof'
+    try:
+        profiler.dump_stats(path)
+    except OSError:
+        return None
+    return path
+
+
+def _set_cpu_limit(seconds: Optional[float]):
+    """Limit the CPU time of the current run (None lifts it), enforced by SIGXCPU"""
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def make_output_path(job_id: int) -> str:
+    """Unique map path for one execution"""
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return os.path.abspath(os.path.join(MAP_DIR, f'temp_map_{timestamp}_{os.getpid()}_{job_id}.html'))
+
+
+def layer_update_path(output_path: str) -> str:
+    """File for in-place layer updates, read by MapPanel instead of loading a page"""
+    return os.path.splitext(output_path)[0] + '.layers.json'
+
+
+class _WorkerProcess:
+    """One pre-warmed interpreter and the parent end of its pipe"""
+
+    def __init__(self, context, log_config: Optional[dict] = None):
+        self.logger = logging.getLogger(__name__)
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, log_config), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.cancel_event = threading.Event()
+
+    def run(self, job_id: int, code: str, limits: ExecutionLimits, profile: bool = False,
+            fresh: bool = False) -> ExecutionResult:
+        """Run one job, stopping it when it breaks a limit or is cancelled.
+
+        An over-limit run is interrupted first, which keeps the worker; if
+        it doesn't stop within the grace period the worker is killed. Output
+        printed so far is kept either way. The result's stats hold the
+        worker's timings (inject_s, run_cell_s, cpu_s), artifact_bytes,
+        elapsed_s, peak_memory_mb and profile_path for profiled runs. A
+        fresh run doesn't see the variables left by earlier runs.
+        """
+        if not self.ready:
+            status, pid = self.conn.recv()
+            self.logger.debug(f"Worker {pid} ready")
+            self.ready = True
+
+        self.conn.send((job_id, code, limits.cpu_seconds, profile, fresh))
+        chunks = []
+        start = time.monotonic()
+        peak_memory = 0.0
+        limit = None
+        interrupted_at = None
+
+        while True:
+            if self.conn.poll(WATCH_INTERVAL):
+                message = self.conn.recv()
+                if message[0] == 'output':
+                    chunks.append(message[2])
+                    continue
+                _, _, html_path, success, completed, worker_limit, stats = message
+                if worker_limit and limit is None:
+                    limit = self._limit_report(worker_limit, limits.cpu_seconds, start, peak_memory)
+                if limit:
+                    chunks.append(f"\n{describe_limit(limit)}\n")
+                    success = completed = False
+                stats.update(elapsed_s=time.monotonic() - start, peak_memory_mb=round(peak_memory, 1) or None)
+                return ExecutionResult(''.join(chunks), html_path, success, limit, stats, completed)
+
+            now = time.monotonic()
+            memory = resident_memory_mb(self.process.pid)
+            peak_memory = max(peak_memory, memory or 0.0)
+            if limit is None:
+                if self.cancel_event.is_set():
+                    limit = self._limit_report('cancelled', None, start, peak_memory)
+                elif limits.wall_seconds and now - start > limits.wall_seconds:
+                    limit = self._limit_report('wall_time', limits.wall_seconds, start, peak_memory)
+                elif limits.max_memory_mb and memory and memory > limits.max_memory_mb:
+                    limit = self._limit_report('memory', limits.max_memory_mb, start, peak_memory)
+                    # No grace period, the machine may already be swapping
+                    interrupted_at = now - limits.grace_seconds
+
+            if limit and interrupted_at is None:
+                self.logger.debug(f"Interrupting job {job_id}: {limit['kind']}")
+                interrupted_at = now
+                if os.name == 'posix':
+                    os.kill(self.process.pid, signal.SIGINT)
+            elif limit and now - interrupted_at >= limits.grace_seconds:
+                self.logger.warning(f"Killing worker {self.process.pid} for job {job_id}: {limit['kind']}")
+                self.kill()
+                chunks.append(f"\n{describe_limit(limit)}\n(the execution worker was restarted)\n")
+                stats = {'elapsed_s': now - start, 'peak_memory_mb': round(peak_memory, 1) or None}
+                return ExecutionResult(''.join(chunks), None, False, limit, stats)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @staticmethod
+    def _limit_report(kind: str, value, start: float, peak_memory: float) -> dict:
+        return {
+            'kind': kind,
+            'limit': value,
+            'elapsed_seconds': round(time.monotonic() - start, 2),
+            'peak_memory_mb': round(peak_memory, 1) if peak_memory else None,
+        }
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(timeout=2)
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.kill()
+
+
+class ExecutionPool:
+    """Pool of worker processes that run generated code outside the GUI process.
+
+    Each worker has the geospatial stack imported and the datasets loaded
+    before its first job, so a run only pays for the generated code itself.
+    A crashing run takes down its own worker, which is then replaced.
+    """
+
+    def __init__(self, size: int = 2, retention: Optional[ArtifactRetention] = None,
+                 limits: Optional[ExecutionLimits] = None):
+        self.logger = logging.getLogger(__name__)
+        self.size = max(1, size)
+        self.retention = retention or ArtifactRetention(MAP_DIR)
+        self.limits = limits or ExecutionLimits()
+        self._futures = {}
+        self._running = {}
+        # Jobs cancelled after their future started but before they got a worker
+        self._cancel_pending = set()
+        self._context = multiprocessing.get_context('spawn')
+        self._idle: Queue = Queue()
+        self._job_ids = itertools.count(1)
+        self._dispatcher = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='execution')
+        self._lock = threading.Lock()
+        self._workers = []
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def next_job_id(self) -> int:
+        return next(self._job_ids)
+
+    def submit(self, code: str, job_id: Optional[int] = None, profile: bool = False,
+               fresh: bool = False) -> Future:
+        """Queue code for execution; the future resolves to an ExecutionResult.
+
+        With profile set the cell runs under cProfile and the report is
+        appended to its output. With fresh set the code runs in a namespace
+        without the variables of earlier runs on the same worker.
+        """
+        if job_id is None:
+            job_id = self.next_job_id()
+        future = self._dispatcher.submit(self._run, job_id, code, time.monotonic(), profile, fresh)
+        future.job_id = job_id
+        with self._lock:
+            self._futures[job_id] = future
+        future.add_done_callback(lambda f: self._forget(job_id))
+        return future
+
+    def cancel(self, job_id: int) -> Optional[str]:
+        """Stop a job: 'queued' if it was dropped before starting, 'running' if it is being stopped"""
+        with self._lock:
+            worker = self._running.get(job_id)
+            future = self._futures.get(job_id)
+        if worker is not None:
+            worker.cancel()
+            return 'running'
+        if future is None:
+            return None
+        # Outside the lock, a cancelled future runs _forget right away
+        if future.cancel():
+            return 'queued'
+        with self._lock:
+            if future.done():
+                return None
+            worker = self._running.get(job_id)
+            if worker is None:
+                # Started but still waiting for a worker, _run drops it
+                self._cancel_pending.add(job_id)
+        if worker is not None:
+            worker.cancel()
+        return 'running'
+
+    def run(self, code: str) -> ExecutionResult:
+        return self.submit(code).result()
+
+    def shutdown(self):
+        self._dispatcher.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.stop()
+
+    def _spawn(self) -> _WorkerProcess:
+        # Workers log through the application's pipeline when one is running
+        pipeline = LoggingPipeline.active()
+        worker = _WorkerProcess(self._context, pipeline.child_config() if pipeline else None)
+        with self._lock:
+            self._workers.append(worker)
+        return worker
+
+    def _retire(self, worker: _WorkerProcess):
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        worker.stop()
+
+    def _forget(self, job_id: int):
+        with self._lock:
+            self._futures.pop(job_id, None)
+            self._cancel_pending.discard(job_id)
+
+    def _run(self, job_id: int, code: str, submitted: float, profile: bool = False,
+             fresh: bool = False) -> ExecutionResult:
+        worker = self._idle.get()
+        queue_wait = time.monotonic() - submitted
+        with self._lock:
+            cancelled = job_id in self._cancel_pending
+            if not cancelled:
+                # Under the lock, so a cancel either lands in _cancel_pending or reaches the worker
+                worker.cancel_event.clear()
+                self._running[job_id] = worker
+        if cancelled:
+            self._idle.put(worker)
+            limit = _WorkerProcess._limit_report('cancelled', None, time.monotonic(), 0.0)
+            return ExecutionResult(f"{CANCELLED_TEXT} before it started\n", None, False, limit,
+                                   {'queue_wait_s': queue_wait})
+        try:
+            self.logger.debug(f"Running job {job_id} on worker {worker.process.pid}")
+            result = worker.run(job_id, code, self.limits, profile, fresh)
+        except (EOFError, OSError) as e:
+            self.logger.error(f"Worker {worker.process.pid} died during job {job_id}: {str(e)}")
+            result = ExecutionResult(
+                f"Error: execution worker crashed (exit code {worker.process.exitcode})\n",
+                None, False
+            )
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+
+        result.stats = dict(result.stats or {}, queue_wait_s=queue_wait)
+        if worker.is_alive():
+            self._idle.put(worker)
+        else:
+            self._retire(worker)
+            self._idle.put(self._spawn())
+        self.retention.prune()
+        return result
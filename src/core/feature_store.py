@@ -0,0 +1,113 @@
+# src/core/feature_store.py
+import os
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from .dataset_cache import cached_table, explode_functions
+from .dataset_registry import DatasetRegistry
+from .spatial_index import SpatialIndex, project_xy
+from ..utils.singleton import Singleton
+
+
+DATASETS = ['buildings_1740', 'buildings_1808']
+LANDMARK_TYPES = ['church', 'square']
+CACHE_FORMAT_VERSION = 2
+
+
+class FeatureStore(Singleton):
+    """Per-building coordinates, nearest church/square and `fn_<function>` flags, cached per data version"""
+
+    def __init__(self, registry: Optional[DatasetRegistry] = None,
+                 spatial_index: Optional[SpatialIndex] = None):
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry or DatasetRegistry.instance()
+        self.spatial_index = spatial_index or SpatialIndex.instance()
+        self.cache_dir = self.registry.cache.cache_dir
+        self._tables: Dict[Tuple[str, str], Tuple[str, pd.DataFrame]] = {}
+        self._lock = threading.RLock()
+
+    def precompute(self):
+        """Build (or load) the feature tables of every dataset"""
+        for dataset in DATASETS:
+            self.features(dataset)
+            self.functions(dataset)
+
+    def features(self, dataset: str) -> pd.DataFrame:
+        """Derived columns, indexed like the dataset"""
+        return self._table(dataset, 'features')
+
+    def functions(self, dataset: str) -> pd.DataFrame:
+        """Long table with one row per building and function: 'building' (dataset index) and 'function'"""
+        return self._table(dataset, 'functions')
+
+    def with_features(self, dataset: str):
+        """Private copy of a dataset with the derived columns joined on"""
+        frame = self.registry.handle(dataset)
+        if dataset not in DATASETS:
+            return frame
+        features = self.features(dataset)
+        return frame.join(features[[column for column in features.columns if column not in frame.columns]])
+
+    def load_dataset(self, name: str, features: bool = False):
+        """Dataset loader for generated code; features=True adds the derived columns"""
+        return self.with_features(name) if features else self.registry.handle(name)
+
+    def inject(self, namespace: dict):
+        namespace['feature_store'] = self
+        namespace['load_dataset'] = self.load_dataset
+        namespace['building_functions'] = self.functions
+
+    def _version(self, dataset: str) -> str:
+        return f"{self.registry.version(dataset)}/{self.registry.version('landmarks')}"
+
+    def _table(self, dataset: str, kind: str) -> pd.DataFrame:
+        if dataset not in DATASETS:
+            raise KeyError(f"No derived features for {dataset}")
+        with self._lock:
+            version = self._version(dataset)
+            cached = self._tables.get((dataset, kind))
+            if cached is None or cached[0] != version:
+                cached = (version, self._load_or_build(dataset, kind, version))
+                self._tables[(dataset, kind)] = cached
+            return cached[1]
+
+    def _path(self, dataset: str, kind: str) -> str:
+        return os.path.join(self.cache_dir, f'{dataset}_{kind}.pkl')
+
+    def _load_or_build(self, dataset: str, kind: str, version: str) -> pd.DataFrame:
+        def build():
+            buildings = self.registry.get(dataset)
+            if kind == 'features':
+                return self._build_features(dataset, buildings)
+            return self._build_functions(buildings)
+        return cached_table(self._path(dataset, kind), version, build, CACHE_FORMAT_VERSION)
+
+    @staticmethod
+    def _build_functions(buildings: pd.DataFrame) -> pd.DataFrame:
+        functions = explode_functions(buildings)
+        return pd.DataFrame({
+            'building': functions.index.to_numpy(),
+            'function': pd.Categorical(functions.to_numpy()),
+        })
+
+    def _build_features(self, dataset: str, buildings: pd.DataFrame) -> pd.DataFrame:
+        table = pd.DataFrame(index=buildings.index)
+        xy = project_xy(buildings)
+        table['x_m'] = xy[:, 0]
+        table['y_m'] = xy[:, 1]
+
+        for landmark_type in LANDMARK_TYPES:
+            nearest = self.spatial_index.nearest(dataset, landmark_type)
+            table[f'nearest_{landmark_type}'] = nearest['nearest_landmark'].to_numpy()
+            table[f'distance_to_{landmark_type}_m'] = nearest['distance_m'].to_numpy()
+
+        functions = self._build_functions(buildings)
+        one_hot = pd.crosstab(functions['building'], functions['function'].astype(str)).astype(bool)
+        one_hot.columns = [f'fn_{name}' for name in one_hot.columns]
+        table = table.join(one_hot)
+        table[one_hot.columns] = table[one_hot.columns].fillna(False).astype(bool)
+        table['n_functions'] = table[one_hot.columns].sum(axis=1).astype(int)
+        return table
@@ -0,0 +1,100 @@
+# src/core/hex_aggregates.py
+import os
+import logging
+import threading
+from typing import Dict, Optional, Tuple
+
+import h3
+import pandas as pd
+
+from .dataset_cache import cached_table, explode_functions
+from .dataset_registry import DatasetRegistry
+from ..utils.singleton import Singleton
+
+
+# Venice fits in a few hundred cells at 9 and a few thousand at 10
+RESOLUTIONS = [8, 9, 10]
+DATASETS = ['buildings_1740', 'buildings_1808']
+CACHE_FORMAT_VERSION = 2
+
+
+class HexAggregates(Singleton):
+    """Per-cell building counts, mean rent/area and `fn_<function>` counts at each H3 resolution"""
+
+    def __init__(self, registry: Optional[DatasetRegistry] = None):
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry or DatasetRegistry.instance()
+        self.cache_dir = self.registry.cache.cache_dir
+        self._tables: Dict[Tuple[str, int], Tuple[str, pd.DataFrame]] = {}
+        self._lock = threading.RLock()
+
+    def precompute(self):
+        """Build (or load) every dataset/resolution table"""
+        for dataset in DATASETS:
+            for resolution in RESOLUTIONS:
+                self.table(dataset, resolution)
+
+    def table(self, dataset: str, resolution: int = 9) -> pd.DataFrame:
+        """Aggregate table for a dataset at an H3 resolution"""
+        if dataset not in DATASETS:
+            raise KeyError(f"No hexagon aggregates for {dataset}")
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Resolution must be one of {RESOLUTIONS}")
+
+        with self._lock:
+            version = self.registry.version(dataset)
+            cached = self._tables.get((dataset, resolution))
+            if cached is None or cached[0] != version:
+                cached = (version, self._load_or_build(dataset, resolution, version))
+                self._tables[(dataset, resolution)] = cached
+            return cached[1]
+
+    def hex_density(self, dataset: str, resolution: int = 9,
+                    function: Optional[str] = None) -> pd.DataFrame:
+        """Cells with a 'value' column: building count, or count of one building function"""
+        table = self.table(dataset, resolution)
+        column = 'count' if function is None else f'fn_{function}'
+        if column not in table.columns:
+            raise KeyError(f"Unknown building function {function!r} for {dataset}")
+
+        result = table[['h3_cell', 'lat', 'lng', 'count']].copy()
+        result['value'] = table[column]
+        for extra in ('mean_rent_price', 'mean_building_area'):
+            if extra in table.columns:
+                result[extra] = table[extra]
+        return result[result['value'] > 0].reset_index(drop=True)
+
+    def inject(self, namespace: dict):
+        namespace['hex_aggregates'] = self
+        namespace['hex_density'] = self.hex_density
+
+    def _path(self, dataset: str, resolution: int) -> str:
+        return os.path.join(self.cache_dir, f'{dataset}_h3_r{resolution}.pkl')
+
+    def _load_or_build(self, dataset: str, resolution: int, version: str) -> pd.DataFrame:
+        return cached_table(self._path(dataset, resolution), version,
+                            lambda: self._build(self.registry.get(dataset), resolution), CACHE_FORMAT_VERSION)
+
+    @staticmethod
+    def _build(buildings: pd.DataFrame, resolution: int) -> pd.DataFrame:
+        cells = pd.Series(
+            [h3.latlng_to_cell(lat, lng, resolution)
+             for lat, lng in zip(buildings['latitude'], buildings['longitude'])],
+            index=buildings.index, name='h3_cell'
+        )
+        grouped = buildings.groupby(cells)
+        table = grouped.size().rename('count').to_frame()
+        for column in ('rent_price', 'building_area'):
+            if column in buildings.columns:
+                table[f'mean_{column}'] = grouped[column].mean()
+
+        functions = explode_functions(buildings)
+        function_counts = pd.crosstab(cells.loc[functions.index].to_numpy(), functions.to_numpy())
+        function_counts.columns = [f'fn_{name}' for name in function_counts.columns]
+        table = table.join(function_counts)
+        table[function_counts.columns] = table[function_counts.columns].fillna(0).astype(int)
+
+        centres = [h3.cell_to_latlng(cell) for cell in table.index]
+        table['lat'] = [lat for lat, _ in centres]
+        table['lng'] = [lng for _, lng in centres]
+        return table.reset_index()
@@ -0,0 +1,144 @@
+# src/core/history_manager.py
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from langchain.schema import HumanMessage, AIMessage, SystemMessage
+
+from ..utils.code_parser import CODE_BLOCK_PATTERN
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting"""
+    return len(text) // 4 + 1
+
+
+def strip_code_blocks(text: str) -> str:
+    """Replace fenced code blocks with a one-line placeholder"""
+    def placeholder(match):
+        lines = match.group(2).count('\n') + 1
+        language = match.group(1) or 'code'
+        return f"[{language} block omitted, {lines} lines]"
+    return CODE_BLOCK_PATTERN.sub(placeholder, text)
+
+
+class HistoryManager:
+    """Conversation history with a bounded prompt footprint.
+
+    The last `keep_last_turns` user/assistant turns are sent verbatim.
+    Older turns are sent with their code blocks stripped, and once those
+    exceed `max_history_tokens` the oldest are folded into a short
+    extractive summary in the system message, so the per-turn prompt size
+    stays roughly constant.
+    """
+
+    def __init__(self, keep_last_turns: int = 3, max_history_tokens: int = 6000,
+                 summary_chars: int = 300):
+        self.logger = logging.getLogger(__name__)
+        self.keep_last_turns = keep_last_turns
+        self.max_history_tokens = max_history_tokens
+        self.summary_chars = summary_chars
+        self.messages: List = []
+        self._stripped: Dict[int, str] = {}
+        self.last_prompt_tokens = 0
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> 'HistoryManager':
+        config = config or {}
+        return cls(
+            keep_last_turns=config.get('keep_last_turns', 3),
+            max_history_tokens=config.get('max_history_tokens', 6000),
+            summary_chars=config.get('summary_chars', 300)
+        )
+
+    def add(self, message):
+        self.messages.append(message)
+
+    def total_tokens(self) -> int:
+        """Tokens the full, uncompacted history would cost"""
+        return sum(estimate_tokens(message.content) for message in self.messages)
+
+    def build_request(self, system_prompt: str) -> list:
+        """System prompt (marked for provider-side caching) followed by the compacted history.
+
+        The summary of the oldest turns, if any, goes into the system message
+        after the cached prompt, so the history keeps alternating roles.
+        """
+        summary, history = self.compacted()
+        blocks = [{
+            'type': 'text',
+            'text': system_prompt,
+            'cache_control': {'type': 'ephemeral'},
+        }]
+        if summary:
+            blocks.append({'type': 'text', 'text': summary})
+        self.last_prompt_tokens = estimate_tokens(system_prompt) + estimate_tokens(summary or '') + sum(
+            estimate_tokens(message.content) for message in history
+        )
+        self.logger.debug(f"Prompt size ~{self.last_prompt_tokens} tokens "
+                          f"({len(history)} of {len(self.messages)} messages, "
+                          f"full history ~{self.total_tokens()} tokens)")
+        return [SystemMessage(content=blocks)] + history
+
+    def compacted(self) -> Tuple[Optional[str], list]:
+        """Summary of the turns that did not fit (None if all did) and the messages to send"""
+        keep = self.keep_last_turns * 2
+        split = max(0, len(self.messages) - keep)
+        # Never start the verbatim tail with an assistant message
+        if split < len(self.messages) and isinstance(self.messages[split], AIMessage):
+            split = max(0, split - 1)
+        older, recent = self.messages[:split], self.messages[split:]
+
+        costs = [estimate_tokens(self._stripped_text(message)) for message in older]
+        budget = self.max_history_tokens
+        if sum(costs) > budget:
+            # Some turns will be summarized, keep the summary's share out of the budget
+            budget -= self.summary_tokens()
+        # Walk backwards so the newest of the older turns survive first
+        start = len(older)
+        while start > 0 and costs[start - 1] <= budget:
+            budget -= costs[start - 1]
+            start -= 1
+        # The history must open with a user turn
+        while start < len(older) and isinstance(older[start], AIMessage):
+            start += 1
+
+        compacted = [type(message)(content=self._stripped_text(message)) for message in older[start:]]
+        summary = self._summary(older[:start]) if start else None
+        return summary, compacted + recent
+
+    def summary_tokens(self) -> int:
+        """Share of max_history_tokens reserved for the summary once turns are dropped"""
+        return self.max_history_tokens // 4
+
+    def clear(self):
+        self.messages = []
+        self._stripped = {}
+
+    def _stripped_text(self, message) -> str:
+        key = id(message)
+        if key not in self._stripped:
+            self._stripped[key] = strip_code_blocks(message.content)
+        return self._stripped[key]
+
+    def _summary(self, messages: list) -> str:
+        """Extractive summary of the oldest messages, capped to summary_tokens()"""
+        header = "Summary of the earlier conversation (details omitted to save space):"
+        dropped_note = "- ({} older messages not shown)"
+        budget = (self.summary_tokens() - estimate_tokens(header)
+                  - estimate_tokens(dropped_note.format(len(messages))))
+        lines = []
+        for message in reversed(messages):
+            text = ' '.join(self._stripped_text(message).split())
+            if len(text) > self.summary_chars:
+                text = text[:self.summary_chars] + '...'
+            role = 'User' if isinstance(message, HumanMessage) else 'Assistant'
+            line = f"- {role}: {text}"
+            budget -= estimate_tokens(line)
+            if budget < 0:
+                break
+            lines.insert(0, line)
+
+        dropped = len(messages) - len(lines)
+        if dropped:
+            lines.insert(0, dropped_note.format(dropped))
+        return '\n'.join([header] + lines)
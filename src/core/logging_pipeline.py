@@ -0,0 +1,156 @@
+# src/core/logging_pipeline.py
+import sys
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class LoggingPipeline:
+    """Logging that never does I/O on the calling thread.
+
+    Every logger feeds a QueueHandler; a QueueListener thread formats the
+    records and writes them to a size-rotated file and to stderr. Levels
+    can be set per subsystem (logger name prefix), so noisy modules can be
+    quieted without losing the rest. Worker processes send their records
+    over a multiprocessing queue to the same handlers (see child_config).
+    """
+
+    _active = None
+
+    def __init__(self, path: str = 'app_debug.log', level: str = 'INFO', console_level: str = 'WARNING',
+                 max_bytes: int = 10 * 1024 * 1024, backup_count: int = 3,
+                 levels: Optional[Dict[str, str]] = None):
+        self.path = path
+        self.level = level
+        self.console_level = console_level
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.levels = levels or {}
+        self.listener = None
+        self.child_listener = None
+        self._child_queue = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> 'LoggingPipeline':
+        config = config or {}
+        return cls(
+            path=config.get('file', 'app_debug.log'),
+            level=config.get('level', 'INFO'),
+            console_level=config.get('console_level', 'WARNING'),
+            max_bytes=int(config.get('max_megabytes', 10) * 1024 * 1024),
+            backup_count=config.get('backup_count', 3),
+            levels=config.get('levels')
+        )
+
+    @classmethod
+    def active(cls) -> Optional['LoggingPipeline']:
+        """The started pipeline of this process, if any"""
+        return cls._active
+
+    def start(self):
+        """Route all logging through the queue, replacing any handlers already installed"""
+        if self.listener is not None:
+            return
+        formatter = logging.Formatter(LOG_FORMAT)
+        handlers = []
+        try:
+            file_handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes,
+                                               backupCount=self.backup_count, encoding='utf-8', delay=True)
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except OSError as e:
+            print(f"Could not open log file {self.path}: {e}", file=sys.stderr)
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        console_handler.setLevel(self.console_level)
+        handlers.append(console_handler)
+
+        log_queue = queue.SimpleQueue()
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+        root.addHandler(QueueHandler(log_queue))
+        root.setLevel(self.level)
+        for name, level in self.levels.items():
+            logging.getLogger(name).setLevel(level)
+        logging.captureWarnings(True)
+
+        self.listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+        LoggingPipeline._active = self
+
+    def child_config(self) -> dict:
+        """Picklable settings for a spawned process to log through this pipeline with attach()"""
+        with self._lock:
+            if self._child_queue is None:
+                self._child_queue = multiprocessing.get_context('spawn').Queue()
+                self.child_listener = QueueListener(self._child_queue, *self.listener.handlers,
+                                                    respect_handler_level=True)
+                self.child_listener.start()
+            return {'queue': self._child_queue, 'level': self.level, 'levels': self.levels}
+
+    @staticmethod
+    def attach(config: Optional[dict]):
+        """In a spawned process: send every record to the parent's pipeline"""
+        if not config:
+            return
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(QueueHandler(config['queue']))
+        root.setLevel(config['level'])
+        for name, level in config['levels'].items():
+            logging.getLogger(name).setLevel(level)
+        logging.captureWarnings(True)
+
+    def stop(self):
+        """Flush queued records and close the handlers"""
+        if self.listener is None:
+            return
+        with self._lock:
+            if self.child_listener is not None:
+                self.child_listener.stop()
+                self.child_listener = None
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        self.listener = None
+        if LoggingPipeline._active is self:
+            LoggingPipeline._active = None
+
+
+class RateLimiter:
+    """Token bucket: allows `rate` events per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            self.dropped += 1
+            return False
+
+    def take_dropped(self) -> int:
+        """Events refused since the last call"""
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
@@ -0,0 +1,254 @@
+# src/core/map_assets.py
+"""Local bundle of the JS/CSS libraries used by generated maps, and the server that hosts them.
+
+Folium and pydeck pages reference Leaflet, deck.gl and friends on CDNs.
+The bundle keeps a copy of each library under assets/vendor and rewrites
+those references to root-relative /assets/vendor/... URLs, so maps load
+offline and QtWebEngine caches one shared copy. The server also hosts
+map_output and the result cache's copies of its maps, where layer data
+files written by the rendering helpers are fetched by the page instead
+of being inlined.
+
+Populate the bundle (needs network once):
+    python -m src.core.map_assets --fetch
+"""
+import os
+import re
+import json
+import hashlib
+import logging
+import argparse
+import threading
+import urllib.request
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .result_cache import CACHE_DIR as RESULT_CACHE_DIR
+
+
+ASSET_DIR = './assets/vendor'
+# Relative to the server root; of cache/ only the result cache's map copies are served
+SERVED_ROOTS = ('assets', 'map_output', os.path.normpath(RESULT_CACHE_DIR))
+CDN_URL_PATTERN = re.compile(r"""(?P<quote>["'])(?P<url>https?://[^"'\s]+?\.(?:js|css))(?P=quote)""")
+
+
+class AssetBundle:
+    """Local copies of CDN assets, keyed by their original URL"""
+
+    def __init__(self, asset_dir: str = ASSET_DIR):
+        self.logger = logging.getLogger(__name__)
+        self.asset_dir = asset_dir
+        self.manifest_path = os.path.join(asset_dir, 'manifest.json')
+        self._lock = threading.Lock()
+        self.manifest: Dict[str, str] = self._load_manifest()
+
+    def local_url(self, url: str) -> Optional[str]:
+        filename = self.manifest.get(url)
+        return f"/assets/vendor/{filename}" if filename else None
+
+    def localize(self, html_text: str) -> Tuple[str, List[str]]:
+        """Point bundled CDN references at the local copies.
+
+        Returns the rewritten page and the CDN URLs that are not bundled yet.
+        """
+        missing = []
+
+        def replace(match):
+            url = match.group('url')
+            local = self.local_url(url)
+            if local is None:
+                missing.append(url)
+                return match.group(0)
+            quote = match.group('quote')
+            return f"{quote}{local}{quote}"
+
+        return CDN_URL_PATTERN.sub(replace, html_text), missing
+
+    def localize_file(self, path: str) -> List[str]:
+        """Rewrite a map file in place, returning the URLs still served from CDNs"""
+        with open(path, 'r', encoding='utf-8') as f:
+            original = f.read()
+        rewritten, missing = self.localize(original)
+        if rewritten != original:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(rewritten)
+        return missing
+
+    def fetch(self, urls: Iterable[str], timeout: float = 20.0) -> int:
+        """Download assets into the bundle, return how many were added"""
+        os.makedirs(self.asset_dir, exist_ok=True)
+        added = 0
+        for url in urls:
+            if url in self.manifest:
+                continue
+            name = url.rstrip('/').rsplit('/', 1)[-1].split('?')[0]
+            filename = f"{hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]}_{name}"
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    content = response.read()
+            except OSError as e:
+                self.logger.warning(f"Could not fetch {url}: {str(e)}")
+                continue
+            with open(os.path.join(self.asset_dir, filename), 'wb') as f:
+                f.write(content)
+            with self._lock:
+                self.manifest[url] = filename
+                self._save_manifest()
+            added += 1
+        return added
+
+    def fetch_in_background(self, urls: List[str]):
+        """Bundle assets seen in a map for next time, without blocking the caller"""
+        if urls:
+            threading.Thread(target=self.fetch, args=(urls,), name='asset-fetch', daemon=True).start()
+
+    def fetch_missing_in_background(self, path: str):
+        """Bundle the CDN assets a map file still references, reading it off the caller's thread"""
+        threading.Thread(target=self._fetch_missing, args=(path,), name='asset-fetch', daemon=True).start()
+
+    def _fetch_missing(self, path: str):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                _, missing = self.localize(f.read())
+        except (OSError, UnicodeDecodeError) as e:
+            self.logger.debug(f"Could not scan {path} for CDN assets: {str(e)}")
+            return
+        self.fetch(missing)
+
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_manifest(self):
+        with open(self.manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=4)
+
+
+class _AssetRequestHandler(SimpleHTTPRequestHandler):
+    """Serves only the whitelisted roots, with long-lived caching for vendor files"""
+
+    def translate_path(self, path):
+        # Resolved after unquoting, '..' and symlinks, so nothing outside the roots is reachable
+        return served_path(self.directory, super().translate_path(path)) or ''
+
+    def send_head(self):
+        if not self.translate_path(self.path):
+            self.send_error(404)
+            return None
+        return super().send_head()
+
+    def end_headers(self):
+        if self.path.startswith('/assets/'):
+            self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+        else:
+            self.send_header('Cache-Control', 'no-cache')
+        if self.path.split('?')[0].endswith('.gz'):
+            # Layer data is stored gzipped, let the browser inflate it transparently
+            self.send_header('Content-Encoding', 'gzip')
+        super().end_headers()
+
+    def guess_type(self, path):
+        if str(path).endswith('.geojson.gz'):
+            return 'application/json'
+        return super().guess_type(path)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug("Asset server: " + format % args)
+
+
+class MapAssetServer:
+    """Static HTTP server on localhost for the asset bundle and map output"""
+
+    def __init__(self, root: str = '.', port: int = 0):
+        self.logger = logging.getLogger(__name__)
+        self.root = os.path.abspath(root)
+        self.port = port
+        self.httpd = None
+        self.thread = None
+
+    def start(self) -> bool:
+        try:
+            handler = partial(_AssetRequestHandler, directory=self.root)
+            self.httpd = ThreadingHTTPServer(('127.0.0.1', self.port), handler)
+        except OSError as e:
+            self.logger.warning(f"Could not start map asset server: {str(e)}")
+            return False
+        self.port = self.httpd.server_address[1]
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='asset-server', daemon=True)
+        self.thread.start()
+        self.logger.debug(f"Map asset server listening on port {self.port}")
+        return True
+
+    def base_url(self) -> Optional[str]:
+        return f"http://127.0.0.1:{self.port}/" if self.httpd else None
+
+    def url_for(self, path: str) -> Optional[str]:
+        """HTTP URL for a file under one of the served roots, None otherwise"""
+        if not self.httpd:
+            return None
+        if served_path(self.root, path) is None:
+            return None
+        relative = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+        return f"http://127.0.0.1:{self.port}/{relative}"
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
+
+
+def served_path(root: str, path: str) -> Optional[str]:
+    """Real path of `path` if it lies inside one of the served roots under `root`, else None"""
+    real = os.path.realpath(path)
+    for name in SERVED_ROOTS:
+        allowed = os.path.realpath(os.path.join(root, name))
+        if real == allowed or real.startswith(allowed + os.sep):
+            return real
+    return None
+
+
+def default_asset_urls() -> List[str]:
+    """CDN assets referenced by folium and its common plugins.
+
+    Others (e.g. deck.gl for pydeck maps) are bundled as they are first seen
+    in a loaded map, or explicitly with --from-map.
+    """
+    import folium
+    import folium.plugins
+    urls = []
+    for module in (folium.folium, folium.plugins.marker_cluster, folium.plugins.heat_map,
+                   folium.plugins.fast_marker_cluster):
+        for attribute in ('_default_js', '_default_css'):
+            urls.extend(url for _, url in getattr(module, attribute, []))
+        for element in vars(module).values():
+            if not isinstance(element, type):
+                continue
+            for attribute in ('default_js', 'default_css'):
+                urls.extend(url for _, url in getattr(element, attribute, []) or [])
+    return sorted(set(urls))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local map asset bundle")
+    parser.add_argument('--fetch', action='store_true', help="Download the default folium assets")
+    parser.add_argument('--from-map', nargs='*', default=[],
+                        help="Also bundle every CDN asset referenced by these map files")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    bundle = AssetBundle()
+    urls = default_asset_urls() if args.fetch else []
+    for path in args.from_map:
+        with open(path, 'r', encoding='utf-8') as f:
+            urls.extend(match.group('url') for match in CDN_URL_PATTERN.finditer(f.read()))
+    added = bundle.fetch(sorted(set(urls)))
+    print(f"Bundled {added} new assets, {len(bundle.manifest)} total in {bundle.asset_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,237 @@
+# src/core/map_render.py
+import os
+import glob
+import gzip
+import html
+import json
+import hashlib
+from typing import Dict, List, Optional
+
+import folium
+from folium.map import Layer
+from folium.plugins import FastMarkerCluster
+from jinja2 import Template
+
+from .artifacts import artifact_stem
+from .execution_pool import MAP_DIR
+
+
+VENICE_CENTER = [45.4371, 12.3326]
+
+# Above this many points a layer is clustered client-side instead of drawn marker by marker
+CLUSTER_THRESHOLD = 2000
+
+# Builds each point from a compact [lat, lng, popup] row on the client
+CLUSTER_CALLBACK = """
+function (row) {
+    var marker = L.circleMarker(new L.LatLng(row[0], row[1]), {
+        radius: %(radius)d, color: '%(color)s', fillColor: '%(color)s',
+        fillOpacity: 0.8, weight: 1
+    });
+    if (row[2]) { marker.bindPopup(row[2]); }
+    return marker;
+}
+"""
+
+
+class FetchedPointLayer(Layer):
+    """Point layer whose GeoJSON is fetched from a separate file when the page loads"""
+
+    _template = Template(u"""
+        {% macro script(this, kwargs) %}
+            var {{ this.get_name() }} = L.featureGroup().addTo({{ this._parent.get_name() }});
+            fetch({{ this.url|tojson }})
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    L.geoJson(data, {
+                        pointToLayer: function (feature, latlng) {
+                            return L.circleMarker(latlng, {{ this.style|tojson }});
+                        },
+                        onEachFeature: function (feature, layer) {
+                            if (feature.properties.popup) { layer.bindPopup(feature.properties.popup); }
+                        }
+                    }).addTo({{ this.get_name() }});
+                });
+        {% endmacro %}
+    """)
+
+    def __init__(self, url: str, style: dict, name: Optional[str] = None):
+        super().__init__(name=name, overlay=True)
+        self._name = 'FetchedPointLayer'
+        self.url = url
+        self.style = style
+
+
+class MapRenderer:
+    """Helpers for drawing large point layers that stay responsive in the map panel.
+
+    Maps are created with canvas rendering, so points are drawn on a single
+    canvas rather than as thousands of SVG nodes. Layers larger than
+    `threshold` are sent as one compact data array and clustered in the
+    browser, which keeps the HTML small and pan/zoom usable.
+
+    show_layer/remove_layer/set_legend instead record updates for the map
+    already shown in the map panel, applied in place without a page reload.
+    """
+
+    def __init__(self, threshold: int = CLUSTER_THRESHOLD):
+        self.threshold = threshold
+        # Layer operations for the map already on screen, see show_layer
+        self.pending_updates: List[dict] = []
+        # Map of the current run; layer data files are named after it, see begin_run
+        self.output_path: Optional[str] = None
+
+    def make_map(self, location: Optional[List[float]] = None, zoom_start: int = 14,
+                 **kwargs) -> folium.Map:
+        kwargs.setdefault('prefer_canvas', True)
+        kwargs.setdefault('tiles', 'cartodbpositron')
+        return folium.Map(location=location or VENICE_CENTER, zoom_start=zoom_start, **kwargs)
+
+    def add_points(self, m: folium.Map, gdf, color: str = '#2C699A', radius: int = 3,
+                   popup_columns: Optional[List[str]] = None, name: Optional[str] = None,
+                   cluster: Optional[bool] = None):
+        """Add a point layer, clustering automatically above the threshold.
+
+        popup_columns selects the attributes shown in each popup; pass
+        cluster=True/False to override the automatic choice.
+        """
+        popups = self._popups(gdf, popup_columns)
+        if hasattr(gdf, 'geometry'):
+            latitudes, longitudes = gdf.geometry.y.to_numpy(), gdf.geometry.x.to_numpy()
+        else:
+            latitudes, longitudes = gdf['latitude'].to_numpy(), gdf['longitude'].to_numpy()
+
+        if cluster is None:
+            cluster = len(gdf) > self.threshold
+
+        if cluster:
+            data = [[float(lat), float(lng), popup] for lat, lng, popup in zip(latitudes, longitudes, popups)]
+            layer = FastMarkerCluster(
+                data,
+                name=name,
+                callback=CLUSTER_CALLBACK % {'radius': radius, 'color': color},
+                options={'disableClusteringAtZoom': 18, 'chunkedLoading': True}
+            )
+        else:
+            layer = folium.FeatureGroup(name=name)
+            for lat, lng, popup in zip(latitudes, longitudes, popups):
+                folium.CircleMarker(
+                    [float(lat), float(lng)], radius=radius, color=color, fill=True,
+                    fill_color=color, fill_opacity=0.8, weight=1,
+                    popup=folium.Popup(popup, max_width=300) if popup else None
+                ).add_to(layer)
+
+        layer.add_to(m)
+        return layer
+
+    def add_data_layer(self, m: folium.Map, gdf, color: str = '#2C699A', radius: int = 3,
+                       popup_columns: Optional[List[str]] = None, name: Optional[str] = None):
+        """Add a point layer whose data lives in a separate gzipped GeoJSON file.
+
+        The page fetches the file from the map panel's local server, so the
+        HTML stays small. The file sits next to the map and is referenced
+        relatively, so it is pruned and cached together with the map.
+        """
+        url = self._write_point_data(gdf, popup_columns)
+        layer = FetchedPointLayer(url, self._point_style(color, radius), name=name)
+        layer.add_to(m)
+        return layer
+
+    def show_layer(self, gdf, name: str, color: str = '#2C699A', radius: int = 3,
+                   popup_columns: Optional[List[str]] = None, fit: bool = True):
+        """Add or replace a named point layer on the map already shown in the map panel"""
+        self.pending_updates.append({
+            'op': 'layer',
+            'name': name,
+            'url': self._write_point_data(gdf, popup_columns),
+            'style': self._point_style(color, radius),
+            'fit': fit,
+        })
+
+    def remove_layer(self, name: str):
+        """Remove a named layer from the map shown in the map panel"""
+        self.pending_updates.append({'op': 'remove', 'name': name})
+
+    def clear_layers(self):
+        """Remove every layer and the legend from the map shown in the map panel"""
+        self.pending_updates.append({'op': 'clear'})
+
+    def set_legend(self, title: str, items: Dict[str, str]):
+        """Show a legend mapping labels to colours on the map shown in the map panel"""
+        self.pending_updates.append({'op': 'legend', 'title': title, 'items': list(items.items())})
+
+    def begin_run(self, output_path: Optional[str] = None):
+        """Start a run writing to output_path, forgetting updates recorded by the previous one"""
+        self.pending_updates = []
+        self.output_path = output_path
+
+    def write_updates(self, path: str) -> Optional[str]:
+        """Write the layer updates recorded since begin_run, return the file or None"""
+        if not self.pending_updates:
+            return None
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'ops': self.pending_updates}, f)
+        self.pending_updates = []
+        return path
+
+    def inject(self, namespace: dict):
+        namespace['map_renderer'] = self
+        namespace['make_map'] = self.make_map
+        namespace['add_points'] = self.add_points
+        namespace['add_data_layer'] = self.add_data_layer
+        namespace['show_layer'] = self.show_layer
+        namespace['remove_layer'] = self.remove_layer
+        namespace['clear_layers'] = self.clear_layers
+        namespace['set_legend'] = self.set_legend
+
+    def _write_point_data(self, gdf, popup_columns: Optional[List[str]]) -> str:
+        """Store points as gzipped GeoJSON next to the run's map, return its name relative to the map"""
+        popups = self._popups(gdf, popup_columns)
+        if hasattr(gdf, 'geometry'):
+            latitudes, longitudes = gdf.geometry.y.to_numpy(), gdf.geometry.x.to_numpy()
+        else:
+            latitudes, longitudes = gdf['latitude'].to_numpy(), gdf['longitude'].to_numpy()
+
+        features = [
+            {'type': 'Feature',
+             'geometry': {'type': 'Point', 'coordinates': [round(float(lng), 6), round(float(lat), 6)]},
+             'properties': {'popup': popup} if popup else {}}
+            for lat, lng, popup in zip(latitudes, longitudes, popups)
+        ]
+        content = json.dumps({'type': 'FeatureCollection', 'features': features},
+                             separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha1(content).hexdigest()[:16]
+        directory = os.path.dirname(self.output_path) if self.output_path else MAP_DIR
+        stem = artifact_stem(self.output_path) if self.output_path else 'temp_map_data'
+        # Named after the map so retention and the result cache keep the two together
+        filename = f"{stem}.data_{digest}.geojson.gz"
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            return filename
+
+        os.makedirs(directory, exist_ok=True)
+        existing = glob.glob(os.path.join(glob.escape(directory), f"*.data_{digest}.geojson.gz"))
+        try:
+            # Identical data written for an earlier map shares its disk blocks
+            os.link(existing[0], path)
+            return filename
+        except (IndexError, OSError):
+            pass
+        with open(path, 'wb') as f:
+            f.write(gzip.compress(content))
+        return filename
+
+    @staticmethod
+    def _point_style(color: str, radius: int) -> dict:
+        return {'radius': radius, 'color': color, 'fillColor': color, 'fillOpacity': 0.8, 'weight': 1}
+
+    @staticmethod
+    def _popups(gdf, popup_columns: Optional[List[str]]) -> List[str]:
+        if not popup_columns:
+            return [''] * len(gdf)
+        columns = [gdf[column].astype(str).to_numpy() for column in popup_columns]
+        return [
+            '<br>'.join(f"<b>{html.escape(name)}</b>: {html.escape(value)}"
+                        for name, value in zip(popup_columns, values))
+            for values in zip(*columns)
+        ]
@@ -0,0 +1,222 @@
+# src/core/name_index.py
+import re
+import logging
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .dataset_registry import DatasetRegistry
+from ..utils.singleton import Singleton
+
+
+# Dataset -> name-like columns that questions refer to
+INDEXED_FIELDS = {
+    'buildings_1740': ['owner_first_name', 'owner_family_name', 'tenant_name', 'owner_profession', 'parish'],
+    'buildings_1808': ['owner_first_name', 'owner_family_name', 'district'],
+    'landmarks': ['landmark_name'],
+}
+
+# Question words that are never names, checked before any fuzzy matching
+STOPWORDS = {
+    'what', 'which', 'where', 'when', 'many', 'much', 'there', 'their', 'those', 'these', 'with',
+    'within', 'from', 'have', 'that', 'than', 'then', 'most', 'more', 'less', 'least', 'average',
+    'number', 'building', 'buildings', 'owner', 'owners', 'owned', 'family', 'families', 'tenant',
+    'tenants', 'church', 'churches', 'square', 'squares', 'meters', 'near', 'closest', 'located',
+    'does', 'were', 'same', 'both', 'each', 'between', 'compare', 'rent', 'price', 'area', 'also',
+    'people', 'person', 'parish', 'district', 'function', 'functions', 'used', 'year', 'landmark',
+    'landmarks', 'about', 'into', 'over', 'under', 'show', 'total', 'count', 'distance',
+}
+
+Field = Tuple[str, str]
+
+
+def normalize(text) -> str:
+    """Lowercase, accent-free, punctuation-free key with single spaces"""
+    text = unicodedata.normalize('NFKD', str(text))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(re.sub(r"[^\w\s]", ' ', text.lower()).split())
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, returning limit + 1 as soon as it is known to exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+@dataclass
+class NameMatch:
+    query: str
+    key: str
+    dataset: str
+    column: str
+    distance: int
+    count: int
+
+
+class NameIndex(Singleton):
+    """Exact and fuzzy lookup of owner, tenant, profession, parish, district and landmark names.
+
+    Values are normalized (case, accents, punctuation) into keys that map
+    to the matching row labels of each dataset. Keys are also indexed by
+    trigram, so misspelled names are resolved by edit distance over a
+    handful of candidates instead of scanning the tables.
+    """
+
+    def __init__(self, registry: Optional[DatasetRegistry] = None):
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry or DatasetRegistry.instance()
+        self._postings: Dict[Field, Dict[str, np.ndarray]] = {}
+        self._fields_by_key: Dict[str, List[Field]] = {}
+        self._trigrams: Dict[str, Set[str]] = {}
+        self._versions = None
+        self._lock = threading.RLock()
+
+    @property
+    def ready(self) -> bool:
+        return self._versions is not None
+
+    def build(self):
+        """(Re)build the index from the registry's datasets"""
+        with self._lock:
+            versions = self.registry.versions()
+            postings, fields_by_key, grams = {}, defaultdict(list), defaultdict(set)
+            for dataset, columns in INDEXED_FIELDS.items():
+                # Only the name columns, the full frames are not needed here
+                frame = self.registry.columns(dataset, columns)
+                for column in columns:
+                    if column not in frame.columns:
+                        continue
+                    values = frame[column].dropna()
+                    keys = values.map(normalize)
+                    keys = keys[keys != '']
+                    field_postings = {
+                        key: labels.to_numpy()
+                        for key, labels in keys.index.to_series().groupby(keys.to_numpy())
+                    }
+                    postings[(dataset, column)] = field_postings
+                    for key in field_postings:
+                        fields_by_key[key].append((dataset, column))
+            for key in fields_by_key:
+                for gram in trigrams(key):
+                    grams[gram].add(key)
+
+            self._postings = postings
+            self._fields_by_key = dict(fields_by_key)
+            self._trigrams = dict(grams)
+            self._versions = versions
+            self.logger.debug(f"Name index built with {len(self._fields_by_key)} keys")
+
+    def lookup(self, name: str, dataset: Optional[str] = None, column: Optional[str] = None,
+               max_distance: Optional[int] = None, limit: int = 10) -> List[NameMatch]:
+        """Indexed values matching name, exact matches first, then the closest spellings"""
+        self._ensure_current()
+        query = normalize(name)
+        if not query:
+            return []
+        if max_distance is None:
+            max_distance = max(1, len(query) // 5)
+
+        if query in self._fields_by_key:
+            matches = self._matches(name, query, 0, dataset, column)
+            if matches:
+                return matches[:limit]
+
+        matches = []
+        for key in self._candidates(query):
+            distance = edit_distance(query, key, max_distance)
+            if distance <= max_distance:
+                matches.extend(self._matches(name, key, distance, dataset, column))
+        matches.sort(key=lambda match: (match.distance, -match.count))
+        return matches[:limit]
+
+    def rows(self, name: str, dataset: str, column: Optional[str] = None,
+             fuzzy: bool = True) -> np.ndarray:
+        """Row labels of dataset whose indexed columns match name"""
+        matches = self.lookup(name, dataset, column, max_distance=None if fuzzy else 0)
+        if not matches:
+            return np.array([], dtype=int)
+        best = matches[0].distance
+        labels = [self._postings[(match.dataset, match.column)][match.key]
+                  for match in matches if match.distance == best]
+        return np.unique(np.concatenate(labels))
+
+    def find(self, dataset: str, name: str, column: Optional[str] = None, fuzzy: bool = True):
+        """Private copy of the rows of dataset matching name"""
+        frame = self.registry.handle(dataset)
+        return frame.loc[self.rows(name, dataset, column, fuzzy)]
+
+    def resolve_question(self, question: str, limit: int = 8) -> List[NameMatch]:
+        """Names in a free-text question that match the data, best match per phrase"""
+        if not self.ready:
+            return []
+        words = normalize(question).split()
+        resolved, covered = [], set()
+        # Longer phrases first so 'san marco' wins over 'marco'
+        for size in (3, 2, 1):
+            for start in range(len(words) - size + 1):
+                span = set(range(start, start + size))
+                if span & covered:
+                    continue
+                phrase_words = words[start:start + size]
+                if all(word in STOPWORDS or len(word) < 4 for word in phrase_words):
+                    continue
+                if phrase_words[0] in STOPWORDS or phrase_words[-1] in STOPWORDS:
+                    continue
+                phrase = ' '.join(phrase_words)
+                matches = self.lookup(phrase, max_distance=0 if size == 1 and len(phrase) < 6 else None)
+                if matches:
+                    best = matches[0].distance
+                    resolved.extend(match for match in matches if match.distance == best)
+                    covered |= span
+        return resolved[:limit]
+
+    def inject(self, namespace: dict):
+        namespace['name_index'] = self
+        namespace['lookup_name'] = self.lookup
+        namespace['find_rows'] = self.find
+
+    def _ensure_current(self):
+        if self._versions is None or self._versions != self.registry.versions():
+            self.build()
+
+    def _candidates(self, query: str, max_candidates: int = 50) -> List[str]:
+        counts = Counter()
+        for gram in trigrams(query):
+            counts.update(self._trigrams.get(gram, ()))
+        return [key for key, _ in counts.most_common(max_candidates)]
+
+    def _matches(self, name: str, key: str, distance: int, dataset: Optional[str],
+                 column: Optional[str]) -> List[NameMatch]:
+        return [
+            NameMatch(name, key, field_dataset, field_column, distance,
+                      len(self._postings[(field_dataset, field_column)][key]))
+            for field_dataset, field_column in self._fields_by_key.get(key, [])
+            if (dataset is None or field_dataset == dataset) and (column is None or field_column == column)
+        ]
+
+
+def describe_matches(matches: List[NameMatch]) -> str:
+    """Short note on resolved names, appended to a question before it is sent"""
+    lines = []
+    for match in matches:
+        spelling = '' if match.distance == 0 else f" (closest spelling to '{match.query}')"
+        lines.append(f"- '{match.key}'{spelling}: {match.column} in {match.dataset}, {match.count} rows")
+    return "Names from the question found in the data:\n" + '\n'.join(lines)
@@ -0,0 +1,229 @@
+# src/core/repair.py
+import os
+import re
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .dataset_registry import DatasetRegistry
+from .history_manager import estimate_tokens
+from ..utils.code_parser import CodeParser
+
+ANSI_ESCAPE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+# Longest line of error output sent to the model
+MAX_LINE_CHARS = 300
+
+
+@dataclass
+class RepairConfig:
+    enabled: bool = True
+    max_attempts: int = 2
+    traceback_lines: int = 25
+    stats_path: Optional[str] = './cache/repair_stats.jsonl'
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> 'RepairConfig':
+        config = config or {}
+        return cls(
+            enabled=config.get('enabled', True),
+            max_attempts=max(1, config.get('max_attempts', 2)),
+            traceback_lines=config.get('traceback_lines', 25),
+            stats_path=config.get('stats_path', './cache/repair_stats.jsonl')
+        )
+
+
+def trim_error(output: str, max_lines: int) -> str:
+    """Pre-flight errors and the end of the last traceback, without colors or long lines"""
+    lines = ANSI_ESCAPE.sub('', output).splitlines()
+    diagnostics = [line for line in lines if line.startswith('[error]')]
+    start = max((i for i, line in enumerate(lines) if line.startswith('Traceback') or line.startswith('-----')),
+                default=0)
+    tail = [line for line in lines[start:] if line.strip()][-max_lines:]
+    kept = diagnostics + [line for line in tail if line not in diagnostics]
+    return '\n'.join(line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + ' ...' for line in kept)
+
+
+def dataset_schema(registry: DatasetRegistry, code: str) -> str:
+    """Columns and dtypes of the datasets the code refers to (all of them if it names none).
+
+    Read from the columnar cache, the datasets are not loaded for this.
+    """
+    names = [name for name in registry.names() if name in code] or registry.names()
+    sections = []
+    for name in names:
+        try:
+            rows, dtypes = registry.schema(name)
+        except Exception as e:
+            sections.append(f"{name}: unavailable ({str(e)})")
+            continue
+        columns = ', '.join(f"{column} ({dtype})" for column, dtype in dtypes.items())
+        size = f" ({rows} rows)" if rows is not None else ''
+        sections.append(f"{name}{size}: {columns}")
+    return '\n'.join(sections)
+
+
+class CodeRepairer:
+    """Asks the model to fix failing code in a short side conversation.
+
+    Only the code, the trimmed error and the schema of the datasets the
+    code uses are sent, never the chat history.
+    """
+
+    def __init__(self, chat_manager, prompt: str, config: RepairConfig,
+                 registry: Optional[DatasetRegistry] = None):
+        self.logger = logging.getLogger(__name__)
+        self.chat_manager = chat_manager
+        self.prompt = prompt
+        self.config = config
+        self.registry = registry or DatasetRegistry.instance()
+
+    def build_request(self, code: str, output: str) -> str:
+        return (
+            f"Code:\n```python\n{code}\n```\n\n"
+            f"Error output (end):\n{trim_error(output, self.config.traceback_lines)}\n\n"
+            f"Datasets:\n{dataset_schema(self.registry, code)}"
+        )
+
+    def request_fix(self, code: str, output: str) -> tuple:
+        """Blocking: (fixed code or None, request tokens, response tokens)"""
+        request = self.build_request(code, output)
+        response = self.chat_manager.get_side_response(self.prompt, request)
+        fixed = CodeParser.extract_python_code(response) if response else None
+        return fixed, estimate_tokens(self.prompt) + estimate_tokens(request), estimate_tokens(response or '')
+
+    def record(self, attempts: List[dict], success: bool, seconds: float):
+        if not self.config.stats_path:
+            return
+        entry = {
+            'started_at': time.time() - seconds,
+            'success': success,
+            'attempts': attempts,
+            'time_to_success_s': round(seconds, 3) if success else None,
+        }
+        try:
+            directory = os.path.dirname(self.config.stats_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.config.stats_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except OSError as e:
+            self.logger.warning(f"Could not record repair stats: {str(e)}")
+
+
+class RepairLoop(QObject):
+    """Bounded fix-and-rerun loop for one failed execution.
+
+    Each attempt requests a fix for the latest failure and runs it; the
+    loop stops at the first successful run, after max_attempts, or when
+    the model returns no usable code.
+    """
+
+    # (attempt number, code being run, job id)
+    attempt_started = pyqtSignal(int, str, int)
+    # (working code, (output, html_path, success), attempts)
+    repaired = pyqtSignal(str, tuple, int)
+    # (last code, last output, attempts)
+    gave_up = pyqtSignal(str, str, int)
+    # (fixed code or None, request tokens, response tokens, seconds, error)
+    _fix_ready = pyqtSignal(object, int, int, float, str)
+
+    def __init__(self, repairer: CodeRepairer, executor, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.repairer = repairer
+        self.executor = executor
+        self.attempts: List[dict] = []
+        self.code = None
+        self.output = None
+        self.job_id = None
+        self.stopped = False
+        self.finished = False
+        self._requests = ThreadPoolExecutor(max_workers=1, thread_name_prefix='repair')
+        self._started = None
+        self._submitted = None
+
+        self._fix_ready.connect(self._on_fix)
+        self.executor.execution_result.connect(self._on_execution_finished)
+
+    @staticmethod
+    def needs_repair(result) -> bool:
+        """Whether an ExecutionResult is worth repairing: code that ran to the end isn't, map or not"""
+        return not result.success and not result.completed
+
+    def start(self, code: str, output: str):
+        self._started = time.perf_counter()
+        self.code, self.output = code, output
+        self._request_fix()
+
+    def stop(self):
+        """Cancel the running attempt and make no further ones"""
+        self.stopped = True
+        if self.job_id is not None:
+            self.executor.cancel(self.job_id)
+        else:
+            self._finish(False)
+
+    def _request_fix(self):
+        self._requests.submit(self._fetch, self.code, self.output)
+
+    def _fetch(self, code: str, output: str):
+        start = time.perf_counter()
+        try:
+            fixed, request_tokens, response_tokens = self.repairer.request_fix(code, output)
+            error = ''
+        except Exception as e:
+            fixed, request_tokens, response_tokens, error = None, 0, 0, str(e)
+        self._fix_ready.emit(fixed, request_tokens, response_tokens, time.perf_counter() - start, error)
+
+    def _on_fix(self, fixed, request_tokens: int, response_tokens: int, seconds: float, error: str):
+        if self.stopped:
+            return
+        attempt = {
+            'attempt': len(self.attempts) + 1,
+            'request_tokens': request_tokens,
+            'response_tokens': response_tokens,
+            'llm_seconds': round(seconds, 3),
+        }
+        self.attempts.append(attempt)
+        if not fixed or fixed.strip() == self.code.strip():
+            attempt['outcome'] = 'no fix' if not error else 'request failed'
+            attempt['error'] = error
+            self._finish(False)
+            return
+        self.code = fixed
+        self._submitted = time.perf_counter()
+        self.job_id = self.executor.execute(fixed)
+        self.attempt_started.emit(attempt['attempt'], fixed, self.job_id)
+
+    def _on_execution_finished(self, job_id: int, result):
+        if job_id != self.job_id:
+            return
+        self.job_id = None
+        attempt = self.attempts[-1]
+        attempt['execution_seconds'] = round(time.perf_counter() - self._submitted, 3)
+        if not self.needs_repair(result):
+            attempt['outcome'] = 'fixed'
+            self._finish(True)
+            self.repaired.emit(self.code, result.as_tuple(), len(self.attempts))
+            return
+        attempt['outcome'] = 'cancelled' if self.stopped else 'failed'
+        self.output = result.output
+        if self.stopped or len(self.attempts) >= self.repairer.config.max_attempts:
+            self._finish(False)
+            return
+        self._request_fix()
+
+    def _finish(self, success: bool):
+        if self.finished:
+            return
+        self.finished = True
+        self.executor.execution_result.disconnect(self._on_execution_finished)
+        self._requests.shutdown(wait=False)
+        self.repairer.record(self.attempts, success, time.perf_counter() - self._started)
+        self.logger.debug(f"Repair {'succeeded' if success else 'gave up'} after {len(self.attempts)} attempts")
+        if not success:
+            self.gave_up.emit(self.code, self.output, len(self.attempts))
@@ -0,0 +1,123 @@
+# src/core/response_cache.py
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+from ..utils.files import write_atomic
+
+
+CACHE_DIR = './cache/responses'
+
+
+class ResponseCache:
+    """On-disk cache of model responses keyed by the full request.
+
+    Entries are JSON files named by a hash of the model name and every
+    message sent (system prompt included). Least recently used entries are
+    evicted once the entry count or total size exceeds its limit, and
+    entries older than the TTL are treated as misses. In replay-only mode
+    the caller must not fall through to the API on a miss.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: int = 500,
+                 max_bytes: int = 50 * 1024 * 1024, ttl_seconds: Optional[float] = 7 * 24 * 3600,
+                 replay_only: bool = False):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> Optional['ResponseCache']:
+        """Build a cache from the 'response_cache' config section, None when disabled"""
+        if not config or not config.get('enabled', False):
+            return None
+        ttl_hours = config.get('ttl_hours', 168)
+        return cls(
+            cache_dir=config.get('directory', CACHE_DIR),
+            max_entries=config.get('max_entries', 500),
+            max_bytes=int(config.get('max_megabytes', 50) * 1024 * 1024),
+            ttl_seconds=ttl_hours * 3600 if ttl_hours else None,
+            replay_only=config.get('replay_only', False)
+        )
+
+    @staticmethod
+    def make_key(model: str, messages: list) -> str:
+        payload = json.dumps(
+            [model] + [[message.type, message.content] for message in messages],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+
+            if self.ttl_seconds and time.time() - entry['created'] > self.ttl_seconds:
+                self._remove(path)
+                self.misses += 1
+                return None
+
+            # The file mtime doubles as the LRU timestamp
+            os.utime(path)
+            self.hits += 1
+            return entry['response']
+
+    def put(self, key: str, response: str):
+        path = self._path(key)
+        entry = {'created': time.time(), 'response': response}
+
+        def dump(tmp_path):
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+
+        with self._lock:
+            write_atomic(path, dump)
+            self._evict()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _evict(self):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.json'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+            _, size, path = entries.pop(0)
+            self._remove(path)
+            total_bytes -= size
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError as e:
+            self.logger.warning(f"Could not remove cache entry {path}: {str(e)}")
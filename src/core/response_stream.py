@@ -0,0 +1,96 @@
+# src/core/response_stream.py
+import time
+import logging
+from typing import Optional
+from PyQt6.QtCore import QObject, pyqtSignal, QThread
+from .tracing import Tracer
+from ..utils.code_parser import CodeParser
+
+
+class ResponseStreamWorker(QObject):
+    token_received = pyqtSignal(str)
+    # Emitted once, as soon as the closing fence of the first python block arrives
+    code_ready = pyqtSignal(str)
+    # Full response text, or None if the request failed
+    finished = pyqtSignal(object)
+
+    def __init__(self, chat_manager, system_prompt: str, trace_id: Optional[str] = None):
+        super().__init__()
+        self.logger = logging.getLogger(__name__)
+        self.chat_manager = chat_manager
+        self.system_prompt = system_prompt
+        self.trace_id = trace_id
+
+    def run(self):
+        chunks = []
+        code_sent = False
+        tail = ''
+        start = time.perf_counter()
+        extraction = 0.0
+        try:
+            for chunk in self.chat_manager.stream_response(self.system_prompt, self.trace_id):
+                chunks.append(chunk)
+                self.token_received.emit(chunk)
+
+                # Only re-scan the response when a backtick arrives (fences may span chunks)
+                if not code_sent and '`' in tail + chunk:
+                    scan_start = time.perf_counter()
+                    code = CodeParser.extract_python_code(''.join(chunks))
+                    extraction += time.perf_counter() - scan_start
+                    if code:
+                        code_sent = True
+                        Tracer.instance().record(self.trace_id, 'extraction', extraction,
+                                                 time_to_code_s=round(time.perf_counter() - start, 3),
+                                                 code_chars=len(code))
+                        self.code_ready.emit(code)
+                tail = chunk[-2:]
+        except Exception as e:
+            self.logger.error(f"Error streaming response from API: {str(e)}")
+            self.finished.emit(None)
+            return
+
+        self.finished.emit(''.join(chunks) or None)
+
+
+class ResponseStream(QObject):
+    """Runs a streaming chat request on a background thread"""
+
+    token_received = pyqtSignal(str)
+    code_ready = pyqtSignal(str)
+    finished = pyqtSignal(object)
+
+    def __init__(self, chat_manager, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.chat_manager = chat_manager
+        self.thread = None
+        self.worker = None
+        self.running = False
+
+    def is_running(self) -> bool:
+        return self.running
+
+    def start(self, system_prompt: str, trace_id: Optional[str] = None):
+        if self.running:
+            raise RuntimeError("A response is already being generated")
+        if self.thread is not None:
+            # The previous worker has finished, let its thread wind down
+            self.thread.wait()
+
+        self.running = True
+        self.thread = QThread()
+        self.worker = ResponseStreamWorker(self.chat_manager, system_prompt, trace_id)
+        self.worker.moveToThread(self.thread)
+
+        self.thread.started.connect(self.worker.run)
+        self.worker.token_received.connect(self.token_received)
+        self.worker.code_ready.connect(self.code_ready)
+        self.worker.finished.connect(self._on_finished)
+        self.worker.finished.connect(self.thread.quit)
+
+        self.logger.debug("Starting response stream thread")
+        self.thread.start()
+
+    def _on_finished(self, response):
+        self.running = False
+        self.finished.emit(response)
@@ -0,0 +1,122 @@
+# src/core/result_cache.py
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from typing import Dict, Optional
+
+from .artifacts import artifact_files
+from .execution_pool import ExecutionResult
+
+
+CACHE_DIR = './cache/executions'
+
+
+class ExecutionResultCache:
+    """Stored outputs of successful runs, keyed by code and dataset versions.
+
+    Each entry is a directory holding the captured stdout and a copy of the
+    map artifact with its sidecar files (layer data the page fetches), so it
+    survives cleanup of map_output. Entries older than
+    max_age_seconds are dropped, and the least recently used ones are evicted
+    once the total size exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = 200 * 1024 * 1024,
+                 max_age_seconds: Optional[float] = 24 * 3600):
+        self.logger = logging.getLogger(__name__)
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> Optional['ExecutionResultCache']:
+        """Build a cache from the 'execution.result_cache' config section, None when disabled"""
+        if not config or not config.get('enabled', False):
+            return None
+        max_age_hours = config.get('max_age_hours', 24)
+        return cls(
+            cache_dir=config.get('directory', CACHE_DIR),
+            max_bytes=int(config.get('max_megabytes', 200) * 1024 * 1024),
+            max_age_seconds=max_age_hours * 3600 if max_age_hours else None
+        )
+
+    @staticmethod
+    def make_key(code: str, dataset_versions: Dict[str, Optional[str]]) -> str:
+        payload = json.dumps([code, sorted(dataset_versions.items())])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[ExecutionResult]:
+        entry_dir = os.path.join(self.cache_dir, key)
+        meta_path = os.path.join(entry_dir, 'result.json')
+        with self._lock:
+            try:
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                return None
+
+            html_path = os.path.join(entry_dir, meta['artifact']) if meta['artifact'] else None
+            expired = self.max_age_seconds and time.time() - meta['created'] > self.max_age_seconds
+            if expired or (html_path and not os.path.exists(html_path)):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+                return None
+
+            # The metadata mtime doubles as the LRU timestamp
+            os.utime(meta_path)
+            return ExecutionResult(meta['output'], html_path, meta['success'])
+
+    def put(self, key: str, result: ExecutionResult):
+        if not result.success:
+            return
+
+        entry_dir = os.path.join(self.cache_dir, key)
+        with self._lock:
+            os.makedirs(entry_dir, exist_ok=True)
+            artifact = None
+            if result.html_path:
+                artifact = os.path.basename(result.html_path)
+                # The map references its sidecars relatively, they are copied alongside
+                for path in artifact_files(result.html_path) or [result.html_path]:
+                    shutil.copy2(path, os.path.join(entry_dir, os.path.basename(path)))
+
+            with open(os.path.join(entry_dir, 'result.json'), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'created': time.time(),
+                    'output': result.output,
+                    'success': result.success,
+                    'artifact': artifact,
+                }, f, ensure_ascii=False)
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        now = time.time()
+        for entry in os.scandir(self.cache_dir):
+            if not entry.is_dir():
+                continue
+            meta_path = os.path.join(entry.path, 'result.json')
+            try:
+                mtime = os.path.getmtime(meta_path)
+                with open(meta_path, 'r', encoding='utf-8') as f:
+                    created = json.load(f)['created']
+            except (OSError, ValueError, KeyError):
+                shutil.rmtree(entry.path, ignore_errors=True)
+                continue
+            if self.max_age_seconds and now - created > self.max_age_seconds:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry.path) if f.is_file())
+            entries.append((mtime, size, entry.path))
+
+        entries.sort()
+        total_bytes = sum(size for _, size, _ in entries)
+        while entries and total_bytes > self.max_bytes:
+            _, size, path = entries.pop(0)
+            shutil.rmtree(path, ignore_errors=True)
+            total_bytes -= size
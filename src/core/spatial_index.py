@@ -0,0 +1,114 @@
+# src/core/spatial_index.py
+import logging
+import threading
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+import geopandas as gpd
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from .dataset_registry import DatasetRegistry
+from ..utils.singleton import Singleton
+
+
+# UTM zone 33N, a metric CRS covering Venice
+METRIC_CRS = 'EPSG:32633'
+
+Dataset = Union[str, gpd.GeoDataFrame]
+
+
+class SpatialIndex(Singleton):
+    """KD-tree backed distance queries between buildings and landmarks.
+
+    Coordinates are projected to METRIC_CRS once per dataset version, so
+    radius and nearest-neighbour questions are answered with vectorized
+    tree lookups instead of shapely buffers.
+    """
+
+    def __init__(self, registry: Optional[DatasetRegistry] = None):
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry or DatasetRegistry.instance()
+        self._coords: Dict[str, Tuple[str, np.ndarray]] = {}
+        self._trees: Dict[Optional[str], Tuple[str, cKDTree, gpd.GeoDataFrame]] = {}
+        self._lock = threading.RLock()
+
+    def within_radius(self, dataset: Dataset, landmark_type: Optional[str],
+                      meters: float) -> gpd.GeoDataFrame:
+        """Rows of dataset within `meters` of a landmark of the given type.
+
+        The result carries the nearest landmark's name and the distance to it
+        in 'nearest_landmark' and 'distance_m'.
+        """
+        result = self.nearest(dataset, landmark_type)
+        return result[result['distance_m'] <= meters]
+
+    def nearest(self, dataset: Dataset, landmark_type: Optional[str]) -> gpd.GeoDataFrame:
+        """Copy of dataset with the nearest landmark and its distance in meters"""
+        gdf = self._frame(dataset)
+        tree, landmarks = self._landmark_tree(landmark_type)
+        distances, indices = tree.query(self._xy(dataset), k=1)
+
+        result = gdf.copy()
+        result['nearest_landmark'] = landmarks['landmark_name'].to_numpy()[indices]
+        result['nearest_landmark_type'] = landmarks['landmark_type'].to_numpy()[indices]
+        result['distance_m'] = distances
+        return result
+
+    def count_within(self, dataset: Dataset, landmark_type: Optional[str],
+                     meters: float) -> pd.DataFrame:
+        """Number of rows of dataset within `meters` of each landmark"""
+        _, landmarks = self._landmark_tree(landmark_type)
+        tree = cKDTree(self._xy(dataset))
+        landmark_xy = project_xy(landmarks)
+        counts = tree.query_ball_point(landmark_xy, r=meters, return_length=True)
+
+        result = landmarks[['landmark_name', 'landmark_type']].copy()
+        result['count'] = counts
+        return result.sort_values('count', ascending=False).reset_index(drop=True)
+
+    def inject(self, namespace: dict):
+        """Expose the query functions to an execution namespace"""
+        namespace['spatial_index'] = self
+        namespace['within_radius'] = self.within_radius
+        namespace['nearest'] = self.nearest
+        namespace['count_within'] = self.count_within
+
+    def _frame(self, dataset: Dataset) -> gpd.GeoDataFrame:
+        if isinstance(dataset, str):
+            return self.registry.get(dataset)
+        return dataset
+
+    def _xy(self, dataset: Dataset) -> np.ndarray:
+        if not isinstance(dataset, str):
+            return project_xy(dataset)
+
+        with self._lock:
+            version = self.registry.version(dataset)
+            cached = self._coords.get(dataset)
+            if cached is None or cached[0] != version:
+                cached = (version, project_xy(self.registry.get(dataset)))
+                self._coords[dataset] = cached
+            return cached[1]
+
+    def _landmark_tree(self, landmark_type: Optional[str]) -> Tuple[cKDTree, gpd.GeoDataFrame]:
+        with self._lock:
+            version = self.registry.version('landmarks')
+            cached = self._trees.get(landmark_type)
+            if cached is None or cached[0] != version:
+                landmarks = self.registry.get('landmarks')
+                if landmark_type:
+                    landmarks = landmarks[landmarks['landmark_type'] == landmark_type]
+                if landmarks.empty:
+                    raise ValueError(f"No landmarks of type {landmark_type!r}")
+                landmarks = landmarks.reset_index(drop=True)
+                self.logger.debug(f"Building landmark tree for {landmark_type or 'all landmarks'}")
+                cached = (version, cKDTree(project_xy(landmarks)), landmarks)
+                self._trees[landmark_type] = cached
+            return cached[1], cached[2]
+
+
+def project_xy(gdf: gpd.GeoDataFrame) -> np.ndarray:
+    """(n, 2) array of metric coordinates for a point GeoDataFrame"""
+    projected = gdf.geometry.to_crs(METRIC_CRS)
+    return np.column_stack([projected.x.to_numpy(), projected.y.to_numpy()])
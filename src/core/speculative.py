@@ -0,0 +1,208 @@
+# src/core/speculative.py
+import os
+import json
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .execution_pool import was_cancelled
+from .history_manager import estimate_tokens
+from .tracing import Tracer
+from ..utils.code_parser import CodeParser
+
+
+@dataclass
+class SpeculativeConfig:
+    """How many candidates to ask for and how each one is sampled"""
+    candidates: int = 3
+    # Cycled through when there are more candidates than entries
+    temperatures: List[float] = field(default_factory=lambda: [0.2, 0.7, 1.0])
+    variants: List[str] = field(default_factory=lambda: [''])
+    stats_path: Optional[str] = './cache/speculative_stats.jsonl'
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> 'SpeculativeConfig':
+        config = config or {}
+        return cls(
+            candidates=max(1, config.get('candidates', 3)),
+            temperatures=config.get('temperatures') or [0.2, 0.7, 1.0],
+            variants=config.get('variants') or [''],
+            stats_path=config.get('stats_path', './cache/speculative_stats.jsonl')
+        )
+
+    def plan(self) -> List[Tuple[float, str]]:
+        """(temperature, prompt variant) per candidate"""
+        return [(self.temperatures[i % len(self.temperatures)], self.variants[i % len(self.variants)])
+                for i in range(self.candidates)]
+
+
+@dataclass
+class CandidateStats:
+    index: int
+    temperature: float
+    variant: str
+    prompt_tokens: int = 0
+    llm_seconds: Optional[float] = None
+    response_tokens: int = 0
+    code_lines: int = 0
+    job_id: Optional[int] = None
+    execution_seconds: Optional[float] = None
+    # 'pending', 'running', 'won', 'failed', 'no response', 'no code', 'cancelled', 'lost' or 'discarded'
+    outcome: str = 'pending'
+    error: str = ''
+
+
+class SpeculativeRun(QObject):
+    """Asks for several candidate answers at once and keeps the first that produces a map.
+
+    Each candidate is sampled with its own temperature and prompt variant.
+    Its code is submitted as soon as its response arrives, so candidates
+    race end to end; the first successful run wins and the other runs are
+    cancelled. Per-candidate stats are appended to a JSONL file so the
+    number of candidates can be tuned against API cost.
+    """
+
+    # (response, code, (output, html_path, success)) of the winning candidate
+    succeeded = pyqtSignal(str, str, tuple)
+    # No candidate produced a map: (response, code, result tuple), each possibly None, of the furthest attempt
+    failed = pyqtSignal(object, object, object)
+    # (index, response or None, seconds, error), hops from the request threads to the GUI thread
+    _response_ready = pyqtSignal(int, object, float, str)
+
+    def __init__(self, chat_manager, executor, config: SpeculativeConfig, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.chat_manager = chat_manager
+        self.executor = executor
+        self.config = config
+        self.tracer = Tracer.instance()
+        self.candidates: List[CandidateStats] = []
+        self.responses: Dict[int, str] = {}
+        self.codes: Dict[int, str] = {}
+        self.results: Dict[int, tuple] = {}
+        self.jobs: Dict[int, int] = {}
+        self.winner: Optional[int] = None
+        self.done = False
+        self.trace_id = None
+        self.time_to_success: Optional[float] = None
+        self._submitted: Dict[int, float] = {}
+        self._started = None
+
+        self._response_ready.connect(self._on_response)
+        self.executor.execution_finished.connect(self._on_execution_finished)
+
+    def start(self, system_prompt: str, trace_id: Optional[str] = None):
+        plan = self.config.plan()
+        self.trace_id = trace_id
+        self._started = time.perf_counter()
+        requests = ThreadPoolExecutor(max_workers=len(plan), thread_name_prefix='candidate')
+        for index, (temperature, variant) in enumerate(plan):
+            prompt = f"{system_prompt}\n\n{variant}" if variant else system_prompt
+            # Built here, on one thread, so the request threads never touch the history
+            messages = self.chat_manager.build_messages(prompt)
+            self.candidates.append(CandidateStats(index, temperature, variant,
+                                                  prompt_tokens=self.chat_manager.history.last_prompt_tokens))
+            requests.submit(self._request, index, messages, temperature)
+        requests.shutdown(wait=False)
+        self.logger.debug(f"Requested {len(plan)} candidate responses")
+
+    def _request(self, index: int, messages: list, temperature: float):
+        start = time.perf_counter()
+        try:
+            response, error = self.chat_manager.get_candidate(messages, temperature, index), ''
+        except Exception as e:
+            response, error = None, str(e)
+        self._response_ready.emit(index, response, time.perf_counter() - start, error)
+
+    def _on_response(self, index: int, response, seconds: float, error: str):
+        stats = self.candidates[index]
+        stats.llm_seconds = round(seconds, 3)
+        if self.done:
+            stats.outcome = 'discarded'
+        elif not response:
+            stats.outcome, stats.error = 'no response', error
+        else:
+            stats.response_tokens = estimate_tokens(response)
+            self.responses[index] = response
+            code = CodeParser.extract_python_code(response)
+            if not code:
+                stats.outcome = 'no code'
+            else:
+                self.codes[index] = code
+                stats.code_lines = len(code.splitlines())
+                # Candidates share workers, none may see another's variables
+                stats.job_id = self.executor.execute(code, fresh=True)
+                stats.outcome = 'running'
+                self.jobs[stats.job_id] = index
+                self._submitted[index] = time.perf_counter()
+        self._finish_if_settled()
+
+    def _on_execution_finished(self, job_id: int, result: tuple):
+        index = self.jobs.pop(job_id, None)
+        if index is None:
+            return
+        stats = self.candidates[index]
+        stats.execution_seconds = round(time.perf_counter() - self._submitted[index], 3)
+        self.results[index] = result
+        _, html_path, success = result
+
+        if self.done:
+            if success:
+                stats.outcome = 'lost'
+            elif was_cancelled(result[0]):
+                stats.outcome = 'cancelled'
+            else:
+                # Failed on its own before the winner's cancel reached it
+                stats.outcome = 'failed'
+                stats.error = result[0][-500:]
+        elif success and html_path:
+            stats.outcome = 'won'
+            self.done = True
+            self.winner = index
+            self.time_to_success = round(time.perf_counter() - self._started, 3)
+            for other_job in list(self.jobs):
+                self.executor.cancel(other_job)
+            self.tracer.record(self.trace_id, 'llm', stats.llm_seconds, candidate=index,
+                               response_tokens=stats.response_tokens, prompt_tokens=stats.prompt_tokens)
+            self.tracer.record(self.trace_id, 'execution', stats.execution_seconds, candidate=index)
+            self.logger.debug(f"Candidate {index} won after {self.time_to_success:.2f} s")
+            self.succeeded.emit(self.responses[index], self.codes[index], result)
+        else:
+            stats.outcome = 'failed'
+            stats.error = result[0][-500:]
+        self._finish_if_settled()
+
+    def _finish_if_settled(self):
+        if any(stats.outcome in ('pending', 'running') for stats in self.candidates):
+            return
+        if not self.done:
+            self.done = True
+            # Show the attempt that got furthest: a failed run, else code, else any response
+            index = next(iter(self.results), next(iter(self.codes), next(iter(self.responses), None)))
+            self.failed.emit(self.responses.get(index), self.codes.get(index), self.results.get(index))
+        self.executor.execution_finished.disconnect(self._on_execution_finished)
+        self._write_stats()
+        self.deleteLater()
+
+    def _write_stats(self):
+        if not self.config.stats_path:
+            return
+        record = {
+            'started_at': time.time(),
+            'candidates': [asdict(stats) for stats in self.candidates],
+            'winner': self.winner,
+            'time_to_success_s': self.time_to_success,
+            'response_tokens': sum(stats.response_tokens for stats in self.candidates),
+            'prompt_tokens': sum(stats.prompt_tokens for stats in self.candidates),
+        }
+        try:
+            directory = os.path.dirname(self.config.stats_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.config.stats_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            self.logger.warning(f"Could not record speculative run stats: {str(e)}")
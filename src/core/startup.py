@@ -0,0 +1,76 @@
+# src/core/startup.py
+import time
+import logging
+from typing import Callable, List, Tuple
+from PyQt6.QtCore import QObject, pyqtSignal, QThread
+
+
+Stage = Tuple[str, Callable[[], object]]
+
+
+class StartupWorker(QObject):
+    # (stage name, whatever the stage returned, seconds it took)
+    stage_ready = pyqtSignal(str, object, float)
+    # (stage name, error message)
+    stage_failed = pyqtSignal(str, str)
+    finished = pyqtSignal()
+
+    def __init__(self, stages: List[Stage]):
+        super().__init__()
+        self.logger = logging.getLogger(__name__)
+        self.stages = stages
+
+    def run(self):
+        for name, load in self.stages:
+            start = time.perf_counter()
+            try:
+                result = load()
+            except Exception as e:
+                self.logger.error(f"Startup stage {name} failed: {str(e)}", exc_info=True)
+                self.stage_failed.emit(name, str(e))
+                continue
+            seconds = time.perf_counter() - start
+            self.logger.debug(f"Startup stage {name} took {seconds:.2f} s")
+            self.stage_ready.emit(name, result, seconds)
+        self.finished.emit()
+
+
+class StartupLoader(QObject):
+    """Runs the slow parts of startup on a background thread once the window is shown.
+
+    Stages are (name, callable) pairs run in order; each result is handed
+    back on the GUI thread through stage_ready, so stages should only
+    import modules and build plain objects, never QObjects.
+    """
+
+    stage_ready = pyqtSignal(str, object, float)
+    stage_failed = pyqtSignal(str, str)
+    finished = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+        self.thread = None
+        self.worker = None
+
+    def start(self, stages: List[Stage]):
+        if self.thread is not None:
+            raise RuntimeError("Startup has already been started")
+
+        self.thread = QThread()
+        self.worker = StartupWorker(stages)
+        self.worker.moveToThread(self.thread)
+
+        self.thread.started.connect(self.worker.run)
+        self.worker.stage_ready.connect(self.stage_ready)
+        self.worker.stage_failed.connect(self.stage_failed)
+        self.worker.finished.connect(self.finished)
+        self.worker.finished.connect(self.thread.quit)
+
+        self.logger.debug(f"Starting background startup: {', '.join(name for name, _ in stages)}")
+        self.thread.start()
+
+    def wait(self):
+        """Block until the running stage is done, e.g. before the application quits"""
+        if self.thread is not None:
+            self.thread.wait()
@@ -0,0 +1,239 @@
+# src/core/tracing.py
+import json
+import time
+import uuid
+import logging
+import itertools
+import threading
+import statistics
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from ..utils.files import write_atomic
+from ..utils.singleton import Singleton
+
+# Stages shown in the status bar, in pipeline order, with their short labels
+STATUS_STAGES = [('llm', 'LLM'), ('execution', 'exec'), ('render', 'render'), ('total', 'total')]
+# Traces finished within this many seconds of each other are exported together
+EXPORT_DELAY_S = 2.0
+
+
+class Span:
+    """One timed stage of a trace"""
+
+    __slots__ = ('trace_id', 'name', 'start', 'duration', 'attributes', 'thread')
+
+    def __init__(self, trace_id: str, name: str, start: float, attributes: dict):
+        self.trace_id = trace_id
+        self.name = name
+        self.start = start
+        self.duration = None
+        self.attributes = attributes
+        self.thread = threading.current_thread().name
+
+    def as_dict(self, trace_start: float) -> dict:
+        return {
+            'name': self.name,
+            'offset_s': round(self.start - trace_start, 6),
+            'duration_s': None if self.duration is None else round(self.duration, 6),
+            'thread': self.thread,
+            'attributes': self.attributes,
+        }
+
+
+class Tracer(Singleton):
+    """Timed spans around the question -> response -> execution -> render pipeline.
+
+    A trace is opened per question and collects spans from whichever
+    thread runs a stage; spans measured elsewhere (e.g. inside a worker
+    process) are added with record(). Finished traces are kept in a ring
+    buffer, summarized per stage for the status bar and exported to JSON
+    on a background thread, shortly after a trace finishes.
+    Every method accepts a None trace id and then does nothing, so callers
+    don't need to check whether tracing is on.
+    """
+
+    def __init__(self, enabled: bool = True, max_traces: int = 200, rolling_window: int = 20,
+                 export_path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.enabled = enabled
+        self.export_path = export_path
+        self.rolling_window = rolling_window
+        self._active: Dict[str, dict] = {}
+        self._finished = deque(maxlen=max_traces)
+        self._durations = defaultdict(lambda: deque(maxlen=self.rolling_window))
+        self._last: Dict[str, float] = {}
+        self._counter = itertools.count(1)
+        self._export_timer = None
+        self._lock = threading.Lock()
+
+    def configure(self, config: Optional[dict]):
+        config = config or {}
+        with self._lock:
+            self.enabled = config.get('enabled', True)
+            self.export_path = config.get('export_path')
+            self.rolling_window = config.get('rolling_window', 20)
+            self._finished = deque(self._finished, maxlen=config.get('max_traces', 200))
+
+    def start_trace(self, name: str, **attributes) -> Optional[str]:
+        if not self.enabled:
+            return None
+        trace_id = f"{next(self._counter)}-{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            self._active[trace_id] = {
+                'trace_id': trace_id,
+                'name': name,
+                'started_at': time.time(),
+                'start': time.perf_counter(),
+                'attributes': attributes,
+                'spans': [],
+            }
+        return trace_id
+
+    def begin(self, trace_id: Optional[str], name: str, **attributes) -> Optional[Span]:
+        if trace_id is None or trace_id not in self._active:
+            return None
+        return Span(trace_id, name, time.perf_counter(), attributes)
+
+    def end(self, span: Optional[Span], **attributes):
+        if span is None:
+            return
+        span.duration = time.perf_counter() - span.start
+        span.attributes.update(attributes)
+        self._add(span)
+
+    @contextmanager
+    def span(self, trace_id: Optional[str], name: str, **attributes):
+        span = self.begin(trace_id, name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            if span is not None:
+                span.attributes['error'] = type(e).__name__
+            raise
+        finally:
+            self.end(span)
+
+    def record(self, trace_id: Optional[str], name: str, seconds: float, **attributes):
+        """Add a span whose duration was measured elsewhere, ending now"""
+        if trace_id is None or trace_id not in self._active:
+            return
+        span = Span(trace_id, name, time.perf_counter() - seconds, attributes)
+        span.duration = seconds
+        self._add(span)
+
+    def annotate(self, trace_id: Optional[str], **attributes):
+        with self._lock:
+            trace = self._active.get(trace_id)
+            if trace is not None:
+                trace['attributes'].update(attributes)
+
+    def finish_trace(self, trace_id: Optional[str], **attributes):
+        with self._lock:
+            trace = self._active.pop(trace_id, None)
+            if trace is None:
+                return
+            trace['attributes'].update(attributes)
+            total = time.perf_counter() - trace['start']
+            trace['duration_s'] = round(total, 6)
+            self._finished.append(trace)
+
+            stages = defaultdict(float)
+            for span in trace['spans']:
+                if span.duration is not None:
+                    stages[span.name] += span.duration
+            stages['total'] = total
+            for name, seconds in stages.items():
+                self._durations[name].append(seconds)
+            self._last = dict(stages)
+
+        if self.export_path:
+            self._schedule_export()
+
+    def flush(self):
+        """Write an export that is still scheduled right away, e.g. at shutdown"""
+        with self._lock:
+            timer, self._export_timer = self._export_timer, None
+        if timer is not None:
+            timer.cancel()
+            self._export_now()
+
+    def summary(self) -> Dict[str, dict]:
+        """Per-stage duration of the last trace and rolling median"""
+        with self._lock:
+            return {
+                name: {
+                    'last_s': self._last.get(name),
+                    'p50_s': statistics.median(values),
+                    'count': len(values),
+                }
+                for name, values in self._durations.items() if values
+            }
+
+    def status_text(self) -> str:
+        summary = self.summary()
+        parts = []
+        for name, label in STATUS_STAGES:
+            stage = summary.get(name)
+            if stage and stage['last_s'] is not None:
+                parts.append(f"{label} {stage['last_s']:.1f}s")
+        if not parts:
+            return ''
+        text = 'Last: ' + ' · '.join(parts)
+        if 'total' in summary:
+            text += f" | median total {summary['total']['p50_s']:.1f}s over {summary['total']['count']}"
+        return text
+
+    def traces(self) -> List[dict]:
+        with self._lock:
+            return [self._serialize(trace) for trace in self._finished]
+
+    def export(self, path: str):
+        """Write the finished traces and the stage summary to a JSON file"""
+        data = {'summary': self.summary(), 'traces': self.traces()}
+
+        def dump(temp_path):
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        write_atomic(path, dump)
+
+    def _schedule_export(self):
+        with self._lock:
+            if self._export_timer is not None:
+                return
+            self._export_timer = threading.Timer(EXPORT_DELAY_S, self._export_scheduled)
+            self._export_timer.daemon = True
+            self._export_timer.start()
+
+    def _export_scheduled(self):
+        with self._lock:
+            self._export_timer = None
+        self._export_now()
+
+    def _export_now(self):
+        path = self.export_path
+        if not path:
+            return
+        try:
+            self.export(path)
+        except OSError as e:
+            self.logger.warning(f"Could not export traces: {str(e)}")
+
+    def _add(self, span: Span):
+        with self._lock:
+            trace = self._active.get(span.trace_id)
+            if trace is not None:
+                trace['spans'].append(span)
+
+    @staticmethod
+    def _serialize(trace: dict) -> dict:
+        return {
+            'trace_id': trace['trace_id'],
+            'name': trace['name'],
+            'started_at': trace['started_at'],
+            'duration_s': trace.get('duration_s'),
+            'attributes': trace['attributes'],
+            'spans': [span.as_dict(trace['start'])
+                      for span in sorted(trace['spans'], key=lambda span: span.start)],
+        }
@@ -1,38 +1,43 @@
 # src/main.py
 import logging
 import sys
+from typing import Optional
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QCoreApplication, Qt
 from .core.config_loader import ConfigLoader
+from .core.logging_pipeline import LoggingPipeline
 from .ui.main_window import MainWindow
 
-def setup_logging():
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler('app_debug.log', encoding='utf-8')
-        ]
-    )
+def setup_logging(config: Optional[dict] = None) -> LoggingPipeline:
+    """Queue-based logging: callers only enqueue, a background thread writes the rotated file"""
+    pipeline = LoggingPipeline.from_config(config)
+    pipeline.start()
+    return pipeline
 
 def main():
-    setup_logging()
-    logger = logging.getLogger(__name__)
-    logger.debug("Application starting...")
-    
-    app = QApplication(sys.argv)
-    
     try:
         config = ConfigLoader.load_config()
         prompts = ConfigLoader.load_prompts()
     except Exception as e:
-        logger.error(f"Failed to load configuration: {e}")
+        pipeline = setup_logging()
+        logging.getLogger(__name__).error(f"Failed to load configuration: {e}")
+        pipeline.stop()
         sys.exit(1)
     
+    pipeline = setup_logging(config.get('logging'))
+    logger = logging.getLogger(__name__)
+    logger.debug("Application starting...")
+    
+    # QtWebEngine is imported after the window is shown, which needs shared GL contexts set up front
+    QCoreApplication.setAttribute(Qt.ApplicationAttribute.AA_ShareOpenGLContexts)
+    app = QApplication(sys.argv)
+    app.aboutToQuit.connect(pipeline.stop)
+    
     window = MainWindow(config, prompts)
     window.show()
+    window.start_deferred_init()
     
     sys.exit(app.exec())
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
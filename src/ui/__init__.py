@@ -1,6 +1,20 @@
-from .main_window import MainWindow
-from .chat_panel import ChatPanel
-from .map_panel import MapPanel
-from .code_dialog import CodeExecutionDialog
+import importlib
 
-__all__ = ['MainWindow', 'ChatPanel', 'MapPanel', 'CodeExecutionDialog']
\ No newline at end of file
+# Imported on first access: MapPanel pulls in QtWebEngine, which the main
+# window only loads after it is on screen
+_EXPORTS = {
+    'MainWindow': 'main_window',
+    'ChatPanel': 'chat_panel',
+    'MapPanel': 'map_panel',
+    'CodeExecutionDialog': 'code_dialog',
+}
+
+__all__ = ['MainWindow', 'ChatPanel', 'MapPanel', 'CodeExecutionDialog']
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{_EXPORTS[name]}', __name__), name)
+    globals()[name] = value
+    return value
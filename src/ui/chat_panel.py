@@ -1,9 +1,8 @@
 # src/ui/chat_panel.py
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QTextBrowser, QTextEdit, 
-                          QPushButton, QScrollBar)
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QColor, QTextCursor
-import html
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTextEdit, QPushButton, QCheckBox
+from PyQt6.QtGui import QTextCursor
+
+from .chat_view import ChatView
 
 class ChatPanel(QWidget):
     def __init__(self, parent=None):
@@ -15,18 +14,32 @@ class ChatPanel(QWidget):
         layout.setSpacing(10)
         layout.setContentsMargins(10, 10, 10, 10)
         
-        # Chat history display
-        self.chat_display = QTextBrowser()
-        self.chat_display.setOpenExternalLinks(True)
-        self.chat_display.setStyleSheet("""
-            QTextBrowser {
+        # Chat history display, virtualized so long sessions stay responsive
+        self.chat_view = ChatView()
+        self.chat_view.setStyleSheet("""
+            QListView {
                 background-color: white;
                 border: 1px solid #ddd;
                 border-radius: 5px;
                 padding: 10px;
             }
         """)
-        layout.addWidget(self.chat_display)
+        layout.addWidget(self.chat_view)
+        
+        # Live view of the response while it is being generated
+        self.stream_display = QTextEdit()
+        self.stream_display.setReadOnly(True)
+        self.stream_display.setMaximumHeight(200)
+        self.stream_display.setStyleSheet("""
+            QTextEdit {
+                background-color: #E8E8E8;
+                border: none;
+                border-radius: 10px;
+                padding: 8px;
+            }
+        """)
+        self.stream_display.setVisible(False)
+        layout.addWidget(self.stream_display)
         
         # User input area
         self.user_input = QTextEdit()
@@ -42,6 +55,11 @@ class ChatPanel(QWidget):
         """)
         layout.addWidget(self.user_input)
         
+        # Ask for several answers at once and show the first that produces a map
+        self.speculative_checkbox = QCheckBox("Try several solutions in parallel")
+        self.speculative_checkbox.setToolTip("Costs one API request per candidate")
+        layout.addWidget(self.speculative_checkbox)
+        
         # Send button
         self.send_button = QPushButton("Send")
         self.send_button.setStyleSheet("""
@@ -62,56 +80,23 @@ class ChatPanel(QWidget):
         layout.addWidget(self.send_button)
 
     def add_message(self, message: str, is_user: bool):
-        # Escaping HTML special characters
-        escaped_message = html.escape(message)
-        # Replace line breaks with HTML line break tags
-        formatted_message = escaped_message.replace('\n', '<br>')
-        
-        # Use table layout to achieve message alignment
-        if is_user:
-            html_message = f"""
-                <table width="100%" cellpadding="0" cellspacing="0">
-                    <tr>
-                        <td align="right">
-                            <table bgcolor="#DCF8C6" style="border-radius: 10px; margin: 5px 0;">
-                                <tr>
-                                    <td style="padding: 8px;">
-                                        <font color="#666666" size="2">You</font><br>
-                                        <font color="#000000">{formatted_message}</font>
-                                    </td>
-                                </tr>
-                            </table>
-                        </td>
-                        <td width="10"></td>
-                    </tr>
-                </table>
-            """
-        else:
-            html_message = f"""
-                <table width="100%" cellpadding="0" cellspacing="0">
-                    <tr>
-                        <td width="10"></td>
-                        <td align="left">
-                            <table bgcolor="#E8E8E8" style="border-radius: 10px; margin: 5px 0;">
-                                <tr>
-                                    <td style="padding: 8px;">
-                                        <font color="#666666" size="2">Assistant</font><br>
-                                        <font color="#000000">{formatted_message}</font>
-                                    </td>
-                                </tr>
-                            </table>
-                        </td>
-                    </tr>
-                </table>
-            """
-        
-        # Add a message to the display area
-        cursor = self.chat_display.textCursor()
+        self.chat_view.add_message(message, is_user)
+    
+    def begin_stream(self):
+        """Show the live response area"""
+        self.stream_display.clear()
+        self.stream_display.setVisible(True)
+    
+    def append_stream(self, text: str):
+        """Append a chunk of the response being generated"""
+        cursor = self.stream_display.textCursor()
         cursor.movePosition(QTextCursor.MoveOperation.End)
-        self.chat_display.setTextCursor(cursor)
-        self.chat_display.insertHtml(html_message)
-        
-        # Scroll to the bottom
-        self.chat_display.verticalScrollBar().setValue(
-            self.chat_display.verticalScrollBar().maximum()
-        )
\ No newline at end of file
+        cursor.insertText(text)
+        self.stream_display.verticalScrollBar().setValue(
+            self.stream_display.verticalScrollBar().maximum()
+        )
+    
+    def end_stream(self):
+        """Hide the live response area once the full message has been added"""
+        self.stream_display.setVisible(False)
+        self.stream_display.clear()
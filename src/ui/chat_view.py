@@ -0,0 +1,280 @@
+# src/ui/chat_view.py
+from dataclasses import dataclass, field
+from typing import List, Optional, Set, Tuple
+
+from PyQt6.QtWidgets import QApplication, QListView, QMenu, QStyledItemDelegate, QStyle
+from PyQt6.QtCore import QAbstractListModel, QEvent, QModelIndex, QRect, QSize, Qt
+from PyQt6.QtGui import QColor, QFont, QFontDatabase, QFontMetrics, QPainter
+
+from ..utils.code_parser import CODE_BLOCK_PATTERN
+
+
+# Text beyond this many characters is laid out only once the message is expanded
+PREVIEW_CHARS = 3000
+
+USER_COLOR = QColor('#DCF8C6')
+ASSISTANT_COLOR = QColor('#E8E8E8')
+LABEL_COLOR = QColor('#666666')
+LINK_COLOR = QColor('#0062cc')
+CODE_BACKGROUND = QColor('#F6F8FA')
+
+OUTER_MARGIN = 10
+VERTICAL_MARGIN = 5
+PADDING = 8
+SPACING = 4
+MAX_BUBBLE_RATIO = 0.85
+
+TEXT_FLAGS = Qt.TextFlag.TextWordWrap
+CODE_FLAGS = Qt.TextFlag.TextWrapAnywhere
+
+
+@dataclass
+class ChatMessage:
+    text: str
+    is_user: bool
+    expanded_blocks: Set[int] = field(default_factory=set)
+    show_full: bool = False
+    # Layout for one viewport width, rebuilt when the width or the expansion state changes
+    layout_width: int = -1
+    layout: Optional['MessageLayout'] = None
+    _segments: Optional[List[Tuple[str, str, str]]] = None
+
+    def segments(self) -> List[Tuple[str, str, str]]:
+        """(kind, language, text) parts, kind being 'text' or 'code'"""
+        if self._segments is None:
+            segments, position = [], 0
+            for match in CODE_BLOCK_PATTERN.finditer(self.text):
+                if match.start() > position:
+                    segments.append(('text', '', self.text[position:match.start()].strip('\n')))
+                segments.append(('code', match.group(1) or 'code', match.group(2).rstrip('\n')))
+                position = match.end()
+            if position < len(self.text):
+                segments.append(('text', '', self.text[position:].strip('\n')))
+            self._segments = [segment for segment in segments if segment[0] == 'code' or segment[2]]
+        return self._segments
+
+    def code_blocks(self) -> List[str]:
+        return [text for kind, _, text in self.segments() if kind == 'code']
+
+    def invalidate(self):
+        self.layout = None
+        self.layout_width = -1
+
+
+@dataclass
+class MessageLayout:
+    width: int
+    height: int
+    # (kind, rect relative to the bubble, text, payload); kinds are
+    # 'label', 'text', 'code_header', 'code' and 'more'
+    items: List[Tuple[str, QRect, str, int]]
+
+
+class ChatModel(QAbstractListModel):
+    """Chat messages, one row each"""
+
+    MessageRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.messages: List[ChatMessage] = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.messages)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        message = self.messages[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return message.text
+        if role == self.MessageRole:
+            return message
+        return None
+
+    def append(self, text: str, is_user: bool) -> QModelIndex:
+        row = len(self.messages)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.messages.append(ChatMessage(text, is_user))
+        self.endInsertRows()
+        return self.index(row)
+
+    def clear(self):
+        self.beginResetModel()
+        self.messages = []
+        self.endResetModel()
+
+
+class ChatDelegate(QStyledItemDelegate):
+    """Paints messages as bubbles with collapsible code blocks.
+
+    Layouts are cached on the message for the current viewport width, so
+    relayouts after an append only measure the new message, and painting
+    only touches the rows that are visible.
+    """
+
+    def __init__(self, view: QListView):
+        super().__init__(view)
+        self.view = view
+        self.text_font = QFont(view.font())
+        self.label_font = QFont(view.font())
+        self.label_font.setPointSizeF(max(self.text_font.pointSizeF() - 1.5, 6))
+        self.code_font = QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont)
+
+    def sizeHint(self, option, index):
+        message = index.data(ChatModel.MessageRole)
+        width = self.view.viewport().width()
+        layout = self.layout_for(message, width)
+        return QSize(width, layout.height + 2 * VERTICAL_MARGIN)
+
+    def paint(self, painter, option, index):
+        message = index.data(ChatModel.MessageRole)
+        layout = self.layout_for(message, self.view.viewport().width())
+        bubble = self._bubble_rect(message, layout, option.rect)
+
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(USER_COLOR if message.is_user else ASSISTANT_COLOR)
+        painter.drawRoundedRect(bubble, 10, 10)
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.setPen(option.palette.highlight().color())
+            painter.drawRoundedRect(bubble, 10, 10)
+
+        for kind, rect, text, _ in layout.items:
+            target = rect.translated(bubble.topLeft())
+            if kind == 'label':
+                painter.setFont(self.label_font)
+                painter.setPen(LABEL_COLOR)
+                painter.drawText(target, TEXT_FLAGS, text)
+            elif kind == 'text':
+                painter.setFont(self.text_font)
+                painter.setPen(Qt.GlobalColor.black)
+                painter.drawText(target, TEXT_FLAGS, text)
+            elif kind in ('code_header', 'more'):
+                painter.setFont(self.label_font)
+                painter.setPen(LINK_COLOR)
+                painter.drawText(target, TEXT_FLAGS, text)
+            elif kind == 'code':
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(CODE_BACKGROUND)
+                painter.drawRect(target.adjusted(-4, -2, 4, 2))
+                painter.setFont(self.code_font)
+                painter.setPen(Qt.GlobalColor.black)
+                painter.drawText(target, CODE_FLAGS, text)
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        """Toggle code blocks and the full text on click"""
+        if event.type() != QEvent.Type.MouseButtonRelease or event.button() != Qt.MouseButton.LeftButton:
+            return False
+        message = index.data(ChatModel.MessageRole)
+        layout = self.layout_for(message, self.view.viewport().width())
+        position = event.position().toPoint() - self._bubble_rect(message, layout, option.rect).topLeft()
+        for kind, rect, _, payload in layout.items:
+            if not rect.contains(position):
+                continue
+            if kind == 'code_header':
+                message.expanded_blocks ^= {payload}
+            elif kind == 'more':
+                message.show_full = not message.show_full
+            else:
+                return False
+            message.invalidate()
+            self.sizeHintChanged.emit(index)
+            return True
+        return False
+
+    def layout_for(self, message: ChatMessage, width: int) -> MessageLayout:
+        if message.layout is None or message.layout_width != width:
+            message.layout = self._build_layout(message, width)
+            message.layout_width = width
+        return message.layout
+
+    def _build_layout(self, message: ChatMessage, width: int) -> MessageLayout:
+        text_width = max(int(width * MAX_BUBBLE_RATIO) - 2 * OUTER_MARGIN - 2 * PADDING, 50)
+        text_metrics = QFontMetrics(self.text_font)
+        label_metrics = QFontMetrics(self.label_font)
+        code_metrics = QFontMetrics(self.code_font)
+
+        items, y, used_width = [], PADDING, 0
+
+        def place(kind, metrics, flags, text, payload=0):
+            nonlocal y, used_width
+            rect = metrics.boundingRect(QRect(0, 0, text_width, 1 << 24), flags, text)
+            rect = QRect(PADDING, y, min(rect.width(), text_width), rect.height())
+            items.append((kind, rect, text, payload))
+            used_width = max(used_width, rect.width())
+            y += rect.height() + SPACING
+
+        place('label', label_metrics, TEXT_FLAGS, 'You' if message.is_user else 'Assistant')
+
+        budget = len(message.text) if message.show_full else PREVIEW_CHARS
+        truncated = False
+        block = 0
+        for kind, language, text in message.segments():
+            if kind == 'code':
+                lines = text.count('\n') + 1
+                expanded = block in message.expanded_blocks
+                marker = '▼' if expanded else '▶'
+                action = 'hide' if expanded else 'show'
+                place('code_header', label_metrics, TEXT_FLAGS,
+                      f"{marker} {language} code, {lines} lines (click to {action})", block)
+                if expanded:
+                    place('code', code_metrics, CODE_FLAGS, text)
+                block += 1
+                continue
+            if budget <= 0:
+                truncated = True
+                continue
+            if len(text) > budget:
+                text = text[:budget].rstrip() + '…'
+                truncated = True
+            budget -= len(text)
+            place('text', text_metrics, TEXT_FLAGS, text)
+
+        if truncated or (message.show_full and len(message.text) > PREVIEW_CHARS):
+            label = 'Show less' if message.show_full else 'Show the full message'
+            place('more', label_metrics, TEXT_FLAGS, label)
+
+        return MessageLayout(used_width + 2 * PADDING, y - SPACING + PADDING, items)
+
+    @staticmethod
+    def _bubble_rect(message: ChatMessage, layout: MessageLayout, rect: QRect) -> QRect:
+        top = rect.top() + VERTICAL_MARGIN
+        if message.is_user:
+            return QRect(rect.right() - OUTER_MARGIN - layout.width, top, layout.width, layout.height)
+        return QRect(rect.left() + OUTER_MARGIN, top, layout.width, layout.height)
+
+
+class ChatView(QListView):
+    """Chat history that only lays out and paints the messages in view"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.chat_model = ChatModel(self)
+        self.setModel(self.chat_model)
+        self.setItemDelegate(ChatDelegate(self))
+        self.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.setResizeMode(QListView.ResizeMode.Adjust)
+        self.setUniformItemSizes(False)
+        self.setSelectionMode(QListView.SelectionMode.SingleSelection)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.DefaultContextMenu)
+
+    def add_message(self, text: str, is_user: bool):
+        self.chat_model.append(text, is_user)
+        self.scrollToBottom()
+
+    def contextMenuEvent(self, event):
+        index = self.indexAt(event.pos())
+        if not index.isValid():
+            return
+        message = index.data(ChatModel.MessageRole)
+        menu = QMenu(self)
+        menu.addAction("Copy message", lambda: QApplication.clipboard().setText(message.text))
+        code_blocks = message.code_blocks()
+        if code_blocks:
+            menu.addAction("Copy code", lambda: QApplication.clipboard().setText('\n\n'.join(code_blocks)))
+        menu.exec(event.globalPos())
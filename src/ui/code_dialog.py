@@ -1,15 +1,21 @@
 # src/ui/code_dialog.py
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QLabel, QPlainTextEdit, 
-                           QPushButton, QHBoxLayout, QWidget, QProgressBar)
+                           QPushButton, QHBoxLayout, QWidget, QProgressBar, QCheckBox)
 from PyQt6.QtCore import pyqtSignal, Qt, QTimer
 
 class CodeExecutionDialog(QDialog):
     codeExecuted = pyqtSignal(str, bool)
+    # (working code, attempts) after an automatic repair
+    codeRepaired = pyqtSignal(str, int)
     
-    def __init__(self, code: str, output: str, executor, parent=None):
+    def __init__(self, code: str, output: str, executor, parent=None, repairer=None):
         super().__init__(parent, Qt.WindowType.Window)
         self.code = code
         self.executor = executor
+        self.repairer = repairer
+        self.job_id = None
+        self.cancel_requested = False
+        self.repair_loop = None
         self.setup_ui(code, output)
         self.setup_connections()
         
@@ -47,9 +53,28 @@ class CodeExecutionDialog(QDialog):
         button_container = QWidget()
         button_layout = QHBoxLayout(button_container)
         
+        self.force_checkbox = QCheckBox("Force fresh run")
+        self.force_checkbox.setToolTip("Run the code again even if an identical run is cached")
+        button_layout.addWidget(self.force_checkbox)
+        
+        self.profile_checkbox = QCheckBox("Profile run")
+        self.profile_checkbox.setToolTip("Run under cProfile and append the slowest functions to the output")
+        button_layout.addWidget(self.profile_checkbox)
+        
+        self.repair_checkbox = QCheckBox("Auto-repair")
+        self.repair_checkbox.setToolTip("On failure, ask the model for a fix and run it again")
+        self.repair_checkbox.setChecked(self.repairer is not None and self.repairer.config.enabled)
+        self.repair_checkbox.setVisible(self.repairer is not None)
+        button_layout.addWidget(self.repair_checkbox)
+        
         self.execute_button = QPushButton("Re-execute Code")
         button_layout.addWidget(self.execute_button)
         
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setToolTip("Stop the running execution")
+        self.cancel_button.setEnabled(False)
+        button_layout.addWidget(self.cancel_button)
+        
         self.close_button = QPushButton("Close")
         button_layout.addWidget(self.close_button)
         
@@ -57,32 +82,95 @@ class CodeExecutionDialog(QDialog):
     
     def setup_connections(self):
         self.execute_button.clicked.connect(self.execute_code)
+        self.cancel_button.clicked.connect(self.cancel_execution)
         self.close_button.clicked.connect(self.close)
         
         # Connect to the executor signal
-        self.executor.execution_finished.connect(self.handle_execution_result)
+        self.executor.execution_result.connect(self.handle_execution_result)
     
     def execute_code(self):
         current_code = self.code_display.toPlainText()
-        
-        # Display progress bar
+        self.start_job(self.executor.execute(current_code, force=self.force_checkbox.isChecked(),
+                                             profile=self.profile_checkbox.isChecked()))
+    
+    def start_job(self, job_id: int):
+        """Track a submitted execution and show it as running"""
+        self.job_id = job_id
+        self.cancel_requested = False
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)  # Display busy status
         self.execute_button.setEnabled(False)
-        
-        # Execute code
-        self.executor.execute(current_code)
+        self.cancel_button.setEnabled(True)
     
-    def handle_execution_result(self, result):
-        output, html_content, success = result
+    def cancel_execution(self):
+        if self.repair_loop is not None:
+            self.cancel_button.setEnabled(False)
+            self.repair_loop.stop()
+        elif self.job_id is not None:
+            self.cancel_requested = True
+            self.cancel_button.setEnabled(False)
+            self.executor.cancel(self.job_id)
+    
+    def handle_execution_result(self, job_id, result):
+        # Several executions can run in parallel, only show our own
+        if job_id != self.job_id:
+            return
+        
+        output, html_content, success = result.as_tuple()
         
         # Update output display
         self.output_display.setPlainText(output)
         
+        if not self.cancel_requested and self.repair_checkbox.isChecked():
+            from ..core.repair import RepairLoop
+            if RepairLoop.needs_repair(result):
+                self.start_repair(self.code_display.toPlainText(), output)
+                return
+        
         # Hide the progress bar and restore the button state
-        self.progress_bar.setVisible(False)
-        self.execute_button.setEnabled(True)
+        self.finish_run()
         
         # Send execution result signal
         if success and html_content:
-            self.codeExecuted.emit(html_content, success)
\ No newline at end of file
+            self.codeExecuted.emit(html_content, success)
+    
+    def finish_run(self):
+        self.progress_bar.setVisible(False)
+        self.execute_button.setEnabled(True)
+        self.cancel_button.setEnabled(False)
+    
+    def start_repair(self, code: str, output: str):
+        """Ask the model to fix the failed code and rerun it, up to the configured number of attempts"""
+        if self.repairer is None or self.repair_loop is not None:
+            return
+        from ..core.repair import RepairLoop
+        self.repair_loop = RepairLoop(self.repairer, self.executor, self)
+        self.repair_loop.attempt_started.connect(self.handle_repair_attempt)
+        self.repair_loop.repaired.connect(self.handle_repaired)
+        self.repair_loop.gave_up.connect(self.handle_repair_gave_up)
+        
+        self.output_display.appendPlainText("\nAsking for an automatic fix...")
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        self.execute_button.setEnabled(False)
+        self.cancel_button.setEnabled(True)
+        self.repair_loop.start(code, output)
+    
+    def handle_repair_attempt(self, attempt: int, code: str, job_id: int):
+        self.code_display.setPlainText(code)
+        self.output_display.appendPlainText(f"Repair attempt {attempt}: running the corrected code...")
+    
+    def handle_repaired(self, code: str, result: tuple, attempts: int):
+        self.repair_loop = None
+        output, html_content, success = result
+        self.output_display.setPlainText(f"(Repaired automatically after {attempts} attempt(s))\n{output}")
+        self.finish_run()
+        self.codeRepaired.emit(code, attempts)
+        self.codeExecuted.emit(html_content, success)
+    
+    def handle_repair_gave_up(self, code: str, output: str, attempts: int):
+        self.repair_loop = None
+        self.output_display.setPlainText(
+            f"{output}\nAutomatic repair stopped after {attempts} attempt(s), the error was not fixed."
+        )
+        self.finish_run()
\ No newline at end of file
@@ -1,34 +1,69 @@
 # src/ui/main_window.py
 from PyQt6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QSplitter, QMessageBox
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from ..ui.chat_panel import ChatPanel
-from ..ui.map_panel import MapPanel
 from ..ui.code_dialog import CodeExecutionDialog
-from ..core.chat_manager import ChatManager
-from ..core.code_executor import CodeExecutor
+from ..core.artifacts import ArtifactRetention
+from ..core.execution_pool import MAP_DIR, ExecutionLimits
+from ..core.response_cache import ResponseCache
+from ..core.result_cache import ExecutionResultCache
+from ..core.response_stream import ResponseStream
+from ..core.startup import StartupLoader
+from ..core.tracing import Tracer
 from ..utils.code_parser import CodeParser
+from concurrent.futures import ThreadPoolExecutor
 import traceback
 import logging
+import time
 from PyQt6.QtWidgets import QStatusBar, QLabel
 from PyQt6.QtGui import QPixmap
-from PyQt6.QtWidgets import QApplication
 
 class MainWindow(QMainWindow):
+    # (trace_id, question with the resolved names), emitted from the name resolution thread
+    question_resolved = pyqtSignal(object, str)
+
     def __init__(self, config: dict, prompts: dict):
         super().__init__()
         self.config = config
         self.prompts = prompts
-        
-        # Add log configuration
-        logging.basicConfig(level=logging.DEBUG)
         self.logger = logging.getLogger(__name__)
         
-        self.chat_manager = ChatManager(
-            api_key=config['api_key'],
-            model=config['model']
-        )
-        self.code_executor = CodeExecutor()
+        # Created by start_deferred_init once the window is on screen
+        self.chat_manager = None
+        self.code_executor = None
+        self.map_panel = None
+        # Used to point the model at names in the question that exist in the data
+        self.name_index = None
+        self.describe_matches = None
+        # Fuzzy matching is too slow for the GUI thread, questions are resolved here in order
+        self.name_resolver = ThreadPoolExecutor(max_workers=1, thread_name_prefix='names')
+        self.code_repairer = None
+        self.pending_code = []
+        self.startup_started = time.perf_counter()
+        self.startup_loader = StartupLoader(self)
+        self.pending_components = {
+            'llm': 'LLM client',
+            'map': 'map view',
+            'execution': 'execution workers',
+            'names': 'name index',
+        }
+        
         self.code_parser = CodeParser()
+        self.response_stream = ResponseStream(None, self)
+        self.streamed_code = None
+        # One trace per question, from the request to the map on screen
+        tracing_config = config.get('tracing', {})
+        self.tracer = Tracer.instance()
+        self.tracer.configure(tracing_config)
+        self.profile_runs = tracing_config.get('profile_runs', False)
+        self.speculative_config = config.get('speculative', {})
+        self.trace_id = None
+        # Trace -> stages still running; the trace is finished when none are left
+        self.trace_stages = {}
+        self.job_traces = {}
+        # Map of a traced question -> its trace, until the map is handed to the map panel
+        self.render_paths = {}
+        self.render_trace = None
         
         self.init_ui()
         self.setup_connections()
@@ -47,13 +82,21 @@ class MainWindow(QMainWindow):
         # Create splitter
         splitter = QSplitter(Qt.Orientation.Horizontal)
         
-        # Create panels
+        # Create panels; the map view (QtWebEngine) replaces the placeholder after the first paint
         self.chat_panel = ChatPanel()
-        self.map_panel = MapPanel()
+        self.chat_panel.send_button.setEnabled(False)
+        self.chat_panel.speculative_checkbox.setChecked(self.speculative_config.get('enabled', False))
+        self.chat_panel.speculative_checkbox.setText(
+            f"Try {self.speculative_config.get('candidates', 3)} solutions in parallel"
+        )
+        self.map_placeholder = QLabel("Loading map view...")
+        self.map_placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.map_placeholder.setStyleSheet("QLabel { color: #666; font-family: sans-serif; }")
         
         # Add panels to splitter
+        self.splitter = splitter
         splitter.addWidget(self.chat_panel)
-        splitter.addWidget(self.map_panel)
+        splitter.addWidget(self.map_placeholder)
         
         # Set size ratio
         total_width = sum(self.config['ui']['split_ratio'])
@@ -79,19 +122,139 @@ class MainWindow(QMainWindow):
         """)
         self.statusBar.addWidget(self.status_label)
         
+        # Rolling stage timings of the last questions
+        self.metrics_label = QLabel()
+        self.metrics_label.setStyleSheet("QLabel { padding: 5px; color: #888; }")
+        self.statusBar.addPermanentWidget(self.metrics_label)
+        
+        # Components still starting in the background
+        self.readiness_label = QLabel()
+        self.readiness_label.setStyleSheet("QLabel { padding: 5px; color: #888; }")
+        self.statusBar.addPermanentWidget(self.readiness_label)
+        self.update_readiness()
+        
         # Set the default state
-        self.update_status("Ready")
+        self.update_status("Starting...")
         
     def update_status(self, status: str):
         """Update status bar display"""
         self.status_label.setText(status)
     
+    def update_readiness(self):
+        if self.pending_components:
+            self.readiness_label.setText("Starting: " + ', '.join(self.pending_components.values()))
+        else:
+            self.readiness_label.setText(f"Started in {time.perf_counter() - self.startup_started:.1f} s")
+    
+    def start_deferred_init(self):
+        """Load the LLM client, map view, execution workers and name index after the first paint"""
+        QTimer.singleShot(0, self.init_map_panel)
+        self.startup_loader.stage_ready.connect(self.handle_stage_ready)
+        self.startup_loader.stage_failed.connect(self.handle_stage_failed)
+        self.startup_loader.start([
+            ('llm', self.load_chat_manager),
+            ('execution', self.load_execution_modules),
+            ('names', self.load_name_index),
+        ])
+    
+    def load_chat_manager(self):
+        """Background stage: langchain and the Anthropic client"""
+        from ..core.chat_manager import ChatManager
+        from ..core.history_manager import HistoryManager
+        return ChatManager(
+            api_key=self.config['api_key'],
+            model=self.config['model'],
+            cache=ResponseCache.from_config(self.config.get('response_cache')),
+            history=HistoryManager.from_config(self.config.get('history'))
+        )
+    
+    @staticmethod
+    def load_execution_modules():
+        """Background stage: import the executor and the data stack it needs; workers start on the GUI thread"""
+        from ..core import code_executor
+        return code_executor
+    
+    @staticmethod
+    def load_name_index():
+        """Background stage: load the datasets and build the name index"""
+        from ..core.name_index import NameIndex, describe_matches
+        name_index = NameIndex.instance()
+        name_index.build()
+        return name_index, describe_matches
+    
+    def init_map_panel(self):
+        if self.map_panel is not None:
+            return
+        from ..ui.map_panel import MapPanel
+        start = time.perf_counter()
+        self.map_panel = MapPanel()
+        self.splitter.replaceWidget(1, self.map_panel)
+        self.map_placeholder.deleteLater()
+        self.map_panel.render_finished.connect(self.handle_render_finished)
+        self.logger.debug(f"Map view created in {time.perf_counter() - start:.2f} s")
+        self.mark_ready('map')
+    
+    def handle_stage_ready(self, stage: str, result, seconds: float):
+        if stage == 'llm':
+            self.chat_manager = result
+            self.response_stream.chat_manager = result
+            self.chat_panel.send_button.setEnabled(True)
+        elif stage == 'execution':
+            execution_config = self.config.get('execution', {})
+            self.code_executor = result.CodeExecutor(
+                pool_size=execution_config.get('pool_size', 2),
+                result_cache=ExecutionResultCache.from_config(execution_config.get('result_cache')),
+                retention=ArtifactRetention.from_config(MAP_DIR, execution_config.get('map_retention')),
+                limits=ExecutionLimits.from_config(execution_config.get('limits'))
+            )
+            # Connected before any dialog, so the trace is known when the dialog hands the map over
+            self.code_executor.execution_finished.connect(self.handle_execution_finished)
+            for code, trace_id in self.pending_code:
+                self.start_code_execution(code, trace_id)
+            self.pending_code = []
+        elif stage == 'names':
+            self.name_index, self.describe_matches = result
+        self.mark_ready(stage)
+    
+    def handle_stage_failed(self, stage: str, error: str):
+        self.pending_components.pop(stage, None)
+        self.update_readiness()
+        if stage in ('llm', 'execution'):
+            self.update_status(f"Failed to start the {stage} component")
+            QMessageBox.critical(self, "Error", f"Startup failed ({stage}):\n{error}")
+    
+    def mark_ready(self, component: str):
+        self.pending_components.pop(component, None)
+        self.update_readiness()
+        if component == 'llm':
+            self.update_status("Ready")
+    
+    def update_metrics(self):
+        self.metrics_label.setText(self.tracer.status_text())
+    
+    def complete_stage(self, trace_id, stage: str, outcome: str = None):
+        """Mark a stage of a question as done, finishing its trace after the last one"""
+        stages = self.trace_stages.get(trace_id)
+        if stages is None:
+            return
+        if outcome:
+            self.tracer.annotate(trace_id, outcome=outcome)
+        stages.discard(stage)
+        if not stages:
+            del self.trace_stages[trace_id]
+            self.tracer.finish_trace(trace_id)
+            self.update_metrics()
+    
     def setup_connections(self):
         self.chat_panel.send_button.clicked.connect(self.handle_user_input)
+        self.question_resolved.connect(self.send_question)
+        self.response_stream.token_received.connect(self.chat_panel.append_stream)
+        self.response_stream.code_ready.connect(self.handle_stream_code)
+        self.response_stream.finished.connect(self.handle_response_finished)
     
     def handle_user_input(self):
         user_message = self.chat_panel.user_input.toPlainText().strip()
-        if not user_message:
+        if not user_message or self.response_stream.is_running() or self.chat_manager is None:
             return
             
         try:
@@ -101,62 +264,247 @@ class MainWindow(QMainWindow):
             # Update the status immediately and add the user message
             self.update_status("AI Agent is thinking...")
             self.chat_panel.add_message(user_message, is_user=True)
-            self.chat_manager.add_message(user_message, is_user=True)
+            self.trace_id = self.tracer.start_trace('question', question_chars=len(user_message))
+            if self.trace_id:
+                self.trace_stages[self.trace_id] = {'response'}
             
-            # Force processing of all pending UI events
-            QApplication.processEvents()
+            self.chat_panel.send_button.setEnabled(False)
+            # send_question continues on the GUI thread once the names are resolved
+            self.name_resolver.submit(self.resolve_question, self.trace_id, user_message)
             
-            # Get AI response
+        except Exception as e:
+            self.handle_request_error(e)
+    
+    def resolve_question(self, trace_id, user_message: str):
+        """Runs on the name resolution thread"""
+        with self.tracer.span(trace_id, 'name_resolution'):
+            message = self.resolve_names(user_message)
+        self.question_resolved.emit(trace_id, message)
+    
+    def send_question(self, trace_id, message: str):
+        try:
+            self.chat_manager.add_message(message, is_user=True)
+            if self.chat_panel.speculative_checkbox.isChecked() and self.code_executor is not None:
+                self.start_speculative_run()
+                return
+            
+            # Request the AI response on a background thread, tokens arrive as signals
             self.logger.debug("Requesting AI response...")
-            response = self.chat_manager.get_response(self.prompts['system_prompt'])
+            self.streamed_code = None
+            self.chat_panel.begin_stream()
+            self.response_stream.start(self.prompts['system_prompt'], trace_id)
+            
+        except Exception as e:
+            self.chat_panel.send_button.setEnabled(True)
+            self.handle_request_error(e)
+    
+    def start_speculative_run(self):
+        """Request several candidates at once; the first whose code produces a map is shown"""
+        from ..core.speculative import SpeculativeConfig, SpeculativeRun
+        config = SpeculativeConfig.from_config(self.speculative_config)
+        self.logger.debug(f"Requesting {config.candidates} candidate responses...")
+        self.update_status(f"AI Agent is trying {config.candidates} solutions...")
+        if self.trace_id:
+            self.trace_stages[self.trace_id] = {'speculative'}
+        run = SpeculativeRun(self.chat_manager, self.code_executor, config, self)
+        trace_id = self.trace_id
+        run.succeeded.connect(lambda response, code, result: self.handle_speculative_success(
+            trace_id, response, code, result))
+        run.failed.connect(lambda response, code, result: self.handle_speculative_failure(
+            trace_id, response, code, result))
+        run.start(self.prompts['system_prompt'], trace_id)
+    
+    def handle_speculative_success(self, trace_id, response: str, code: str, result: tuple):
+        self.chat_panel.send_button.setEnabled(True)
+        self.chat_panel.add_message(response, is_user=False)
+        self.chat_manager.add_message(response, is_user=False)
+        output, html_path, _ = result
+        self.show_execution_result(code, output)
+        if trace_id in self.trace_stages:
+            self.trace_stages[trace_id].add('render')
+            self.render_paths[html_path] = trace_id
+            self.complete_stage(trace_id, 'speculative')
+        self.handle_code_execution(html_path, True)
+    
+    def handle_speculative_failure(self, trace_id, response, code, result):
+        self.chat_panel.send_button.setEnabled(True)
+        self.complete_stage(trace_id, 'speculative', 'all candidates failed')
+        if not response:
+            self.handle_request_error(RuntimeError("No response received"))
+            return
+        self.chat_panel.add_message(response, is_user=False)
+        self.chat_manager.add_message(response, is_user=False)
+        if code:
+            self.show_execution_result(code, result[0] if result else "The code was not run.", failed=True)
+        self.update_status("Execution failed")
+    
+    def show_execution_result(self, code: str, output: str, failed: bool = False):
+        """Open the execution dialog for a run that has already finished"""
+        dialog = CodeExecutionDialog(code=code, output=output, executor=self.code_executor, parent=self,
+                                     repairer=self.get_repairer())
+        dialog.codeExecuted.connect(self.handle_code_execution)
+        dialog.codeRepaired.connect(self.handle_code_repaired)
+        dialog.show()
+        if failed and dialog.repair_checkbox.isChecked():
+            dialog.start_repair(code, output)
+    
+    def get_repairer(self):
+        """Shared CodeRepairer, available once the LLM client and the executor have started"""
+        if self.code_repairer is None and self.chat_manager is not None and self.code_executor is not None:
+            from ..core.repair import CodeRepairer, RepairConfig
+            self.code_repairer = CodeRepairer(self.chat_manager, self.prompts['repair_prompt'],
+                                              RepairConfig.from_config(self.config.get('repair')))
+        return self.code_repairer
+    
+    def handle_code_repaired(self, code: str, attempts: int):
+        """Keep the working code in the conversation so follow-up questions build on it"""
+        message = f"The code failed and was fixed automatically ({attempts} attempt(s)):\n```python\n{code}\n```"
+        self.chat_panel.add_message(message, is_user=False)
+        self.chat_manager.add_message(message, is_user=False)
+    
+    def resolve_names(self, user_message: str) -> str:
+        """Append the names found in the data, so misspelled names don't cost a second round trip"""
+        if self.name_index is None:
+            return user_message
+        try:
+            matches = self.name_index.resolve_question(user_message)
+        except Exception as e:
+            self.logger.warning(f"Name resolution failed: {str(e)}")
+            return user_message
+        if not matches:
+            return user_message
+        self.logger.debug(f"Resolved {len(matches)} names in the question")
+        return f"{user_message}\n\n{self.describe_matches(matches)}"
+    
+    def handle_stream_code(self, code: str):
+        """Start executing as soon as the code block is complete, while the review is still streaming"""
+        self.logger.debug("Code block complete, starting execution before the response ends")
+        self.streamed_code = code
+        self.start_code_execution(code)
+    
+    def handle_response_finished(self, response):
+        self.chat_panel.end_stream()
+        self.chat_panel.send_button.setEnabled(True)
+        
+        if not response:
+            self.complete_stage(self.trace_id, 'response', 'no response')
+            self.handle_request_error(RuntimeError("No response received"))
+            return
+        
+        try:
+            self.logger.debug("AI response received")
+            if self.chat_manager.cache:
+                self.logger.debug("Response cache stats: %s", self.chat_manager.cache.stats())
+            
+            # Add AI response to chat log
+            self.chat_panel.add_message(response, is_user=False)
+            self.chat_manager.add_message(response, is_user=False)
+            
+            if self.streamed_code is not None:
+                self.complete_stage(self.trace_id, 'response')
+                return
             
-            if response:
-                # Update Status
-                self.logger.debug("AI response received")
-                self.update_status("Executing visualization code...")
-                
-                # Add AI response to chat log
-                self.chat_panel.add_message(response, is_user=False)
-                self.chat_manager.add_message(response, is_user=False)
-                
-                # Extract code
-                code = self.code_parser.extract_python_code(response)
-                self.logger.debug("Extracted code: %s", code)
-                
-                if code:
-                    # Initialize and display the code execution dialog box
-                    self.logger.debug("Initializing code execution dialog")
-                    dialog = CodeExecutionDialog(
-                        code=code,
-                        output="Executing...",
-                        executor=self.code_executor,
-                        parent=self
-                    )
-                    dialog.codeExecuted.connect(self.handle_code_execution)
-                    dialog.show()
-                    
-                    # Execute code
-                    self.logger.debug("Starting code execution")
-                    self.code_executor.execute(code)
-                else:
-                    self.logger.warning("No code found in AI response")
-                    self.update_status("No code to execute")
+            # Extract code
+            code = self.code_parser.extract_python_code(response)
+            self.logger.debug("Extracted %d lines of code", len(code.splitlines()) if code else 0)
+            
+            if code:
+                self.start_code_execution(code)
+                self.complete_stage(self.trace_id, 'response')
+            else:
+                self.logger.warning("No code found in AI response")
+                self.update_status("No code to execute")
+                self.complete_stage(self.trace_id, 'response', 'no code')
             
         except Exception as e:
-            self.logger.error("Error in handle_user_input: %s", str(e))
-            self.logger.error("Traceback: %s", traceback.format_exc())
-            self.update_status("Error occurred")
-            QMessageBox.critical(
-                self,
-                "Error",
-                f"{self.prompts['error_messages']['api_error']}\n{str(e)}"
-            )
+            self.complete_stage(self.trace_id, 'response', 'error')
+            self.handle_request_error(e)
+    
+    def start_code_execution(self, code: str, trace_id=None):
+        if trace_id is None:
+            trace_id = self.trace_id
+        if trace_id in self.trace_stages:
+            self.trace_stages[trace_id].add('execution')
+        if self.code_executor is None:
+            # Runs as soon as the execution workers have started
+            self.update_status("Waiting for the execution workers to start...")
+            self.pending_code.append((code, trace_id))
+            return
+        self.update_status("Executing visualization code...")
+        
+        # Initialize and display the code execution dialog box
+        self.logger.debug("Initializing code execution dialog")
+        dialog = CodeExecutionDialog(
+            code=code,
+            output="Executing...",
+            executor=self.code_executor,
+            parent=self,
+            repairer=self.get_repairer()
+        )
+        dialog.codeExecuted.connect(self.handle_code_execution)
+        dialog.codeRepaired.connect(self.handle_code_repaired)
+        dialog.show()
+        
+        # Execute code
+        self.logger.debug("Starting code execution")
+        job_id = self.code_executor.execute(code, trace_id=trace_id, profile=self.profile_runs)
+        if trace_id in self.trace_stages:
+            self.job_traces[job_id] = trace_id
+        dialog.start_job(job_id)
+    
+    def handle_request_error(self, e: Exception):
+        self.logger.error("Error in handle_user_input: %s", str(e))
+        # Errors also arrive through signals, outside any except block
+        self.logger.error("Traceback: %s", ''.join(traceback.format_exception(e)))
+        self.update_status("Error occurred")
+        QMessageBox.critical(
+            self,
+            "Error",
+            f"{self.prompts['error_messages']['api_error']}\n{str(e)}"
+        )
+    
+    def closeEvent(self, event):
+        self.startup_loader.wait()
+        self.name_resolver.shutdown(wait=False, cancel_futures=True)
+        self.tracer.flush()
+        if self.code_executor is not None:
+            self.code_executor.shutdown()
+        if self.map_panel is not None:
+            self.map_panel.shutdown()
+        super().closeEvent(event)
+    
+    def handle_execution_finished(self, job_id: int, result: tuple):
+        trace_id = self.job_traces.pop(job_id, None)
+        if trace_id is None:
+            return
+        _, html_path, success = result
+        if success and html_path:
+            # Finished once the map panel has shown this map
+            self.trace_stages[trace_id].add('render')
+            self.render_paths[html_path] = trace_id
+            self.complete_stage(trace_id, 'execution')
+        else:
+            self.complete_stage(trace_id, 'execution', 'execution failed')
+    
+    def handle_render_finished(self, kind: str, seconds: float, success: bool):
+        trace_id, self.render_trace = self.render_trace, None
+        if trace_id is None:
+            # A map of no traced question, e.g. from Re-execute or an automatic repair
+            return
+        self.tracer.record(trace_id, 'render', seconds, kind=kind, success=success)
+        self.complete_stage(trace_id, 'render', 'rendered' if success else 'render failed')
     
     def handle_code_execution(self, html_path: str, success: bool):
         """Processing code execution results"""
         self.logger.debug(f"Code execution result - Success: {success}")
         if success and html_path:
             self.logger.debug(f"Updating map with file: {html_path}")
+            # Any map still loading is replaced; only maps of traced jobs are timed
+            if self.render_trace is not None:
+                self.complete_stage(self.render_trace, 'render', 'superseded')
+            self.render_trace = self.render_paths.pop(html_path, None)
+            if self.map_panel is None:
+                self.init_map_panel()
             self.map_panel.update_map(html_path)
             self.update_status("Visualization complete")
         else:
@@ -1,19 +1,53 @@
 # src/ui/map_panel.py
 from PyQt6.QtWebEngineWidgets import QWebEngineView
-from PyQt6.QtCore import QUrl
+from PyQt6.QtCore import QUrl, pyqtSignal
 from PyQt6.QtWebEngineCore import QWebEnginePage, QWebEngineSettings
+from PyQt6.QtWebChannel import QWebChannel
 import logging
+import json
 import os
+import time
+
+from ..core.logging_pipeline import RateLimiter
+from ..core.map_assets import AssetBundle, MapAssetServer
+from .map_shell import MapBridge, build_attach_js, build_shell_html
+
+# Written by executions that update the map on screen instead of saving a page
+LAYER_UPDATE_SUFFIX = '.layers.json'
+SHELL_CENTER = [45.4371, 12.3326]
+# JS console messages forwarded to the log per second, and the burst allowed above that
+JS_CONSOLE_RATE = 10
+JS_CONSOLE_BURST = 50
+JS_CONSOLE_LEVELS = {
+    QWebEnginePage.JavaScriptConsoleMessageLevel.InfoMessageLevel: logging.DEBUG,
+    QWebEnginePage.JavaScriptConsoleMessageLevel.WarningMessageLevel: logging.WARNING,
+    QWebEnginePage.JavaScriptConsoleMessageLevel.ErrorMessageLevel: logging.ERROR,
+}
 
 class MapWebPage(QWebEnginePage):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # A separate logger so the page console can be silenced on its own
+        self.console_logger = logging.getLogger(f"{__name__}.js")
+        self.console_limiter = RateLimiter(JS_CONSOLE_RATE, JS_CONSOLE_BURST)
+    
     def javaScriptConsoleMessage(self, level, message, line, source):
-        logging.debug(f"JS Console [{level}] Line {line}: {message}")
+        log_level = JS_CONSOLE_LEVELS.get(level, logging.DEBUG)
+        if not self.console_logger.isEnabledFor(log_level) or not self.console_limiter.allow():
+            return
+        dropped = self.console_limiter.take_dropped()
+        if dropped:
+            self.console_logger.warning(f"Dropped {dropped} JS console messages")
+        self.console_logger.log(log_level, f"Line {line}: {message[:500]}")
         
     def certificateError(self, error):
         # Allow all certificates to avoid possible SSL issues
         return True
 
 class MapPanel(QWebEngineView):
+    # (kind: 'page', 'layers' or 'invalid', seconds from update_map until shown, success)
+    render_finished = pyqtSignal(str, float, bool)
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.logger = logging.getLogger(__name__)
@@ -26,6 +60,27 @@ class MapPanel(QWebEngineView):
         settings.setAttribute(QWebEngineSettings.WebAttribute.LocalContentCanAccessRemoteUrls, True)
         settings.setAttribute(QWebEngineSettings.WebAttribute.LocalContentCanAccessFileUrls, True)
         settings.setAttribute(QWebEngineSettings.WebAttribute.AllowRunningInsecureContent, True)
+
+        # Maps are served over localhost so bundled assets and fetched layer data resolve
+        self.asset_bundle = AssetBundle()
+        self.asset_server = MapAssetServer()
+        self.asset_server.start()
+
+        # Layer updates are applied in place to the folium map on screen, or to an empty
+        # Leaflet shell page when there is no map to update
+        self.bridge = MapBridge(self)
+        self.bridge.ready.connect(self._on_layer_api_ready)
+        self.bridge.update_applied.connect(lambda count, error: self._finish_render('layers', not error))
+        self.channel = QWebChannel(self.page())
+        self.channel.registerObject('bridge', self.bridge)
+        self.page().setWebChannel(self.channel)
+        self.showing_shell = False
+        # None, 'installing' or 'ready': whether the page on screen accepts layer updates
+        self.layer_api = None
+        self.loading_map = False
+        self.map_loaded = False
+        self.pending_ops = []
+        self.render_started = None
         
         # Set the initial page
         self.setHtml("""
@@ -51,29 +106,132 @@ class MapPanel(QWebEngineView):
         self.loadFinished.connect(self._on_load_finished)
     
     def update_map(self, html_path: str):
-        """Load a map from a file"""
+        """Load a map from a file, or apply a layer update to the map on screen"""
         if not html_path or not os.path.exists(html_path):
             self.logger.warning(f"Invalid map file path: {html_path}")
+            self.render_finished.emit('invalid', 0.0, False)
             return
-            
+        self.render_started = time.perf_counter()
+
+        if html_path.endswith(LAYER_UPDATE_SUFFIX):
+            self.apply_layer_update(html_path)
+            return
+
         try:
+            self.showing_shell = False
+            self.layer_api = None
+            self.loading_map = True
+            self.map_loaded = False
             self.logger.debug(f"Loading map file: {html_path}")
-            file_url = QUrl.fromLocalFile(os.path.abspath(html_path))
-            self.logger.debug(f"File URL: {file_url.toString()}")
-            
-            # Load file URL directly
-            self.load(file_url)
+            server_url = self.asset_server.url_for(html_path)
+            if server_url:
+                # The execution worker already pointed the map at the bundle; whatever it
+                # still pulls from CDNs is bundled for the next one
+                self.asset_bundle.fetch_missing_in_background(html_path)
+                url = QUrl(server_url)
+            else:
+                url = QUrl.fromLocalFile(os.path.abspath(html_path))
+            self.logger.debug(f"Map URL: {url.toString()}")
+
+            self.load(url)
             
         except Exception as e:
             self.logger.error(f"Error loading map: {str(e)}", exc_info=True)
     
+    def apply_layer_update(self, path: str):
+        """Add, replace or remove layers on the map on screen, keeping viewport and tiles"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                ops = json.load(f)['ops']
+        except (OSError, ValueError, KeyError) as e:
+            self.logger.error(f"Invalid layer update {path}: {str(e)}")
+            return
+
+        # Layer data is named relative to the update file, which may be a cached copy
+        for op in ops:
+            if op.get('op') == 'layer' and '/' not in op['url']:
+                op['url'] = self.asset_server.url_for(os.path.join(os.path.dirname(path), op['url'])) or op['url']
+        self.pending_ops.extend(ops)
+        if self.layer_api == 'ready':
+            self._flush_ops()
+        elif self.layer_api == 'installing' or self.loading_map:
+            # Flushed once the page has loaded and the layer API reports ready
+            return
+        elif self.map_loaded:
+            self.attach_layer_api()
+        else:
+            self.show_shell()
+
+    def attach_layer_api(self):
+        """Make the folium map already on screen accept layer updates"""
+        self.layer_api = 'installing'
+        try:
+            script = build_attach_js()
+        except RuntimeError as e:
+            self.logger.error(f"Cannot attach layer updates to the map: {str(e)}")
+            self.show_shell()
+            return
+        self.page().runJavaScript(script, self._on_layer_api_attached)
+
+    def _on_layer_api_attached(self, attached):
+        if self.layer_api != 'installing' or self.showing_shell:
+            return
+        if not attached:
+            # Not a Leaflet page (e.g. pydeck), start from an empty map instead
+            self.logger.debug("No Leaflet map on the page, showing the layer shell")
+            self.show_shell()
+
+    def show_shell(self):
+        base_url = self.asset_server.base_url()
+        if base_url is None:
+            self.logger.error("Map asset server is not running, cannot show layer updates")
+            self.pending_ops = []
+            self.layer_api = None
+            self._finish_render('layers', False)
+            return
+        shell_html, missing = self.asset_bundle.localize(build_shell_html(SHELL_CENTER))
+        self.asset_bundle.fetch_in_background(missing)
+        self.showing_shell = True
+        self.layer_api = 'installing'
+        self.map_loaded = False
+        self.setHtml(shell_html, QUrl(base_url))
+
+    def _on_layer_api_ready(self):
+        if self.layer_api == 'installing':
+            self.layer_api = 'ready'
+            self._flush_ops()
+
+    def _flush_ops(self):
+        if self.pending_ops:
+            self.bridge.update_requested.emit(json.dumps({'ops': self.pending_ops}))
+            self.pending_ops = []
+
+    def shutdown(self):
+        self.asset_server.stop()
+
+    def _finish_render(self, kind: str, success: bool):
+        if self.render_started is None:
+            return
+        seconds = time.perf_counter() - self.render_started
+        self.render_started = None
+        self.render_finished.emit(kind, seconds, success)
+
     def _on_load_finished(self, success: bool):
         self.logger.debug(f"Page load finished: {success}")
-        if success:
-            # Add CSS to ensure the legend is displayed on top
-            self.page().runJavaScript("""
-                (function() {
-                    // Add CSS styles
+        if self.showing_shell:
+            return
+        self.loading_map = False
+        self.map_loaded = success
+        self._finish_render('page', success)
+        if not success:
+            return
+        if self.pending_ops:
+            # Layer updates that arrived while the page was loading
+            self.attach_layer_api()
+        # One pass: keep legends on top, resize the maps, report what was found
+        self.page().runJavaScript("""
+            (function() {
+                try {
                     var style = document.createElement('style');
                     style.textContent = `
                         .legend {
@@ -94,81 +252,37 @@ class MapPanel(QWebEngineView):
                         }
                     `;
                     document.head.appendChild(style);
-                    
-                    // Make sure all legend elements have the correct z-index
-                    document.querySelectorAll('.legend').forEach(function(legend) {
+
+                    var legendElements = document.querySelectorAll('.legend');
+                    legendElements.forEach(function(legend) {
                         legend.style.zIndex = '1000';
-                        // Output the current style of the legend for debugging purposes
-                        console.log('Legend style:', 
-                            'z-index:', window.getComputedStyle(legend).zIndex,
-                            'position:', window.getComputedStyle(legend).position
-                        );
                     });
-                    
-                    // Check if the legend exists and is visible
-                    var legendElements = document.querySelectorAll('.legend');
-                    console.log('Found legend elements:', legendElements.length);
-                    
+
+                    if (typeof L !== 'undefined') {
+                        window.dispatchEvent(new Event('resize'));
+                        document.querySelectorAll('.folium-map').forEach(function(map) {
+                            if (map._leaflet_map) {
+                                map._leaflet_map.invalidateSize(true);
+                            }
+                        });
+                    }
+
                     return {
-                        legendCount: legendElements.length,
-                        legendVisible: Array.from(legendElements).map(el => 
-                            window.getComputedStyle(el).display !== 'none'
-                        )
+                        hasLeaflet: typeof L !== 'undefined',
+                        mapElements: document.querySelectorAll('.folium-map').length,
+                        legendCount: legendElements.length
                     };
-                })();
-            """, self._handle_legend_check)
-            
-            self.page().runJavaScript("""
-                (function() {
-                    try {
-                        console.log('Checking map elements...');
-                        return {
-                            hasLeaflet: typeof L !== 'undefined',
-                            mapElements: document.querySelectorAll('.folium-map').length,
-                            bodyContent: document.body.innerHTML.length
-                        };
-                    } catch (e) {
-                        console.error('Error in debug check:', e);
-                        return {error: e.toString()};
-                    }
-                })();
-            """, self._handle_debug_info)
-            
-            # Map refresh
-            self.page().runJavaScript("""
-                (function() {
-                    try {
-                        if (typeof L !== 'undefined') {
-                            console.log('Leaflet found, refreshing maps...');
-                            window.dispatchEvent(new Event('resize'));
-                            document.querySelectorAll('.folium-map').forEach(function(map) {
-                                if (map._leaflet_map) {
-                                    map._leaflet_map.invalidateSize(true);
-                                }
-                            });
-                        }
-                    } catch (e) {
-                        console.error('Error in map refresh:', e);
-                    }
-                })();
-            """)
-    
-    def _handle_legend_check(self, info):
-        """Process legend check results"""
-        if info:
-            self.logger.debug(f"Legend check results: {info}")
-            if info.get('legendCount', 0) > 0:
-                self.logger.debug("Legend elements found and styled")
-            else:
-                self.logger.debug("No legend elements found")
-                
-    def _handle_debug_info(self, debug_info):
-        """Handle debug information callback"""
-        if debug_info:
-            self.logger.debug(f"Map debug info: {debug_info}")
-            if debug_info.get('hasLeaflet'):
-                self.logger.debug("Leaflet library loaded successfully")
-            if debug_info.get('mapElements'):
-                self.logger.debug(f"Found {debug_info['mapElements']} map elements")
-            if debug_info.get('error'):
-                self.logger.error(f"Debug error: {debug_info['error']}")
\ No newline at end of file
+                } catch (e) {
+                    return {error: e.toString()};
+                }
+            })();
+        """, self._handle_page_info)
+
+    def _handle_page_info(self, info):
+        """Log what the post-load pass found"""
+        if not info:
+            return
+        if info.get('error'):
+            self.logger.error(f"Map post-load error: {info['error']}")
+        else:
+            self.logger.debug(f"Map page info: {info}")
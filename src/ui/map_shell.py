@@ -0,0 +1,186 @@
+# src/ui/map_shell.py
+import json
+import logging
+
+from PyQt6.QtCore import QFile, QIODevice, QObject, pyqtSignal, pyqtSlot
+
+# Same Leaflet build folium references, so the asset bundle serves one copy for both
+LEAFLET_JS = 'https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.js'
+LEAFLET_CSS = 'https://cdn.jsdelivr.net/npm/leaflet@1.9.3/dist/leaflet.css'
+TILE_URL = 'https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png'
+TILE_ATTRIBUTION = '&copy; OpenStreetMap contributors &copy; CARTO'
+
+# Named layers and a legend on a Leaflet map, changed through the QWebChannel bridge.
+# Defined once per page; used by the shell and injected into folium pages already on screen.
+LAYER_API_JS = """
+if (typeof window.installLayerApi === 'undefined') {
+    window.installLayerApi = function (map, overlays) {
+        var layers = overlays || {};
+        var legend = null;
+
+        function removeLayer(name) {
+            if (layers[name]) { map.removeLayer(layers[name]); delete layers[name]; }
+        }
+
+        function setLegend(title, items) {
+            if (legend) { map.removeControl(legend); legend = null; }
+            if (!items || !items.length) { return; }
+            legend = L.control({position: 'bottomright'});
+            legend.onAdd = function () {
+                var div = L.DomUtil.create('div', 'legend');
+                var title_el = document.createElement('b');
+                title_el.textContent = title;
+                div.appendChild(title_el);
+                items.forEach(function (item) {
+                    var row = document.createElement('div');
+                    var swatch = document.createElement('i');
+                    swatch.style.cssText = 'display: inline-block; width: 10px; height: 10px; ' +
+                                           'margin-right: 6px; border-radius: 50%; background: ' + item[1];
+                    row.appendChild(swatch);
+                    row.appendChild(document.createTextNode(item[0]));
+                    div.appendChild(row);
+                });
+                return div;
+            };
+            legend.addTo(map);
+        }
+
+        function showLayer(op) {
+            return fetch(op.url)
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    removeLayer(op.name);
+                    layers[op.name] = L.geoJson(data, {
+                        pointToLayer: function (feature, latlng) { return L.circleMarker(latlng, op.style); },
+                        onEachFeature: function (feature, layer) {
+                            if (feature.properties.popup) { layer.bindPopup(feature.properties.popup); }
+                        }
+                    }).addTo(map);
+                    if (op.fit && layers[op.name].getBounds().isValid()) {
+                        map.fitBounds(layers[op.name].getBounds(), {maxZoom: 17});
+                    }
+                });
+        }
+
+        function apply(update, bridge) {
+            var pending = Promise.resolve();
+            JSON.parse(update).ops.forEach(function (op) {
+                pending = pending.then(function () {
+                    if (op.op === 'layer') { return showLayer(op); }
+                    if (op.op === 'remove') { removeLayer(op.name); }
+                    if (op.op === 'legend') { setLegend(op.title, op.items); }
+                    if (op.op === 'clear') { Object.keys(layers).forEach(removeLayer); setLegend(null, []); }
+                });
+            });
+            pending.then(function () { bridge.applied(Object.keys(layers).length, ''); },
+                         function (error) { bridge.applied(Object.keys(layers).length, String(error)); });
+        }
+
+        new QWebChannel(qt.webChannelTransport, function (channel) {
+            var bridge = channel.objects.bridge;
+            bridge.update_requested.connect(function (update) { apply(update, bridge); });
+            bridge.shell_ready();
+        });
+    };
+}
+"""
+
+# Finds the Leaflet map of a folium page and its named overlays (from the layer control),
+# so updates can replace or remove them. Evaluates to false when the page has no such map.
+FOLIUM_ATTACH_JS = """
+(function () {
+    if (typeof L === 'undefined' || typeof qt === 'undefined') { return false; }
+    var element = document.querySelector('.folium-map');
+    var map = element ? window[element.id] : null;
+    if (!(map instanceof L.Map)) { return false; }
+    var overlays = {};
+    Object.keys(window).forEach(function (key) {
+        var value = window[key];
+        if (/^layer_control_.*_layers$/.test(key) && value && value.overlays) {
+            Object.keys(value.overlays).forEach(function (name) { overlays[name] = value.overlays[name]; });
+        }
+    });
+    installLayerApi(map, overlays);
+    return true;
+})();
+"""
+
+SHELL_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<link rel="stylesheet" href="%(leaflet_css)s">
+<script src="%(leaflet_js)s"></script>
+<script>%(qwebchannel_js)s</script>
+<script>%(layer_api_js)s</script>
+<style>
+    html, body, #map { margin: 0; padding: 0; width: 100%%; height: 100%%; }
+    .legend { background: white; padding: 8px 10px; border-radius: 5px;
+              box-shadow: 0 0 10px rgba(0,0,0,0.2); font: 12px sans-serif; }
+</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+    var map = L.map('map', {preferCanvas: true}).setView([%(lat)f, %(lng)f], %(zoom)d);
+    L.tileLayer(%(tile_url)s, {attribution: %(tile_attribution)s, maxZoom: 20}).addTo(map);
+    installLayerApi(map, {});
+</script>
+</body>
+</html>
+"""
+
+
+def _qwebchannel_js() -> str:
+    """The QWebChannel client library shipped inside Qt's resources"""
+    resource = QFile(':/qtwebchannel/qwebchannel.js')
+    if not resource.open(QIODevice.OpenModeFlag.ReadOnly):
+        raise RuntimeError("qwebchannel.js is not available in the Qt resources")
+    try:
+        return bytes(resource.readAll()).decode('utf-8')
+    finally:
+        resource.close()
+
+
+def build_shell_html(center, zoom: int = 14) -> str:
+    return SHELL_TEMPLATE % {
+        'leaflet_css': LEAFLET_CSS,
+        'leaflet_js': LEAFLET_JS,
+        'qwebchannel_js': _qwebchannel_js(),
+        'layer_api_js': LAYER_API_JS,
+        'lat': center[0],
+        'lng': center[1],
+        'zoom': zoom,
+        'tile_url': json.dumps(TILE_URL),
+        'tile_attribution': json.dumps(TILE_ATTRIBUTION),
+    }
+
+
+def build_attach_js() -> str:
+    """Script that adds the layer API to the folium page on screen, evaluating to whether it found a map"""
+    return _qwebchannel_js() + LAYER_API_JS + FOLIUM_ATTACH_JS
+
+
+class MapBridge(QObject):
+    """Object shared with the map shell page over QWebChannel"""
+
+    update_requested = pyqtSignal(str)
+    ready = pyqtSignal()
+    update_applied = pyqtSignal(int, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger(__name__)
+
+    @pyqtSlot()
+    def shell_ready(self):
+        self.logger.debug("Map shell ready")
+        self.ready.emit()
+
+    @pyqtSlot(int, str)
+    def applied(self, layer_count: int, error: str):
+        if error:
+            self.logger.warning(f"Map layer update failed: {error}")
+        else:
+            self.logger.debug(f"Map layer update applied, {layer_count} layers shown")
+        self.update_applied.emit(layer_count, error)
@@ -1,3 +1,5 @@
 from .code_parser import CodeParser
+from .preflight import CodePreflight
+from .singleton import Singleton
 
-__all__ = ['CodeParser']
\ No newline at end of file
+__all__ = ['CodeParser', 'CodePreflight', 'Singleton']
\ No newline at end of file
@@ -1,9 +1,13 @@
 # src/utils/code_parser.py
 import re
 
+# Fenced code block: optional language tag, then the code
+CODE_BLOCK_PATTERN = re.compile(r"```(\w*)\n?(.*?)```", re.DOTALL)
+
 class CodeParser:
     @staticmethod
     def extract_python_code(response: str) -> str | None:
-        code_pattern = r"```python(.*?)```"
-        matches = re.findall(code_pattern, response, re.DOTALL)
-        return matches[0].strip() if matches else None
\ No newline at end of file
+        for match in CODE_BLOCK_PATTERN.finditer(response):
+            if match.group(1) == 'python':
+                return match.group(2).strip()
+        return None
@@ -0,0 +1,26 @@
+# src/utils/files.py
+import os
+import tempfile
+from typing import Callable
+
+
+def write_atomic(path: str, write: Callable[[str], None]):
+    """Write through a temporary file unique to this writer, then move it over path.
+
+    Readers see the old file or the complete new one, and concurrent
+    writers (pool workers warming up together, or the app and the bench
+    runner sharing a cache directory) never share a file.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,295 @@
+# src/utils/preflight.py
+import ast
+import re
+import importlib.util
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# h3 v3 names -> v4 names (h3==4.x is installed)
+H3_RENAMES = {
+    'geo_to_h3': 'latlng_to_cell',
+    'h3_to_geo': 'cell_to_latlng',
+    'h3_to_geo_boundary': 'cell_to_boundary',
+    'k_ring': 'grid_disk',
+    'hex_ring': 'grid_ring',
+    'h3_distance': 'grid_distance',
+    'h3_line': 'grid_path_cells',
+    'h3_to_parent': 'cell_to_parent',
+    'h3_to_children': 'cell_to_children',
+    'h3_to_center_child': 'cell_to_center_child',
+    'h3_get_resolution': 'get_resolution',
+    'h3_is_valid': 'is_valid_cell',
+    'h3_is_pentagon': 'is_pentagon',
+    'compact': 'compact_cells',
+    'uncompact': 'uncompact_cells',
+    'polyfill': 'polygon_to_cells',
+    'hex_area': 'average_hexagon_area',
+}
+# v4 takes different arguments for these, the rename alone is not enough
+H3_SIGNATURE_CHANGED = {'polyfill', 'hex_area'}
+
+# Module-level shapely functions that are only methods on geometries in shapely.geometry
+SHAPELY_FUNCTIONS = {'buffer', 'union', 'intersection', 'difference', 'distance', 'within', 'contains'}
+
+# Dataset files generated code tends to read directly -> name for load_dataset()
+DATASET_FILE_PATTERN = re.compile(
+    r"(?:^|[/\\])(?P<name>buildings_1740|buildings_1808|landmarks)(?:_geo)?\.(?:geojson|csv)$"
+)
+READ_FUNCTIONS = {'read_file', 'read_csv'}
+
+# Helpers that update the map on screen instead of writing a page
+LAYER_UPDATE_CALLS = {'show_layer', 'remove_layer', 'clear_layers', 'set_legend'}
+MAP_FACTORIES = {'Map', 'make_map'}
+# Methods whose fixed .html path argument is pointed at output_path
+OUTPUT_METHODS = {'save', 'to_html'}
+
+
+@dataclass
+class Diagnostic:
+    severity: str  # 'error', 'warning' or 'fixed'
+    code: str
+    message: str
+    line: Optional[int] = None
+
+    def __str__(self) -> str:
+        location = f"line {self.line}: " if self.line else ''
+        return f"[{self.severity}] {location}{self.message}"
+
+
+@dataclass
+class PreflightResult:
+    code: str
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not any(d.severity == 'error' for d in self.diagnostics)
+
+    @property
+    def rewritten(self) -> bool:
+        return any(d.severity == 'fixed' for d in self.diagnostics)
+
+    def report(self) -> str:
+        return '\n'.join(str(d) for d in self.diagnostics)
+
+
+class CodePreflight:
+    """AST checks run on generated code before it is sent to a worker.
+
+    Catches syntax errors, unknown imports, h3 v3 API names, shapely
+    functions imported from shapely.geometry, direct reads of the dataset
+    files and runs that never write a map. Trivially fixable problems are
+    rewritten in place; the rest are reported as errors (the code is not
+    run) or warnings.
+    """
+
+    _spec_cache: Dict[str, bool] = {}
+
+    @classmethod
+    def check(cls, code: str) -> PreflightResult:
+        try:
+            tree = ast.parse(code)
+        except SyntaxError as e:
+            return PreflightResult(code, [Diagnostic('error', 'syntax', f"Syntax error: {e.msg}", e.lineno)])
+
+        diagnostics: List[Diagnostic] = []
+        edits: List[Tuple[int, int, int, int, str]] = []
+        h3_aliases = cls._check_imports(tree, diagnostics, edits)
+        cls._check_calls(tree, h3_aliases, diagnostics, edits)
+
+        fixed = cls._apply_edits(code, edits)
+        if edits:
+            try:
+                tree = ast.parse(fixed)
+            except SyntaxError:
+                diagnostics = [d for d in diagnostics if d.severity != 'fixed']
+                diagnostics.append(Diagnostic('warning', 'rewrite-failed', "Automatic fixes were not applied"))
+                fixed = code
+
+        fixed = cls._check_output(tree, fixed, diagnostics)
+        return PreflightResult(fixed, diagnostics)
+
+    @classmethod
+    def module_exists(cls, name: str) -> bool:
+        if name not in cls._spec_cache:
+            try:
+                cls._spec_cache[name] = importlib.util.find_spec(name) is not None
+            except (ImportError, ValueError):
+                cls._spec_cache[name] = False
+        return cls._spec_cache[name]
+
+    @classmethod
+    def _check_imports(cls, tree: ast.AST, diagnostics: List[Diagnostic], edits: list) -> set:
+        h3_aliases = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    top = alias.name.split('.')[0]
+                    if top == 'h3':
+                        h3_aliases.add(alias.asname or 'h3')
+                    if not cls.module_exists(top):
+                        diagnostics.append(Diagnostic('error', 'unknown-import',
+                                                      f"Module '{alias.name}' is not installed", node.lineno))
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                top = node.module.split('.')[0]
+                if not cls.module_exists(top):
+                    diagnostics.append(Diagnostic('error', 'unknown-import',
+                                                  f"Module '{node.module}' is not installed", node.lineno))
+                elif node.module == 'shapely.geometry':
+                    cls._check_shapely_import(node, diagnostics, edits)
+                elif node.module == 'h3':
+                    for alias in node.names:
+                        if alias.name in H3_RENAMES:
+                            cls._rename_h3(alias.name, node, diagnostics, edits)
+        return h3_aliases
+
+    @staticmethod
+    def _check_shapely_import(node: ast.ImportFrom, diagnostics: List[Diagnostic], edits: list):
+        wrong = [alias for alias in node.names if alias.name in SHAPELY_FUNCTIONS]
+        if not wrong:
+            return
+        kept = [alias for alias in node.names if alias.name not in SHAPELY_FUNCTIONS]
+        statements = []
+        if kept:
+            statements.append("from shapely.geometry import " + ', '.join(_alias_text(a) for a in kept))
+        statements.append("from shapely import " + ', '.join(_alias_text(a) for a in wrong))
+        edits.append((node.lineno, node.col_offset, node.end_lineno, node.end_col_offset, '; '.join(statements)))
+        names = ', '.join(alias.name for alias in wrong)
+        diagnostics.append(Diagnostic('fixed', 'shapely-import',
+                                      f"Imported {names} from shapely instead of shapely.geometry", node.lineno))
+
+    @staticmethod
+    def _rename_h3(old: str, node: ast.AST, diagnostics: List[Diagnostic], edits: list):
+        new = H3_RENAMES[old]
+        if old in H3_SIGNATURE_CHANGED:
+            diagnostics.append(Diagnostic('warning', 'h3-api',
+                                          f"h3.{old} is h3.{new} in h3 v4 and takes different arguments",
+                                          node.lineno))
+            return
+        if isinstance(node, ast.Attribute):
+            edits.append((node.end_lineno, node.end_col_offset - len(old),
+                          node.end_lineno, node.end_col_offset, new))
+        else:
+            # from h3 import geo_to_h3 -> keep the old name bound to the new function
+            text = ', '.join(
+                f"{H3_RENAMES[a.name]} as {a.asname or a.name}"
+                if a.name in H3_RENAMES and a.name not in H3_SIGNATURE_CHANGED else _alias_text(a)
+                for a in node.names
+            )
+            edits.append((node.lineno, node.col_offset, node.end_lineno, node.end_col_offset,
+                          f"from h3 import {text}"))
+        diagnostics.append(Diagnostic('fixed', 'h3-api', f"Renamed h3.{old} to h3.{new} (h3 v4)", node.lineno))
+
+    @classmethod
+    def _check_calls(cls, tree: ast.AST, h3_aliases: set, diagnostics: List[Diagnostic], edits: list):
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Attribute) and node.attr in H3_RENAMES
+                    and isinstance(node.value, ast.Name) and node.value.id in h3_aliases):
+                cls._rename_h3(node.attr, node, diagnostics, edits)
+            elif isinstance(node, ast.Call):
+                cls._check_dataset_read(node, diagnostics, edits)
+
+    @staticmethod
+    def _check_dataset_read(node: ast.Call, diagnostics: List[Diagnostic], edits: list):
+        func = node.func
+        name = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+        if name not in READ_FUNCTIONS or len(node.args) != 1 or node.keywords:
+            return
+        argument = node.args[0]
+        if not (isinstance(argument, ast.Constant) and isinstance(argument.value, str)):
+            return
+        match = DATASET_FILE_PATTERN.search(argument.value)
+        if not match:
+            return
+        dataset = match.group('name')
+        edits.append((node.lineno, node.col_offset, node.end_lineno, node.end_col_offset,
+                      f"load_dataset('{dataset}')"))
+        diagnostics.append(Diagnostic('fixed', 'dataset-path',
+                                      f"Replaced reading '{argument.value}' with load_dataset('{dataset}')",
+                                      node.lineno))
+
+    @staticmethod
+    def _check_output(tree: ast.AST, code: str, diagnostics: List[Diagnostic]) -> str:
+        """Check that the run leaves a map behind, pointing fixed .save()/.to_html() paths at output_path"""
+        names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+        calls = [node for node in ast.walk(tree) if isinstance(node, ast.Call)]
+        called = {node.func.attr if isinstance(node.func, ast.Attribute) else getattr(node.func, 'id', None)
+                  for node in calls}
+        if 'output_path' in names or called & LAYER_UPDATE_CALLS:
+            return code
+
+        edits = []
+        for node in calls:
+            if not (isinstance(node.func, ast.Attribute) and node.func.attr in OUTPUT_METHODS
+                    and len(node.args) == 1):
+                continue
+            argument = node.args[0]
+            path = _html_path_text(argument)
+            if path is None:
+                continue
+            edits.append((argument.lineno, argument.col_offset, argument.end_lineno,
+                          argument.end_col_offset, 'output_path'))
+            diagnostics.append(Diagnostic('fixed', 'output-path',
+                                          f"Saving to output_path instead of {path}", node.lineno))
+        if edits:
+            return CodePreflight._apply_edits(code, edits)
+
+        map_variable = None
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                    and isinstance(node.targets[0], ast.Name) and isinstance(node.value, ast.Call)):
+                func = node.value.func
+                factory = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+                if factory in MAP_FACTORIES:
+                    map_variable = node.targets[0].id
+        if map_variable and 'save' not in called:
+            diagnostics.append(Diagnostic('fixed', 'missing-output',
+                                          f"Added {map_variable}.save(output_path), the map was never saved"))
+            return code.rstrip('\n') + f"\n{map_variable}.save(output_path)\n"
+
+        # Answers that only print are fine, the run just has no map to show
+        if 'save' in called or 'to_html' in called or 'write' in called:
+            diagnostics.append(Diagnostic('warning', 'missing-output',
+                                          "The map is not written to output_path, the run may not be shown"))
+        else:
+            diagnostics.append(Diagnostic('warning', 'missing-output',
+                                          "The code never writes a map, only its output will be shown"))
+        return code
+
+    @staticmethod
+    def _apply_edits(code: str, edits: List[Tuple[int, int, int, int, str]]) -> str:
+        """Apply (start line, start col, end line, end col, text) edits; columns are UTF-8 byte offsets"""
+        if not edits:
+            return code
+        lines = code.splitlines(keepends=True)
+        starts = [0]
+        for line in lines:
+            starts.append(starts[-1] + len(line))
+
+        def offset(line: int, column: int) -> int:
+            text = lines[line - 1]
+            return starts[line - 1] + len(text.encode('utf-8')[:column].decode('utf-8', errors='ignore'))
+
+        spans = sorted(((offset(l1, c1), offset(l2, c2), text) for l1, c1, l2, c2, text in set(edits)),
+                       reverse=True)
+        previous_start = len(code) + 1
+        for start, end, text in spans:
+            if end > previous_start:
+                continue  # overlapping edit, keep the later one
+            code = code[:start] + text + code[end:]
+            previous_start = start
+        return code
+
+
+def _alias_text(alias: ast.alias) -> str:
+    return f"{alias.name} as {alias.asname}" if alias.asname else alias.name
+
+
+def _html_path_text(argument: ast.AST) -> Optional[str]:
+    """Source text of a string or f-string argument naming an .html file, None for anything else"""
+    if isinstance(argument, ast.Constant) and isinstance(argument.value, str):
+        return f"'{argument.value}'" if argument.value.endswith('.html') else None
+    if (isinstance(argument, ast.JoinedStr) and argument.values and isinstance(argument.values[-1], ast.Constant)
+            and str(argument.values[-1].value).endswith('.html')):
+        return ast.unparse(argument)
+    return None
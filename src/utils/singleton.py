@@ -0,0 +1,23 @@
+# src/utils/singleton.py
+import threading
+
+
+class Singleton:
+    """Mixin giving a class one lazily created, process-wide instance()"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # One instance and lock per class; constructors may call other classes' instance()
+        cls._instance = None
+        cls._instance_lock = threading.Lock()
+
+    @classmethod
+    def instance(cls):
+        """Return the process-wide instance"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
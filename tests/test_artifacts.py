@@ -0,0 +1,45 @@
+import os
+import time
+
+from src.core.artifacts import ArtifactRetention, artifact_files
+
+
+def write(path, size=10, age=0.0):
+    path.write_bytes(b'x' * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_artifact_files_returns_map_and_sidecars(tmp_path):
+    html = write(tmp_path / 'temp_map_1_1.html')
+    write(tmp_path / 'temp_map_1_1.layers.json')
+    write(tmp_path / 'temp_map_1_1.data_abc.geojson.gz')
+    write(tmp_path / 'temp_map_1_10.html')
+    names = [os.path.basename(path) for path in artifact_files(str(html))]
+    assert names == ['temp_map_1_1.data_abc.geojson.gz', 'temp_map_1_1.html', 'temp_map_1_1.layers.json']
+
+
+def test_prune_removes_maps_with_their_sidecars(tmp_path):
+    write(tmp_path / 'temp_map_old.html', age=100)
+    write(tmp_path / 'temp_map_old.data_abc.geojson.gz', age=100)
+    write(tmp_path / 'temp_map_new.html', age=10)
+    write(tmp_path / 'temp_map_new.data_def.geojson.gz', age=10)
+    write(tmp_path / 'unrelated.txt', age=1000)
+
+    removed = ArtifactRetention(str(tmp_path), max_files=1).prune()
+
+    assert removed == 1
+    assert sorted(os.listdir(tmp_path)) == ['temp_map_new.data_def.geojson.gz', 'temp_map_new.html',
+                                            'unrelated.txt']
+
+
+def test_prune_counts_sidecar_bytes_and_keeps_newest(tmp_path):
+    write(tmp_path / 'temp_map_a.html', size=10, age=30)
+    write(tmp_path / 'temp_map_b.html', size=10, age=20)
+    write(tmp_path / 'temp_map_b.data_x.geojson.gz', size=100, age=20)
+    write(tmp_path / 'temp_map_c.html', size=500, age=10)
+
+    ArtifactRetention(str(tmp_path), max_files=10, max_bytes=50).prune()
+
+    assert os.listdir(tmp_path) == ['temp_map_c.html']
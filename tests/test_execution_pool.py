@@ -0,0 +1,62 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from src.core.artifacts import ArtifactRetention
+from src.core.execution_pool import ExecutionPool, ExecutionResult, describe_limit, was_cancelled
+
+
+def limit(kind, value=None):
+    return {'kind': kind, 'limit': value, 'elapsed_seconds': 1.5, 'peak_memory_mb': None}
+
+
+def test_cancelled_run_is_recognized_from_its_output():
+    output = f"partial output\n\n{describe_limit(limit('cancelled'))}\n"
+    assert was_cancelled(output)
+    assert was_cancelled(output + "(the execution worker was restarted)\n")
+
+
+def test_failures_are_not_cancellations():
+    assert not was_cancelled("Traceback (most recent call last):\nKeyError: 'rent'\n")
+    assert not was_cancelled(f"\n{describe_limit(limit('wall_time', 120))}\n")
+
+
+class FakeWorker:
+    def __init__(self):
+        self.cancel_event = threading.Event()
+        self.process = SimpleNamespace(pid=0, exitcode=None)
+        self.runs = []
+
+    def run(self, job_id, code, limits, profile=False, fresh=False):
+        self.runs.append(job_id)
+        return ExecutionResult('', None, True)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_alive(self):
+        return True
+
+    def stop(self):
+        pass
+
+
+def test_cancel_before_a_worker_is_free_drops_the_job(tmp_path, monkeypatch):
+    monkeypatch.setattr(ExecutionPool, '_spawn', lambda self: FakeWorker())
+    pool = ExecutionPool(1, ArtifactRetention(str(tmp_path)))
+    worker = pool._idle.get()
+    try:
+        future = pool.submit('x = 1')
+        while not future.running():
+            time.sleep(0.01)
+
+        assert pool.cancel(future.job_id) == 'running'
+        pool._idle.put(worker)
+        result = future.result(timeout=5)
+
+        assert not result.success and result.limit['kind'] == 'cancelled'
+        assert was_cancelled(result.output)
+        assert worker.runs == []
+        assert pool.run('x = 2').success
+    finally:
+        pool.shutdown()
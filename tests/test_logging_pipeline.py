@@ -0,0 +1,31 @@
+import logging
+import multiprocessing
+
+from src.core.logging_pipeline import LoggingPipeline
+
+
+def log_from_worker(config):
+    LoggingPipeline.attach(config)
+    logging.getLogger('src.core.execution_pool').info("Worker ready")
+    logging.getLogger('src.core.noisy').info("Dropped by its level")
+
+
+def test_spawned_processes_log_through_the_pipeline(tmp_path):
+    path = tmp_path / 'app.log'
+    pipeline = LoggingPipeline(str(path), level='INFO', console_level='CRITICAL',
+                               levels={'src.core.noisy': 'WARNING'})
+    pipeline.start()
+    try:
+        assert LoggingPipeline.active() is pipeline
+        process = multiprocessing.get_context('spawn').Process(target=log_from_worker,
+                                                               args=(pipeline.child_config(),))
+        process.start()
+        process.join(timeout=30)
+        assert process.exitcode == 0
+    finally:
+        pipeline.stop()
+
+    text = path.read_text(encoding='utf-8')
+    assert 'src.core.execution_pool - INFO - Worker ready' in text
+    assert 'Dropped by its level' not in text
+    assert LoggingPipeline.active() is None
@@ -0,0 +1,82 @@
+import http.client
+import os
+
+import pytest
+
+from src.core.map_assets import MapAssetServer, served_path
+
+
+@pytest.fixture
+def served_tree(tmp_path):
+    (tmp_path / 'assets' / 'vendor').mkdir(parents=True)
+    (tmp_path / 'assets' / 'vendor' / 'leaflet.js').write_text('// leaflet')
+    (tmp_path / 'map_output').mkdir()
+    (tmp_path / 'map_output' / 'temp_map_1.html').write_text('<html></html>')
+    (tmp_path / 'cache' / 'executions' / 'abc').mkdir(parents=True)
+    (tmp_path / 'cache' / 'executions' / 'abc' / 'temp_map_2.html').write_text('<html>cached</html>')
+    (tmp_path / 'cache' / 'responses').mkdir()
+    (tmp_path / 'cache' / 'responses' / 'key.json').write_text('{"response": "secret"}')
+    (tmp_path / 'config').mkdir()
+    (tmp_path / 'config' / 'config.json').write_text('{"api_key": "secret"}')
+    return tmp_path
+
+
+@pytest.fixture
+def server(served_tree):
+    server = MapAssetServer(root=str(served_tree))
+    assert server.start()
+    yield server
+    server.stop()
+
+
+def get(server, path):
+    connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+def test_serves_files_under_allowed_roots(server):
+    assert get(server, '/map_output/temp_map_1.html') == (200, b'<html></html>')
+    assert get(server, '/assets/vendor/leaflet.js')[0] == 200
+    assert get(server, '/cache/executions/abc/temp_map_2.html') == (200, b'<html>cached</html>')
+
+
+@pytest.mark.parametrize('path', [
+    '/config/config.json',
+    '/cache/responses/key.json',
+    '/cache/executions/../responses/key.json',
+    '/assets/../config/config.json',
+    '/map_output/%2e%2e/config/config.json',
+    '/map_output/..%2fconfig/config.json',
+])
+def test_rejects_paths_outside_allowed_roots(server, path):
+    status, body = get(server, path)
+    assert status == 404
+    assert b'secret' not in body
+
+
+def test_served_path_resolves_traversal(served_tree):
+    root = str(served_tree)
+    assert served_path(root, os.path.join(root, 'map_output', 'temp_map_1.html'))
+    assert served_path(root, os.path.join(root, 'assets', '..', 'config', 'config.json')) is None
+    # A sibling that merely shares the prefix is not inside the root
+    assert served_path(root, os.path.join(root, 'assets_private', 'x.js')) is None
+
+
+def test_served_path_follows_symlinks(served_tree):
+    link = served_tree / 'map_output' / 'config_link'
+    try:
+        link.symlink_to(served_tree / 'config')
+    except (OSError, NotImplementedError):
+        pytest.skip("symlinks are not available")
+    assert served_path(str(served_tree), str(link / 'config.json')) is None
+
+
+def test_url_for_only_maps_served_files(server, served_tree):
+    assert server.url_for(str(served_tree / 'map_output' / 'temp_map_1.html')).endswith(
+        '/map_output/temp_map_1.html')
+    assert server.url_for(str(served_tree / 'config' / 'config.json')) is None
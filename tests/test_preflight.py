@@ -0,0 +1,90 @@
+import ast
+
+from src.utils.preflight import CodePreflight
+
+
+def codes(result, severity=None):
+    return [d.code for d in result.diagnostics if severity is None or d.severity == severity]
+
+
+def test_print_only_code_runs_with_a_warning():
+    code = "print(buildings_1740['rent_price'].mean())"
+    result = CodePreflight.check(code)
+    assert result.ok
+    assert result.code == code
+    assert codes(result, 'warning') == ['missing-output']
+
+
+def test_syntax_error_is_rejected():
+    result = CodePreflight.check("print(")
+    assert not result.ok
+    assert codes(result, 'error') == ['syntax']
+
+
+def test_unknown_import_is_rejected():
+    result = CodePreflight.check("import not_a_real_module_xyz\nprint(1)")
+    assert not result.ok
+    assert 'unknown-import' in codes(result, 'error')
+
+
+def test_literal_save_path_is_rewritten():
+    result = CodePreflight.check("m = folium.Map()\nm.save('venice.html')")
+    assert result.ok
+    assert "m.save(output_path)" in result.code
+    assert codes(result, 'fixed') == ['output-path']
+
+
+def test_fstring_save_path_is_rewritten():
+    code = "m = folium.Map()\nname = 'x'\nm.save(f'maps/{name}_map.html')"
+    result = CodePreflight.check(code)
+    assert result.ok
+    assert "m.save(output_path)" in result.code
+    assert codes(result, 'fixed') == ['output-path']
+    ast.parse(result.code)
+
+
+def test_to_html_path_is_rewritten():
+    result = CodePreflight.check("deck = pdk.Deck(layers=[])\ndeck.to_html('deck.html')")
+    assert "deck.to_html(output_path)" in result.code
+    assert codes(result, 'fixed') == ['output-path']
+
+
+def test_non_html_paths_are_left_alone():
+    code = "df = buildings_1740.head()\ndf.to_csv('out.csv')\nm = folium.Map()\nm.save(f'{name}.png')"
+    result = CodePreflight.check(code)
+    assert "output_path" not in result.code
+    assert codes(result, 'warning') == ['missing-output']
+
+
+def test_unsaved_map_gets_saved():
+    result = CodePreflight.check("m = make_map()\nadd_points(m, buildings_1740)")
+    assert result.code.rstrip().endswith("m.save(output_path)")
+    assert codes(result, 'fixed') == ['missing-output']
+
+
+def test_code_using_output_path_has_no_output_diagnostics():
+    result = CodePreflight.check("m = make_map()\nm.save(output_path)")
+    assert result.diagnostics == []
+
+
+def test_layer_updates_need_no_page():
+    result = CodePreflight.check("show_layer(buildings_1740, 'all')")
+    assert result.diagnostics == []
+
+
+def test_dataset_file_read_is_replaced():
+    result = CodePreflight.check("df = pd.read_csv('data/buildings_1740.csv')\nprint(len(df))")
+    assert "load_dataset('buildings_1740')" in result.code
+    assert 'dataset-path' in codes(result, 'fixed')
+
+
+def test_h3_v3_names_are_renamed():
+    result = CodePreflight.check("import h3\ncell = h3.geo_to_h3(45.4, 12.3, 9)\nprint(cell)")
+    assert "h3.latlng_to_cell(" in result.code
+    assert 'h3-api' in codes(result, 'fixed')
+
+
+def test_h3_signature_change_is_only_a_warning():
+    result = CodePreflight.check("import h3\nprint(h3.hex_area(9))")
+    assert "h3.hex_area(" in result.code
+    assert 'h3-api' in codes(result, 'warning')
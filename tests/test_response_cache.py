@@ -0,0 +1,20 @@
+import os
+
+from src.core.response_cache import ResponseCache
+
+
+def test_put_writes_entries_atomically(tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    cache.put('abc', 'first')
+    cache.put('abc', 'second')
+    assert cache.get('abc') == 'second'
+    assert os.listdir(tmp_path) == ['abc.json']
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path), max_entries=1)
+    cache.put('old', 'x')
+    os.utime(tmp_path / 'old.json', (0, 0))
+    cache.put('new', 'y')
+    assert cache.get('old') is None
+    assert cache.get('new') == 'y'
@@ -0,0 +1,22 @@
+import json
+
+from src.core import tracing
+from src.core.tracing import Tracer
+
+
+def test_finish_trace_exports_in_the_background(tmp_path, monkeypatch):
+    monkeypatch.setattr(tracing, 'EXPORT_DELAY_S', 60.0)
+    path = tmp_path / 'traces.json'
+    tracer = Tracer(export_path=str(path))
+
+    for _ in range(3):
+        trace_id = tracer.start_trace('question')
+        tracer.record(trace_id, 'llm', 0.5)
+        tracer.finish_trace(trace_id)
+    assert not path.exists()
+
+    tracer.flush()
+    exported = json.loads(path.read_text(encoding='utf-8'))
+    assert len(exported['traces']) == 3
+    assert exported['summary']['llm']['count'] == 3
+    assert [p.name for p in tmp_path.iterdir()] == ['traces.json']